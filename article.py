@@ -0,0 +1,135 @@
+"""
+文章记录模块 - 使用 __slots__ 的紧凑文章类型，替代流水线中逐篇的字典
+
+Article 实现了可变映射接口（article["title"]、article.get("summary", "")、dict(article) 等），
+现有按字典读写文章的代码无需修改；同时可用属性访问（article.title）。
+期刊名和出版社名会被驻留(intern)，大量文章共享同一个字符串对象。
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+# 固定字段（按导出顺序），其他字段存放在按需创建的 _extra 字典中
+ARTICLE_SLOTS = (
+    "pmid", "title", "journal", "publisher", "pub_date", "doi", "authors", "abstract", "summary",
+    "relevance", "duplicate_pmids",
+)
+_SLOT_SET = frozenset(ARTICLE_SLOTS)
+
+# 取值范围很小、在文章间大量重复的字段
+_INTERNED = frozenset(("journal", "publisher"))
+
+
+def _compact(key: str, value: Any) -> Any:
+    # Biopython返回的StringElement等str子类各自带有属性字典，转为普通str以节省内存
+    if isinstance(value, str):
+        if type(value) is not str:
+            value = str(value)
+        if key in _INTERNED:
+            value = sys.intern(value)
+    return value
+
+
+class Article(MutableMapping):
+    __slots__ = ARTICLE_SLOTS + ("_extra",)
+
+    def __init__(self, data: Dict[str, Any] = None, **fields):
+        """
+        初始化文章记录
+
+        Args:
+            data: 文章字段字典
+            **fields: 文章字段
+        """
+        self._extra = None
+        for source in (data or {}, fields):
+            for key, value in source.items():
+                self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SLOT_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        value = _compact(key, value)
+        if key in _SLOT_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in _SLOT_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in ARTICLE_SLOTS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        if key in _SLOT_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # 直接读取槽位，避免MutableMapping默认实现的异常开销
+        if key in _SLOT_SET:
+            return getattr(self, key, default)
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def copy(self) -> "Article":
+        """浅复制"""
+        return Article(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（用于JSON序列化）"""
+        return {key: self[key] for key in self}
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self._extra = None
+        for key, value in state.items():
+            self[key] = value
+
+    def __repr__(self) -> str:
+        return f"Article({self.to_dict()!r})"
+
+
+def json_default(obj: Any) -> Any:
+    """
+    json.dump(s) 的 default 钩子：将 Article 序列化为普通字典
+
+    Args:
+        obj: 无法直接序列化的对象
+
+    Returns:
+        可序列化的对象
+    """
+    if isinstance(obj, Article):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,3 @@
+"""
+离线基准测试 - 本地模拟E-utilities与chat-completions服务，测量流程吞吐与延迟
+"""
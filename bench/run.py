@@ -0,0 +1,270 @@
+"""
+基准测试 - 在本地模拟服务上测量 main.py 流程与Web任务 (run_search_task) 的吞吐与延迟
+
+用法（在项目根目录执行）:
+    python -m bench.run                         # 运行全部场景并与基线比较
+    python -m bench.run --scenario pipeline --articles 500 --workers 8
+    python -m bench.run --llm-429-rate 0.05     # 模拟限流
+    python -m bench.run --llm-endpoints 3 --llm-failing-endpoints 1   # 多端点路由与故障切换
+    python -m bench.run --save-baseline         # 将本次结果写入基线文件
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config
+from bench.synthetic import SyntheticCorpus
+from bench.servers import EUtilsServer, ChatCompletionsServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# 按流程顺序排列的阶段（对应模拟服务记录的请求类型）
+STAGES = ["optimize_terms", "esearch", "esummary", "efetch", "summary", "polish_topic", "review"]
+
+# 与基线比较的指标（值越小越好）
+COMPARED_METRICS = ["wall_s", "summary_window_s", "summary_p50_s", "summary_p99_s", "efetch_window_s"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def collect_metrics(records: List[Dict], wall: float, articles: int) -> Dict:
+    """
+    根据模拟服务的请求记录汇总各阶段指标
+
+    Args:
+        records: 两个模拟服务的请求记录
+        wall: 端到端耗时(秒)
+        articles: 完成总结的文章数
+
+    Returns:
+        指标字典
+    """
+    metrics = {"wall_s": round(wall, 3), "articles": articles,
+               "articles_per_s": round(articles / wall, 3) if wall else 0.0}
+    for stage in STAGES:
+        stage_records = [r for r in records if r["kind"] == stage]
+        if not stage_records:
+            continue
+        latencies = [r["end"] - r["start"] for r in stage_records]
+        window = max(r["end"] for r in stage_records) - min(r["start"] for r in stage_records)
+        metrics[f"{stage}_requests"] = len(stage_records)
+        metrics[f"{stage}_errors"] = sum(1 for r in stage_records if r["status"] != 200)
+        metrics[f"{stage}_window_s"] = round(window, 3)
+        metrics[f"{stage}_p50_s"] = round(percentile(latencies, 50), 4)
+        metrics[f"{stage}_p99_s"] = round(percentile(latencies, 99), 4)
+    return metrics
+
+
+def run_pipeline(args) -> int:
+    """运行 main.py 的命令行流程，返回完成总结的文章数"""
+    import main
+    argv = sys.argv
+    sys.argv = ["main.py", "-t", args.topic, "-m", str(args.articles), "-w", str(args.workers)]
+    if args.parallel_review:
+        sys.argv.append("--parallel-review")
+    try:
+        with redirect_stdout(io.StringIO()):
+            main.main()
+    finally:
+        sys.argv = argv
+    report = os.path.join(config.OUTPUT_DIR, config.REPORT_FILE)
+    if not os.path.exists(report):
+        return 0
+    with open(report, encoding="utf-8") as f:
+        return sum(1 for line in f if line.startswith("## 文章 "))
+
+
+def run_web(args) -> int:
+    """通过Flask测试客户端提交搜索任务并轮询至结束，返回完成总结的文章数"""
+    sys.path.insert(0, os.path.join(ROOT, "web"))
+    with redirect_stdout(io.StringIO()):
+        import app as web_app
+    # 输出写入本次运行的临时目录
+    web_app.OUTPUT_DIR = config.OUTPUT_DIR
+    web_app.tasks.output_dir = config.OUTPUT_DIR
+    client = web_app.app.test_client()
+    response = client.post("/api/search", json={
+        "topic": args.topic,
+        "max_results": args.articles,
+        "max_workers": args.workers,
+        "api_key": "bench",
+        "enable_filter": True,
+        "parallel_review": args.parallel_review,
+    })
+    task_id = response.get_json()["task_id"]
+    with redirect_stdout(io.StringIO()):
+        while True:
+            status = client.get(f"/api/task/{task_id}").get_json()
+            if status["status"] in ("completed", "error", "cancelled"):
+                break
+            time.sleep(0.05)
+    if status["status"] != "completed":
+        raise RuntimeError(f"Web任务失败: {status.get('message')}")
+    return status.get("result_count", 0)
+
+
+SCENARIOS = {"pipeline": run_pipeline, "web": run_web}
+
+
+def scenario_params(args) -> Dict:
+    """影响结果的参数，仅在参数一致时与基线比较"""
+    params = {key: getattr(args, key) for key in (
+        "articles", "corpus", "workers", "eutils_latency", "llm_latency", "llm_jitter",
+        "llm_error_rate", "llm_429_rate", "eutils_error_rate", "eutils_429_rate", "seed")}
+    # 多端点参数只在使用时记录，单端点结果仍可与已有基线比较
+    if args.llm_endpoints > 1:
+        params.update(llm_endpoints=args.llm_endpoints, llm_failing_endpoints=args.llm_failing_endpoints)
+    if args.llm_prompt_rate:
+        params.update(llm_prompt_rate=args.llm_prompt_rate)
+    if args.llm_tokens_per_second:
+        params.update(llm_tokens_per_second=args.llm_tokens_per_second)
+    if args.parallel_review:
+        params.update(parallel_review=True)
+    return params
+
+
+def compare(name: str, metrics: Dict, params: Dict, baselines: Dict, tolerance: float) -> bool:
+    """
+    与基线比较并打印结果
+
+    Returns:
+        是否没有超出容差的退化
+    """
+    baseline = baselines.get(name)
+    if not baseline:
+        print(f"  (无 {name} 基线，使用 --save-baseline 保存)")
+        return True
+    if baseline.get("params") != params:
+        print("  (基线参数与本次不同，跳过比较)")
+        return True
+
+    ok = True
+    print(f"  {'指标':<22}{'基线':>10}{'本次':>10}{'变化':>9}")
+    for key in COMPARED_METRICS:
+        old, new = baseline["metrics"].get(key), metrics.get(key)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- 退化"
+            ok = False
+        print(f"  {key:<22}{old:>10.3f}{new:>10.3f}{change:>+9.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线基准测试（本地模拟E-utilities与LLM服务）")
+    parser.add_argument("--scenario", choices=["all"] + list(SCENARIOS), default="all")
+    parser.add_argument("--topic", default="食管癌免疫治疗")
+    parser.add_argument("--articles", type=int, default=200, help="max_results")
+    parser.add_argument("--corpus", type=int, default=2000, help="合成文章库大小")
+    parser.add_argument("--workers", type=int, default=8, help="总结并发数")
+    parser.add_argument("--eutils-latency", type=float, default=0.05)
+    parser.add_argument("--eutils-error-rate", type=float, default=0.0)
+    parser.add_argument("--eutils-429-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="LLM延迟的对数正态抖动")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-429-rate", type=float, default=0.0)
+    parser.add_argument("--llm-prompt-rate", type=float, default=0.0,
+                        help="LLM处理提示词的速度(字符/秒)，>0时长摘要的请求更慢")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0,
+                        help="LLM生成速度(字符/秒)，>0时按输出长度增加耗时（综述等长输出更慢）")
+    parser.add_argument("--parallel-review", action="store_true", help="分章节并发生成文献综述")
+    parser.add_argument("--llm-endpoints", type=int, default=1, help="LLM模拟服务数（>1时通过LLM_ENDPOINTS路由）")
+    parser.add_argument("--llm-failing-endpoints", type=int, default=0, help="其中始终返回500的服务数")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="允许的退化比例")
+    parser.add_argument("--output", default="", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(size=args.corpus, seed=args.seed)
+    eutils = EUtilsServer(corpus, latency=args.eutils_latency, error_rate=args.eutils_error_rate,
+                          rate_429=args.eutils_429_rate, seed=args.seed).start()
+    llms = [
+        ChatCompletionsServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                              error_rate=1.0 if i < args.llm_failing_endpoints else args.llm_error_rate,
+                              rate_429=args.llm_429_rate, prompt_chars_per_second=args.llm_prompt_rate,
+                              tokens_per_second=args.llm_tokens_per_second,
+                              seed=args.seed + i).start()
+        for i in range(max(1, args.llm_endpoints))
+    ]
+
+    # E-utilities请求全部经由 EUtilsClient，改写其地址即可指向模拟服务
+    config.EUTILS_BASE_URL = eutils.eutils_url
+    config.DEEPSEEK_BASE_URL = llms[-1].url
+    config.DEEPSEEK_API_KEY = "bench"
+    if len(llms) > 1:
+        config.LLM_ENDPOINTS = [{"base_url": llm.url, "name": f"llm{i}"} for i, llm in enumerate(llms)]
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    params = scenario_params(args)
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {}
+    all_ok = True
+
+    for name in names:
+        eutils.reset()
+        for llm in llms:
+            llm.reset()
+        with tempfile.TemporaryDirectory() as output_dir:
+            config.OUTPUT_DIR = output_dir
+            start = time.time()
+            articles = SCENARIOS[name](args)
+            wall = time.time() - start
+        metrics = collect_metrics(eutils.records + [r for llm in llms for r in llm.records], wall, articles)
+        results[name] = {"params": params, "metrics": metrics}
+
+        print(f"\n[{name}] {articles} 篇文章, 耗时 {wall:.2f}s, {metrics['articles_per_s']:.2f} 篇/秒")
+        for stage in STAGES:
+            if f"{stage}_requests" in metrics:
+                print(f"  {stage:<15} 请求 {metrics[f'{stage}_requests']:>5}  "
+                      f"错误 {metrics[f'{stage}_errors']:>3}  "
+                      f"窗口 {metrics[f'{stage}_window_s']:>7.2f}s  "
+                      f"p50 {metrics[f'{stage}_p50_s']:.3f}s  p99 {metrics[f'{stage}_p99_s']:.3f}s")
+        all_ok = compare(name, metrics, params, baselines, args.tolerance) and all_ok
+
+    eutils.stop()
+    for llm in llms:
+        llm.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        baselines.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n基线已保存到: {args.baseline}")
+
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+本地模拟服务 - E-utilities (esearch/efetch/esummary) 与 OpenAI兼容的 /chat/completions
+
+两个服务都支持可配置的延迟、错误率和429限流比例，并在服务端记录每个请求的耗时，
+供基准测试统计各阶段的延迟分布。
+"""
+
+import json
+import re
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+from bench.synthetic import SyntheticCorpus
+
+
+class StandInServer:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, seed: int = 0):
+        """
+        初始化模拟服务
+
+        Args:
+            latency: 每个请求的基础延迟(秒)
+            jitter: 延迟的对数正态抖动系数（0表示固定延迟）
+            error_rate: 返回500的比例
+            rate_429: 返回429的比例
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.records: List[Dict] = []
+        self.httpd = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def reset(self):
+        with self.lock:
+            self.records = []
+
+    def _draw(self):
+        """抽取本次请求的延迟与故障类型"""
+        with self.lock:
+            delay = self.latency
+            if self.jitter and delay:
+                delay *= self.rng.lognormvariate(0, self.jitter)
+            roll = self.rng.random()
+        if roll < self.rate_429:
+            return delay, 429
+        if roll < self.rate_429 + self.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def _record(self, kind: str, start: float, status: int, **extra):
+        with self.lock:
+            self.records.append({"kind": kind, "start": start, "end": time.time(), "status": status, **extra})
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        start = time.time()
+        parsed = urlparse(handler.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        body = b""
+        if method == "POST":
+            body = handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+        try:
+            self.handle(handler, parsed.path, params, body, start)
+        except (BrokenPipeError, ConnectionResetError):
+            self._record("aborted", start, 499)
+
+    def handle(self, handler, path: str, params: Dict, body: bytes, start: float):
+        raise NotImplementedError
+
+    @staticmethod
+    def send(handler, status: int, body: bytes, content_type: str = "text/plain", headers: Dict = None):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+class EUtilsServer(StandInServer):
+    def __init__(self, corpus: SyntheticCorpus = None, **kwargs):
+        """
+        E-utilities模拟服务，路径与NCBI一致: /entrez/eutils/{esearch,efetch,esummary}.fcgi
+
+        Args:
+            corpus: 合成文章库
+        """
+        super().__init__(**kwargs)
+        self.corpus = corpus or SyntheticCorpus()
+
+    @property
+    def eutils_url(self) -> str:
+        return f"{self.url}/entrez/eutils/"
+
+    def handle(self, handler, path: str, params: Dict, body: bytes, start: float):
+        if body:
+            params.update({k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()})
+        kind = path.rsplit("/", 1)[-1].replace(".fcgi", "")
+
+        delay, status = self._draw()
+        time.sleep(delay)
+        if status != 200:
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self.send(handler, status, b"simulated failure", headers=headers)
+            self._record(kind, start, status)
+            return
+
+        ids = [int(x) for x in params.get("id", "").split(",") if x.strip().isdigit()]
+        if kind == "esearch":
+            count, hits = self.corpus.search(params.get("term", ""), int(params.get("retmax", 20)))
+            payload = self.corpus.esearch_xml(count, hits)
+        elif kind == "efetch":
+            payload = self.corpus.efetch_xml(ids)
+        elif kind == "esummary":
+            payload = self.corpus.esummary_xml(ids)
+        else:
+            self.send(handler, 404, b"unknown utility")
+            self._record(kind, start, 404)
+            return
+
+        self.send(handler, 200, payload, content_type="text/xml; charset=UTF-8")
+        self._record(kind, start, 200, bytes=len(payload), ids=len(ids))
+
+
+# 模拟综述的一个段落（约100字，使综述与章节的输出长度接近真实比例）
+PARAGRAPH = "本段为模拟生成的综述正文，" * 8
+
+
+class ChatCompletionsServer(StandInServer):
+    def __init__(self, tokens_per_second: float = 0.0, prompt_chars_per_second: float = 0.0, **kwargs):
+        """
+        OpenAI兼容的 /chat/completions 模拟服务，支持普通与SSE流式响应
+
+        Args:
+            tokens_per_second: 生成速度，>0时按输出长度额外增加耗时
+            prompt_chars_per_second: 提示词处理速度，>0时按提示词长度额外增加耗时
+        """
+        super().__init__(**kwargs)
+        self.tokens_per_second = tokens_per_second
+        self.prompt_chars_per_second = prompt_chars_per_second
+
+    @staticmethod
+    def classify(prompt: str) -> str:
+        """根据提示词判断调用类型，用于按阶段统计"""
+        if "生成5-10个优化的检索词" in prompt:
+            return "optimize_terms"
+        if "润色" in prompt:
+            return "polish_topic"
+        if "文献综述" in prompt:
+            return "review"
+        return "summary"
+
+    @staticmethod
+    def reply(kind: str, prompt: str) -> str:
+        if kind == "optimize_terms":
+            return "esophageal cancer immunotherapy\nesophageal carcinoma immune checkpoint\nESCC AND PD-1"
+        if kind == "polish_topic":
+            return "食管癌免疫治疗研究进展（Esophageal Cancer Immunotherapy）"
+        if kind == "review" and "综述大纲" in prompt:
+            # 分章节综述的大纲：把提示词中的文献编号平均分到4个小节
+            numbers = sorted({int(n) for n in re.findall(r"^\[(\d+)\]", prompt, re.MULTILINE)})
+            sections = [{"heading": f"模拟小节{i + 1}", "focus": "模拟论点", "articles": numbers[i::4][:15]}
+                        for i in range(4)]
+            return json.dumps({"title": "模拟综述", "introduction": numbers[:5], "sections": sections,
+                               "outlook": numbers[-5:]}, ensure_ascii=False)
+        if kind == "review" and "综述章节" in prompt:
+            cited = re.search(r"^\[(\d+)\]", prompt, re.MULTILINE)
+            marker = f"[{cited.group(1)}]" if cited else ""
+            return f"{PARAGRAPH}{marker}\n\n" * 7
+        if kind == "review":
+            return "# 综述\n\n" + f"{PARAGRAPH}[1]\n\n" * 40
+        return ("1. **研究类型**: 临床研究\n2. **主要发现**: 模拟发现。\n"
+                "3. **研究方法**: 模拟方法。\n4. **临床意义**: 模拟意义。")
+
+    def handle(self, handler, path: str, params: Dict, body: bytes, start: float):
+        request = json.loads(body or b"{}")
+        messages = request.get("messages") or [{}]
+        prompt = messages[-1].get("content", "")
+        kind = self.classify(prompt)
+
+        delay, status = self._draw()
+        text = self.reply(kind, prompt)
+        completion_tokens = len(text)
+        if self.tokens_per_second:
+            delay += completion_tokens / self.tokens_per_second
+        prompt_tokens = len(prompt)
+        if self.prompt_chars_per_second:
+            delay += prompt_tokens / self.prompt_chars_per_second
+
+        if status != 200:
+            time.sleep(delay / 4)
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self.send(handler, status, json.dumps({"error": {"message": "simulated"}}).encode(),
+                      content_type="application/json", headers=headers)
+            self._record(kind, start, status, model=request.get("model"))
+            return
+
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+
+        if not request.get("stream"):
+            time.sleep(delay)
+            payload = json.dumps({
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": usage, "model": request.get("model"),
+            }, ensure_ascii=False).encode("utf-8")
+            self.send(handler, 200, payload, content_type="application/json")
+            self._record(kind, start, 200, model=request.get("model"), tokens=usage["total_tokens"])
+            return
+
+        # SSE流式响应：首包前等待一半延迟，其余延迟分摊到各数据块
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write_chunk(data: bytes):
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+
+        chunks = [text[i:i + 20] for i in range(0, len(text), 20)] or [""]
+        time.sleep(delay / 2)
+        step = delay / 2 / len(chunks)
+        for piece in chunks:
+            event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            time.sleep(step)
+        final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+        write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        write_chunk(b"data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+        self._record(kind, start, 200, model=request.get("model"), tokens=usage["total_tokens"])
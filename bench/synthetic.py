@@ -0,0 +1,224 @@
+"""
+合成PubMed数据生成器 - 为本地E-utilities模拟服务提供确定性的文章数据
+"""
+
+import random
+import zlib
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+import config
+
+# 非目标期刊，用于模拟期刊筛选的淘汰比例
+DISTRACTOR_JOURNALS = [
+    "Frontiers in Oncology",
+    "Oncology Letters",
+    "PLoS One",
+    "BMC Cancer",
+    "Cancers",
+    "Medicine",
+    "World Journal of Gastroenterology",
+    "International Journal of Molecular Sciences",
+    "Journal of Cancer Research and Clinical Oncology",
+    "Thoracic Cancer",
+    "Cancer Medicine",
+    "Oncology Reports",
+]
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+SECTION_LABELS = ["BACKGROUND", "METHODS", "RESULTS", "CONCLUSIONS"]
+
+VOCABULARY = (
+    "esophageal squamous cell carcinoma tumor immune checkpoint inhibitor therapy patients cohort "
+    "survival progression expression gene mutation pathway signaling analysis clinical trial response "
+    "chemotherapy radiotherapy neoadjuvant resection biomarker sequencing single-cell microenvironment "
+    "macrophage lymphocyte infiltration prognosis hazard ratio confidence interval significantly "
+    "associated increased decreased mechanism model mice xenograft organoid proliferation apoptosis "
+    "metastasis invasion receptor ligand antibody treatment outcome randomized multicenter retrospective "
+    "prospective adenocarcinoma gastric junction inflammation fibroblast stromal T-cell exhaustion PD-1 "
+    "PD-L1 CTLA-4 TP53 NOTCH1 PIK3CA methylation transcriptomic proteomic machine learning risk score"
+).split()
+
+FIRST_NAMES = ["Wei", "Jing", "Li", "Hao", "Yan", "Maria", "John", "Anna", "David", "Sarah", "Kenji", "Min"]
+LAST_NAMES = ["Wang", "Li", "Zhang", "Liu", "Chen", "Smith", "Garcia", "Müller", "Tanaka", "Kim", "Brown"]
+
+ESEARCH_DOCTYPE = ('<!DOCTYPE eSearchResult PUBLIC "-//NLM//DTD esearch 20060628//EN" '
+                   '"https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20060628/esearch.dtd">')
+EFETCH_DOCTYPE = ('<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" '
+                  '"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">')
+ESUMMARY_DOCTYPE = ('<!DOCTYPE eSummaryResult PUBLIC "-//NLM//DTD esummary v1 20041029//EN" '
+                    '"https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20041029/esummary-v1.dtd">')
+
+
+class SyntheticCorpus:
+    def __init__(self, size: int = 2000, seed: int = 42, target_fraction: float = 0.3,
+                 no_abstract_fraction: float = 0.05, duplicate_fraction: float = 0.05,
+                 hit_fraction: float = 0.6, first_pmid: int = 40000000):
+        """
+        初始化合成文章库
+
+        Args:
+            size: 文章总数
+            seed: 随机种子，相同参数生成的数据完全一致
+            target_fraction: 来自目标期刊（config.JOURNALS）的文章比例
+            no_abstract_fraction: 无摘要文章比例
+            duplicate_fraction: 与较早文章摘要高度重复的文章比例
+            hit_fraction: 单个检索词命中的文章比例
+            first_pmid: 最新文章的PMID，PMID越小发表越早
+        """
+        self.size = size
+        self.seed = seed
+        self.target_fraction = target_fraction
+        self.no_abstract_fraction = no_abstract_fraction
+        self.duplicate_fraction = duplicate_fraction
+        self.hit_fraction = hit_fraction
+        self.first_pmid = first_pmid
+        self.target_journals = sorted({j for journals in config.JOURNALS.values() for j in journals})
+        # 按日期从新到旧排列
+        self.pmids = [first_pmid - i for i in range(size)]
+        self._cache: Dict[int, Dict] = {}
+
+    def _rng(self, pmid: int) -> random.Random:
+        return random.Random(self.seed * 1000003 + pmid)
+
+    def _words(self, rng: random.Random, count: int) -> str:
+        return " ".join(rng.choice(VOCABULARY) for _ in range(count))
+
+    def article(self, pmid: int) -> Dict:
+        """
+        生成（或从缓存读取）单篇文章
+
+        Args:
+            pmid: PubMed ID
+
+        Returns:
+            文章字段字典，摘要为 [(标签, 文本)] 列表
+        """
+        pmid = int(pmid)
+        if pmid in self._cache:
+            return self._cache[pmid]
+
+        rng = self._rng(pmid)
+        index = self.first_pmid - pmid
+        if rng.random() < self.target_fraction:
+            journal = rng.choice(self.target_journals)
+        else:
+            journal = rng.choice(DISTRACTOR_JOURNALS)
+
+        # 越新的文章日期越近
+        months_ago = index * 24 // max(self.size, 1)
+        year = 2026 - (months_ago // 12)
+        month = MONTHS[11 - months_ago % 12]
+
+        sections: List[Tuple[str, str]] = []
+        if rng.random() >= self.no_abstract_fraction:
+            older = pmid - 1 - rng.randrange(50)
+            if rng.random() < self.duplicate_fraction and older > self.first_pmid - self.size:
+                # 勘误/重复发表：复用较早文章的摘要并改动少量词
+                base = self.article(older)["abstract"]
+                sections = [(label, self._mutate(rng, text)) for label, text in base]
+            else:
+                structured = rng.random() < 0.5
+                labels = SECTION_LABELS if structured else [""]
+                for label in labels:
+                    length = rng.randint(30, 110) if structured else rng.randint(120, 400)
+                    sections.append((label, self._words(rng, length) + "."))
+
+        authors = [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(rng.randint(1, 15))]
+        article = {
+            "pmid": pmid,
+            "title": self._words(rng, rng.randint(8, 18)).capitalize(),
+            "journal": journal,
+            "year": str(year),
+            "month": month,
+            "abstract": sections,
+            "authors": authors,
+            "doi": f"10.{1000 + pmid % 9000}/synthetic.{pmid}",
+        }
+        self._cache[pmid] = article
+        return article
+
+    def _mutate(self, rng: random.Random, text: str) -> str:
+        words = text.split()
+        for _ in range(max(1, len(words) // 40)):
+            words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+        return " ".join(words)
+
+    def search(self, term: str, retmax: int) -> Tuple[int, List[int]]:
+        """
+        模拟esearch：每个检索词确定性地命中一部分文章，按日期从新到旧返回
+
+        Args:
+            term: 检索式
+            retmax: 最大返回数
+
+        Returns:
+            (命中总数, PMID列表)
+        """
+        if "[uid]" in term.lower():
+            # 形如 "1 OR 2 OR 3[uid]" 或 "1,2,3[uid]" 的ID列表检索
+            ids = {int(tok) for tok in term.replace(",", " ").replace("[uid]", " ").split() if tok.isdigit()}
+            hits = [pmid for pmid in self.pmids if pmid in ids]
+        else:
+            salt = zlib.crc32(term.encode("utf-8"))
+            threshold = int(self.hit_fraction * 1000)
+            hits = [pmid for pmid in self.pmids if (pmid * 2654435761 + salt) % 1000 < threshold]
+        return len(hits), hits[:retmax]
+
+    def esearch_xml(self, count: int, ids: List[int]) -> bytes:
+        id_xml = "".join(f"<Id>{pmid}</Id>" for pmid in ids)
+        xml = (f'<?xml version="1.0" encoding="UTF-8" ?>\n{ESEARCH_DOCTYPE}\n'
+               f"<eSearchResult><Count>{count}</Count><RetMax>{len(ids)}</RetMax><RetStart>0</RetStart>"
+               f"<IdList>{id_xml}</IdList><TranslationSet/><QueryTranslation/></eSearchResult>")
+        return xml.encode("utf-8")
+
+    def efetch_xml(self, pmids: List[int]) -> bytes:
+        parts = [f'<?xml version="1.0" encoding="UTF-8" ?>\n{EFETCH_DOCTYPE}\n<PubmedArticleSet>']
+        for pmid in pmids:
+            if not (self.first_pmid - self.size < int(pmid) <= self.first_pmid):
+                continue
+            a = self.article(pmid)
+            abstract = ""
+            if a["abstract"]:
+                texts = "".join(
+                    f'<AbstractText Label="{label}">{escape(text)}</AbstractText>' if label
+                    else f"<AbstractText>{escape(text)}</AbstractText>"
+                    for label, text in a["abstract"]
+                )
+                abstract = f"<Abstract>{texts}</Abstract>"
+            authors = "".join(
+                f'<Author ValidYN="Y"><LastName>{escape(last)}</LastName><ForeName>{escape(first)}</ForeName></Author>'
+                for first, last in a["authors"]
+            )
+            parts.append(
+                f'<PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM">'
+                f'<PMID Version="1">{a["pmid"]}</PMID>'
+                f'<Article PubModel="Print"><Journal><JournalIssue CitedMedium="Internet">'
+                f'<PubDate><Year>{a["year"]}</Year><Month>{a["month"]}</Month></PubDate></JournalIssue>'
+                f'<Title>{escape(a["journal"])}</Title></Journal>'
+                f'<ArticleTitle>{escape(a["title"])}</ArticleTitle>{abstract}'
+                f'<AuthorList CompleteYN="Y">{authors}</AuthorList></Article></MedlineCitation>'
+                f'<PubmedData><ArticleIdList><ArticleId IdType="pubmed">{a["pmid"]}</ArticleId>'
+                f'<ArticleId IdType="doi">{escape(a["doi"])}</ArticleId></ArticleIdList></PubmedData>'
+                f'</PubmedArticle>'
+            )
+        parts.append("</PubmedArticleSet>")
+        return "".join(parts).encode("utf-8")
+
+    def esummary_xml(self, pmids: List[int]) -> bytes:
+        parts = [f'<?xml version="1.0" encoding="UTF-8" ?>\n{ESUMMARY_DOCTYPE}\n<eSummaryResult>']
+        for pmid in pmids:
+            if not (self.first_pmid - self.size < int(pmid) <= self.first_pmid):
+                continue
+            a = self.article(pmid)
+            parts.append(
+                f'<DocSum><Id>{a["pmid"]}</Id>'
+                f'<Item Name="PubDate" Type="Date">{a["year"]} {a["month"]}</Item>'
+                f'<Item Name="Source" Type="String">{escape(a["journal"])}</Item>'
+                f'<Item Name="Title" Type="String">{escape(a["title"])}</Item>'
+                f'<Item Name="FullJournalName" Type="String">{escape(a["journal"])}</Item>'
+                f'</DocSum>'
+            )
+        parts.append("</eSummaryResult>")
+        return "".join(parts).encode("utf-8")
@@ -0,0 +1,193 @@
+"""
+引用模块 - 在本地根据文章元数据生成文献综述的参考文献列表
+
+综述正文中模型只输出 [12]、[3, 5]、[2-4] 这样的编号标记（编号为提示词中文献的序号），
+作者、期刊、日期和DOI由这里按选定的引用格式排版，不再占用模型的输出token。
+编号格式（vancouver、nature）按正文中首次出现的顺序重新编号；作者-年份格式（apa）
+将标记替换为 (Author et al., 2024) 并按第一作者排序参考文献。
+"""
+
+import re
+from typing import Dict, List, Sequence
+
+import config
+
+CITATION_STYLES = ("vancouver", "nature", "apa")
+
+# 正文中的编号引用标记；排除Markdown链接 [1](...)
+_MARKER_RE = re.compile(r"\[(\d+(?:\s*[-–,，、;；]\s*\d+)*)\](?!\()")
+_RANGE_RE = re.compile(r"(\d+)\s*[-–]\s*(\d+)")
+_NUMBER_RE = re.compile(r"\d+")
+# 模型仍自行撰写的参考文献章节（到正文结尾）
+_REFERENCES_RE = re.compile(r"^#{1,6}\s*(?:\d+[.、]?\s*)?(?:参考文献|References)\s*$[\s\S]*",
+                            re.MULTILINE | re.IGNORECASE)
+
+
+def _authors(article: Dict) -> List[tuple]:
+    """作者列表 [(姓, 名缩写)]，作者字段为 "名 姓; 名 姓"（见 PubMedCrawler）"""
+    authors = []
+    for name in (article.get("authors") or "").split(";"):
+        parts = name.split()
+        if not parts:
+            continue
+        initials = "".join(part[0].upper() for fore in parts[:-1] for part in fore.split("-") if part)
+        authors.append((parts[-1], initials))
+    return authors
+
+
+def _year(article: Dict) -> str:
+    match = re.match(r"\d{4}", article.get("pub_date") or "")
+    return match.group(0) if match else "n.d."
+
+
+def _title(article: Dict) -> str:
+    return (article.get("title") or "").strip().rstrip(".")
+
+
+def format_reference(article: Dict, style: str = None) -> str:
+    """
+    按引用格式排版单条参考文献（Markdown）
+
+    Args:
+        article: 文章（使用 authors、title、journal、pub_date、doi、pmid 字段）
+        style: 引用格式，见 CITATION_STYLES，默认使用config.REVIEW_CITATION_STYLE
+
+    Returns:
+        参考文献文本（不含编号）
+    """
+    style = style or config.REVIEW_CITATION_STYLE
+    authors = _authors(article)
+    title, journal, year = _title(article), article.get("journal") or "", _year(article)
+    doi = article.get("doi") or ""
+
+    if style == "apa":
+        names = [f"{last}, {'. '.join(initials)}." if initials else last for last, initials in authors]
+        if len(names) > 20:
+            names = names[:19] + ["...", names[-1]]
+        if len(names) > 1:
+            names = names[:-1] + [f"& {names[-1]}"]
+        # 无作者时以标题作为首要素
+        lead = f"{', '.join(names)} ({year}). {title}." if names else f"{title}. ({year})."
+        text = f"{lead} *{journal}*."
+        return f"{text} https://doi.org/{doi}" if doi else text
+
+    if style == "nature":
+        names = [f"{last}, {'. '.join(initials)}." if initials else last for last, initials in authors]
+        if len(names) > 5:
+            authors_text = names[0] + " et al."
+        elif len(names) > 1:
+            authors_text = f"{', '.join(names[:-1])} & {names[-1]}"
+        else:
+            authors_text = "".join(names)
+        text = f"{authors_text + ' ' if authors_text else ''}{title}. *{journal}* ({year})."
+        return f"{text} https://doi.org/{doi}" if doi else text
+
+    # vancouver（ICMJE）：最多列出6位作者
+    names = [f"{last} {initials}".strip() for last, initials in authors]
+    if len(names) > 6:
+        names = names[:6] + ["et al"]
+    parts = [", ".join(names), title, journal, year if year != "n.d." else ""]
+    text = ". ".join(part for part in parts if part) + "."
+    if doi:
+        text += f" doi:{doi}"
+    if article.get("pmid"):
+        text += f" PMID: {article['pmid']}"
+    return text
+
+
+def _in_text(article: Dict) -> str:
+    """作者-年份格式的文内引用"""
+    authors = _authors(article)
+    if not authors:
+        name = _title(article)[:30]
+    elif len(authors) == 1:
+        name = authors[0][0]
+    elif len(authors) == 2:
+        name = f"{authors[0][0]} & {authors[1][0]}"
+    else:
+        name = f"{authors[0][0]} et al."
+    return f"{name}, {_year(article)}"
+
+
+def _marker_ids(marker: str, count: int) -> List[int]:
+    """解析一个引用标记中的文献序号（1起），含超出范围的序号时返回空列表（标记不是文献引用）"""
+    ids = []
+    for part in re.split(r"[,，、;；]", marker):
+        span = _RANGE_RE.search(part)
+        if span:
+            start, end = int(span.group(1)), int(span.group(2))
+            numbers = range(start, end + 1) if 0 < end - start <= 50 else (start, end)
+        else:
+            numbers = [int(n) for n in _NUMBER_RE.findall(part)]
+        for number in numbers:
+            if not 1 <= number <= count:
+                return []
+            if number not in ids:
+                ids.append(number)
+    return ids
+
+
+def _compress(numbers: Sequence[int]) -> str:
+    """[1, 2, 3, 5] -> "1-3, 5" """
+    groups = []
+    for number in sorted(numbers):
+        if groups and number == groups[-1][1] + 1:
+            groups[-1][1] = number
+        else:
+            groups.append([number, number])
+    return ", ".join(str(a) if a == b else (f"{a}, {b}" if b == a + 1 else f"{a}-{b}") for a, b in groups)
+
+
+def strip_references(text: str) -> str:
+    """
+    去掉模型自行撰写的参考文献章节（从该标题到文本结尾）
+
+    Args:
+        text: 模型输出文本
+
+    Returns:
+        去掉参考文献章节后的文本
+    """
+    return _REFERENCES_RE.sub("", text)
+
+
+def render_citations(text: str, articles: Sequence[Dict], style: str = None) -> str:
+    """
+    将综述正文中的编号标记替换为选定格式的引用，并在末尾附上本地生成的参考文献列表
+
+    模型若仍自行撰写了参考文献章节，该章节会被替换。未被引用的文章不列入参考文献。
+
+    Args:
+        text: 模型输出的综述正文
+        articles: 提示词中的文章列表（标记编号为其中的序号，从1开始）
+        style: 引用格式，见 CITATION_STYLES，默认使用config.REVIEW_CITATION_STYLE
+
+    Returns:
+        带参考文献的综述文本
+    """
+    style = style or config.REVIEW_CITATION_STYLE
+    text = strip_references(text).rstrip()
+    order: Dict[int, int] = {}  # 文献序号 -> 参考文献编号（按首次引用顺序）
+
+    def replace(match):
+        ids = _marker_ids(match.group(1), len(articles))
+        if not ids:
+            return match.group(0)
+        for number in ids:
+            order.setdefault(number, len(order) + 1)
+        if style == "apa":
+            return "(" + "; ".join(_in_text(articles[number - 1]) for number in ids) + ")"
+        return f"[{_compress([order[number] for number in ids])}]"
+
+    text = _MARKER_RE.sub(replace, text)
+    if not order:
+        return text
+
+    cited = [articles[number - 1] for number in order]
+    if style == "apa":
+        # 作者-年份格式按第一作者姓氏排序，每条单独成段
+        cited.sort(key=lambda article: (_authors(article)[:1] or [(_title(article), "")])[0][0].lower())
+        references = "\n\n".join(format_reference(article, style) for article in cited)
+    else:
+        references = "\n".join(f"{i}. {format_reference(article, style)}" for i, article in enumerate(cited, 1))
+    return f"{text}\n\n## 参考文献\n\n{references}\n"
@@ -21,6 +21,22 @@ SEARCH_END_DATE = ""  # 结束日期 (YYYY/MM/DD)，留空则为当前日期
 MAX_SEARCH_RESULTS = 100  # 最大搜索篇数
 MAX_WORKERS = 5  # 并发总结的线程数
 
+# 近重复合并配置（期刊筛选后使用MinHash+LSH合并勘误、重复发表等摘要高度重叠的文章）
+DEDUP_ENABLED = True  # 是否启用近重复合并
+DEDUP_THRESHOLD = 0.7  # 判定为重复的摘要相似度(Jaccard)下限
+DEDUP_NUM_PERM = 128  # MinHash签名长度
+DEDUP_BANDS = 32  # LSH分段数
+DEDUP_SHINGLE_SIZE = 3  # 词级shingle长度
+DEDUP_MIN_SHINGLES = 10  # 摘要的shingle数少于该值时不参与合并（过短的文本容易误判为重复）
+
+# 相关性排序配置（AI总结前按BM25相关性排序，按顺序派发总结）
+RELEVANCE_RANKING = True  # 是否启用相关性排序
+RELEVANCE_TOP_K = 0  # 只总结最相关的前K篇，0表示不限
+RELEVANCE_MIN_SCORE = 0.0  # 最低归一化相关性得分(0-1)，0表示不限
+RELEVANCE_TITLE_WEIGHT = 3  # 标题词相对摘要词的权重
+BM25_K1 = 1.5
+BM25_B = 0.75
+
 # 三大杂志社期刊列表
 JOURNALS = {
     "Nature": [
@@ -132,6 +148,126 @@ OUTPUT_DIR = "output"
 REPORT_FILE = "report.md"
 EXCEL_FILE = "articles.xlsx"
 REVIEW_FILE = "literature_review.md"  # 文献综述单独文件
+JSONL_FILE = "articles.jsonl"  # JSONL数据文件（--jsonl）
+PARQUET_FILE = "articles.parquet"  # Parquet数据文件（--parquet，需要pyarrow）
+ARROW_FILE = "articles.arrow"  # Arrow IPC数据文件（--arrow，需要pyarrow）
+PROFILE_FILE = "profile"  # 性能分析结果文件名前缀（--profile）
+BATCH_DIR = "batch"  # 批量模式下各主题输出的子目录（--batch）
+BATCH_INDEX_FILE = "batch_index"  # 批量模式汇总索引文件名前缀（.md/.json）
+
+# 批量模式配置
+BATCH_CONCURRENCY = 4  # 同时运行的主题数（AI总结的总并发由 -w 控制，各主题共用）
+
+# 性能分析配置
+PROFILE_SAMPLE_INTERVAL = 0.005  # sampling模式的采样间隔(秒)
+PROFILE_TOP_FUNCTIONS = 50  # 报告中列出的函数数量
+
+# Web任务保留策略（防止长期运行时内存无限增长）
+TASK_MAX_COUNT = 200  # 内存中最多保留的任务数
+TASK_MAX_BYTES = 200 * 1024 * 1024  # 内存中任务结果的总字节上限
+TASK_TTL = 24 * 3600  # 已结束任务在内存中的保留时间(秒)
+OUTPUT_FILE_TTL = 7 * 24 * 3600  # 输出目录中文件的保留时间(秒)，0表示不清理
+TASK_JANITOR_INTERVAL = 300  # 后台清理线程的运行间隔(秒)
+
+# Web任务后端配置
+# "memory": 进程内存储，仅支持单进程运行
+# "sqlite": 共享SQLite存储，可配合gunicorn等WSGI服务器多进程/多主机部署
+TASK_BACKEND = "memory"
+TASK_DB_PATH = ""  # SQLite数据库路径，留空则使用输出目录下的 tasks.db
+TASK_WORKERS = 4  # 每个Web进程中执行搜索任务的工作线程数
+TASK_HEARTBEAT_INTERVAL = 10  # 工作进程为其领取的任务续租的间隔(秒)
+TASK_LEASE_TIMEOUT = 120  # 运行中的任务超过该时间(秒)未续租时视为工作进程已退出，由清理线程回收
+TASK_MAX_ATTEMPTS = 2  # 任务最多被领取执行的次数，回收时未达到则重新排队，否则标记为错误
+
+# PubMed检索配置
+# "parallel": 每个检索词单独并发esearch，合并去重后按日期取前max_results篇（单个检索词出错不影响其他检索词）
+# "combined": 所有检索词用OR拼接为一个检索式
+SEARCH_MODE = "parallel"
+ESEARCH_WORKERS = 4  # 并发esearch的线程数（总速率仍受NCBI限制）
+NCBI_RATE_WITHOUT_KEY = 3  # 无API Key时每秒最多请求数
+NCBI_RATE_WITH_KEY = 10  # 有API Key时每秒最多请求数
+
+# 缓存配置（进程内TTL缓存，0表示不缓存）
+AI_TERMS_CACHE_TTL = 7 * 24 * 3600  # AI优化检索词与润色主题的缓存时间(秒)
+ESEARCH_CACHE_TTL = 24 * 3600  # 结束日期早于今天的esearch结果缓存时间(秒)
+ESEARCH_CACHE_TTL_OPEN = 600  # 结束日期为今天（结果仍可能增加）的esearch结果缓存时间(秒)
+CACHE_MAX_ENTRIES = 1024  # 每个缓存最多保留的条目数
+
+# 两阶段获取配置
+JOURNAL_PREFILTER = True  # 先用esummary按期刊名预筛选，只对目标期刊的文章efetch全文记录
+ESUMMARY_BATCH_SIZE = 200  # 每次esummary请求的PMID数
+
+# E-utilities连接配置
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+EUTILS_TOOL = "pubmed_crawler"  # 随请求发送的tool参数
+EUTILS_POOL_SIZE = 10  # 进程内共享的keep-alive连接池大小
+EUTILS_MAX_GET_LENGTH = 2000  # 查询串超过该长度（长ID列表、长检索式）时改用POST请求
+EUTILS_BACKOFF_BASE = 1.0  # 429/5xx重试的退避基数(秒)，按指数增长并加入随机抖动
+EUTILS_BACKOFF_MAX = 30.0  # 单次重试最长等待(秒)
+
+# LLM连接配置
+LLM_POOL_SIZE = 0  # LLM连接池大小，0表示 MAX_WORKERS × TASK_WORKERS；并发总结仍超出时换用更大的连接池
+LLM_HTTP2 = False  # 使用HTTP/2多路复用（需要 pip install "httpx[http2]"，未安装时使用HTTP/1.1）
+
+# 模型分级配置：按调用类型设置模型、最大token数、温度与超时（model为None时使用DEEPSEEK_MODEL）
+# 例如逐篇总结（调用次数最多）使用低延迟的小模型，文献综述使用大模型
+MODEL_PROFILES = {
+    "optimize_terms": {"model": None, "max_tokens": 1000, "temperature": 0.7, "timeout": 30},
+    "polish_topic": {"model": None, "max_tokens": 500, "temperature": 0.7, "timeout": 60},
+    "summary": {"model": None, "max_tokens": 1000, "temperature": 0.7, "timeout": 30},
+    "review": {"model": None, "max_tokens": 8192, "temperature": 0.7, "timeout": 120},
+    "review_outline": {"model": None, "max_tokens": 1500, "temperature": 0.7, "timeout": 60},  # 分章节综述的大纲
+    "review_section": {"model": None, "max_tokens": 2048, "temperature": 0.7, "timeout": 90},  # 分章节综述的单个章节
+}
+# 各模型每百万token的价格（美元），用于估算各调用类型的费用；未列出的模型费用记为0
+MODEL_PRICES = {
+    "deepseek-chat": {"prompt": 0.28, "completion": 0.42},
+    "deepseek-reasoner": {"prompt": 0.28, "completion": 0.42},
+}
+
+# 多端点路由配置
+# 多个OpenAI兼容端点/API Key，为空时只使用上面的 DEEPSEEK_BASE_URL/DEEPSEEK_API_KEY。示例:
+# LLM_ENDPOINTS = [
+#     {"base_url": "https://api.deepseek.com/v1", "api_key": "sk-a", "weight": 2, "max_concurrency": 8},
+#     {"base_url": "https://api.deepseek.com/v1", "api_key": "sk-b", "weight": 1, "max_concurrency": 4},
+#     {"base_url": "https://other-provider/v1", "api_key": "sk-c", "model": "deepseek-chat", "name": "backup"},
+# ]
+LLM_ENDPOINTS = []
+LLM_BREAKER_FAILURES = 5  # 端点连续失败次数达到该值时熔断
+LLM_BREAKER_COOLDOWN = 30  # 熔断持续时间(秒)，之后放行一个试探请求
+LLM_HEALTH_CHECK_INTERVAL = 10  # 对熔断端点做健康检查(GET /models)的间隔(秒)，0表示不检查
+
+# 对冲请求配置（只用于逐篇总结）
+HEDGE_ENABLED = False  # 请求超过近期延迟的百分位仍未返回时，再发一份相同请求，先返回者胜出
+HEDGE_PERCENTILE = 95  # 触发对冲的延迟百分位
+HEDGE_WINDOW = 200  # 统计延迟的最近请求数
+HEDGE_MIN_SAMPLES = 20  # 延迟样本少于该数时不对冲
+HEDGE_MIN_DELAY = 1.0  # 对冲等待时间下限(秒)
+HEDGE_BUDGET = 0.05  # 对冲请求数占请求总数的比例上限
+HEDGE_BURST = 5  # 对冲预算最多累积的次数
+HEDGE_MAX_INFLIGHT = 4  # 同时在途的对冲副本数上限（副本线程池大小），已满时不再对冲
+
+# 总结派发配置
+# 按估算耗时（标题+摘要长度）从长到短派发总结请求（LPT调度），缩短总结阶段的总耗时；
+# 只在按相关性顺序划分的窗口内重排，最相关的文章仍最先完成、增量导出可按顺序流式写出；
+# 关闭时按文章顺序（相关性排序后为最相关的在前）派发
+SUMMARY_DISPATCH_LPT = True
+SUMMARY_DISPATCH_WINDOW = 0  # LPT重排的窗口大小（篇），0表示等于并发数
+
+# 总结失败重试配置
+# 批量总结时每篇首轮只请求一次，失败的文章在其余文章完成后集中重试，不在工作线程里等待退避
+SUMMARY_RETRY_ROUNDS = 2  # 延迟重试的轮数，0表示不重试
+SUMMARY_RETRY_WORKERS = 2  # 重试时的并发数（不超过总结线程数），避免在服务端出错时放大压力
+SUMMARY_RETRY_BACKOFF = 2.0  # 第一轮重试前的等待(秒)，之后每轮翻倍
+
+# 文献综述配置
+# 模型只在正文中输出 [n] 编号，参考文献列表按以下格式在本地生成: "vancouver"、"nature"、"apa"（作者-年份）
+REVIEW_CITATION_STYLE = "vancouver"
+# 分章节生成：先生成大纲（小节标题与分配的文献），再并发撰写摘要、引言、主体各小节与讨论展望后拼接，
+# 耗时约为大纲加最长的一个章节；大纲或章节失败时改为整篇生成
+REVIEW_PARALLEL = False
+REVIEW_PARALLEL_MIN_ARTICLES = 8  # 文章少于该数时整篇生成
+REVIEW_MAX_SECTIONS = 4  # 主体小节数上限
 
 # 请求配置
 REQUEST_TIMEOUT = 30
@@ -0,0 +1,187 @@
+"""
+近重复检测模块 - 使用MinHash + LSH对摘要聚类，合并勘误、重复发表等高度重叠的文章
+
+每个簇只保留一篇代表文章参与AI总结和文献综述，其余文章的PMID记录在代表文章的
+"duplicate_pmids" 字段中。签名计算与分桶均为线性复杂度，只对同桶的候选对做精确比较。
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+import config
+
+# 梅森素数 2^31-1：哈希值与系数都小于它，乘积不会溢出uint64
+_PRIME = (1 << 31) - 1
+_SHINGLE_BASE = 1000003
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 以列表中靠前的文章为根，保证代表文章是簇内排序最靠前的一篇
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+class NearDuplicateDetector:
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None,
+                 shingle_size: int = None, min_shingles: int = None, seed: int = 1):
+        """
+        初始化近重复检测器
+
+        Args:
+            threshold: 判定为重复的Jaccard相似度下限，默认使用config.DEDUP_THRESHOLD
+            num_perm: MinHash签名长度，默认使用config.DEDUP_NUM_PERM
+            bands: LSH分段数（num_perm需能被整除），默认使用config.DEDUP_BANDS
+            shingle_size: 词级shingle的长度，默认使用config.DEDUP_SHINGLE_SIZE
+            min_shingles: 参与合并所需的最少shingle数，默认使用config.DEDUP_MIN_SHINGLES
+            seed: 哈希系数的随机种子
+        """
+        self.threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or config.DEDUP_NUM_PERM
+        self.bands = bands or config.DEDUP_BANDS
+        self.shingle_size = shingle_size or config.DEDUP_SHINGLE_SIZE
+        self.min_shingles = config.DEDUP_MIN_SHINGLES if min_shingles is None else min_shingles
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.rows = self.num_perm // self.bands
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _PRIME, size=self.num_perm, dtype=np.uint64)
+        self._word_hashes: Dict[str, int] = {}
+
+    def _word_hash(self, word: str) -> int:
+        value = self._word_hashes.get(word)
+        if value is None:
+            value = self._word_hashes[word] = zlib.crc32(word.encode("utf-8")) & _PRIME
+        return value
+
+    def _shingles(self, article: Dict) -> np.ndarray:
+        """摘要的词级shingle哈希（去重后的数组）；标题过短且常见（如 "Correction"），不作为比较依据"""
+        text = article.get("abstract") or ""
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+
+        hashes = np.fromiter((self._word_hash(w) for w in words), dtype=np.uint64, count=len(words))
+        # 连续k个词的哈希按多项式组合为shingle哈希
+        k = min(self.shingle_size, len(hashes))
+        shingles = hashes[:len(hashes) - k + 1].copy()
+        for offset in range(1, k):
+            shingles = (shingles * _SHINGLE_BASE + hashes[offset:len(hashes) - k + 1 + offset]) % _PRIME
+        return np.unique(shingles)
+
+    def signature(self, shingles: np.ndarray) -> np.ndarray:
+        """
+        计算MinHash签名
+
+        Args:
+            shingles: shingle哈希数组
+
+        Returns:
+            长度为num_perm的签名
+        """
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+    def cluster(self, articles: List[Dict]) -> List[int]:
+        """
+        对文章聚类
+
+        Args:
+            articles: 文章列表
+
+        Returns:
+            每篇文章所属簇的代表文章下标（代表文章为簇内最靠前的一篇）
+        """
+        union = _UnionFind(len(articles))
+        signatures = {}
+        for i, article in enumerate(articles):
+            shingles = self._shingles(article)
+            # 无摘要或摘要过短的文章不参与合并
+            if len(shingles) >= max(self.min_shingles, 1):
+                signatures[i] = self.signature(shingles)
+
+        # LSH分桶：签名按段切分，任一段完全相同即成为候选对
+        buckets = defaultdict(list)
+        for i, sig in signatures.items():
+            for band in range(self.bands):
+                segment = sig[band * self.rows:(band + 1) * self.rows]
+                buckets[(band, segment.tobytes())].append(i)
+
+        checked = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    similarity = float(np.mean(signatures[i] == signatures[j]))
+                    if similarity >= self.threshold:
+                        union.union(i, j)
+
+        return [union.find(i) for i in range(len(articles))]
+
+    def collapse(self, articles: List[Dict]) -> Tuple[List[Dict], int]:
+        """
+        合并近重复文章，每个簇只保留代表文章
+
+        Args:
+            articles: 文章列表（代表文章取簇内最靠前的一篇，因此列表顺序即优先级）
+
+        Returns:
+            (代表文章列表, 被合并的文章数)
+        """
+        roots = self.cluster(articles)
+        duplicates = defaultdict(list)
+        for i, root in enumerate(roots):
+            if root != i:
+                duplicates[root].append(articles[i])
+
+        representatives = []
+        for i, article in enumerate(articles):
+            if roots[i] != i:
+                continue
+            members = duplicates.get(i)
+            if members:
+                article["duplicate_pmids"] = "; ".join(
+                    str(m.get("pmid") or m.get("title", "")[:40]) for m in members
+                )
+            representatives.append(article)
+        return representatives, len(articles) - len(representatives)
+
+
+def collapse_duplicates(articles: List[Dict], threshold: float = None) -> List[Dict]:
+    """
+    合并近重复文章（便捷函数）
+
+    Args:
+        articles: 文章列表
+        threshold: 相似度阈值，默认使用config.DEDUP_THRESHOLD
+
+    Returns:
+        代表文章列表
+    """
+    representatives, merged = NearDuplicateDetector(threshold=threshold).collapse(articles)
+    print(f"近重复合并: {len(articles)} 篇 -> {len(representatives)} 篇（合并 {merged} 篇）")
+    return representatives
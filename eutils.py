@@ -0,0 +1,147 @@
+"""
+E-utilities客户端 - 在进程内共享的keep-alive连接池上请求NCBI E-utilities
+
+与Biopython的 Entrez.esearch/efetch 每次新建urllib连接不同，这里复用TCP/TLS连接、
+请求gzip压缩的响应（PubMed XML压缩比约5-8倍）、长ID列表改用POST，
+并在429/5xx与网络错误时按带抖动的指数退避重试。响应XML仍交给 Entrez.read 解析。
+"""
+
+import io
+import time
+import random
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from Bio import Entrez
+
+import config
+from metrics import RETRIES, RATE_LIMITED
+from rate_limiter import RateLimiter
+
+# 需要重试的HTTP状态码
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _shared_session() -> requests.Session:
+    """进程内共享的E-utilities会话（所有爬虫实例与任务复用同一连接池）"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.EUTILS_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _SESSION = session
+        return _SESSION
+
+
+class EUtilsClient:
+    def __init__(self, email: str = None, api_key: str = None, limiter: RateLimiter = None,
+                 base_url: str = None):
+        """
+        初始化E-utilities客户端
+
+        Args:
+            email: 用于NCBI联系的邮箱（作为email参数随请求发送）
+            api_key: NCBI API密钥(可选)
+            limiter: 请求限速器，每次请求（含重试）前获取
+            base_url: E-utilities地址，默认使用config.EUTILS_BASE_URL
+        """
+        self.email = email or config.PUBMED_EMAIL
+        self.api_key = api_key or config.PUBMED_API_KEY
+        self.limiter = limiter
+        self.base_url = (base_url or config.EUTILS_BASE_URL).rstrip("/") + "/"
+        self.session = _shared_session()
+
+    def _params(self, params: Dict[str, Any], ids: List[str] = None) -> Dict[str, Any]:
+        params = {key: value for key, value in params.items() if value is not None}
+        params.setdefault("db", "pubmed")
+        params["tool"] = config.EUTILS_TOOL
+        if self.email:
+            params["email"] = self.email
+        if self.api_key:
+            params["api_key"] = self.api_key
+        if ids:
+            params["id"] = ",".join(str(pmid) for pmid in ids)
+        return params
+
+    def _retry_delay(self, attempt: int, response: requests.Response = None) -> float:
+        """重试等待时间：优先使用Retry-After，否则为带完全抖动的指数退避"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        cap = min(config.EUTILS_BACKOFF_MAX, config.EUTILS_BACKOFF_BASE * 2 ** attempt)
+        return random.uniform(cap / 2, cap)
+
+    def request(self, utility: str, ids: List[str] = None, **params) -> bytes:
+        """
+        请求一个E-utility并返回（已解压的）响应内容
+
+        查询串超过config.EUTILS_MAX_GET_LENGTH（长ID列表、长检索式）时使用POST，避免URL过长。
+
+        Args:
+            utility: 工具名，如 "esearch"、"efetch"、"esummary"
+            ids: PMID列表
+            **params: 其他请求参数
+
+        Returns:
+            响应内容
+
+        Raises:
+            requests.RequestException: 重试耗尽或不可重试的错误
+        """
+        url = f"{self.base_url}{utility}.fcgi"
+        data = self._params(params, ids)
+        use_post = len(urlencode(data)) > config.EUTILS_MAX_GET_LENGTH
+
+        for attempt in range(config.MAX_RETRIES):
+            if attempt:
+                RETRIES.inc(operation="eutils")
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                if use_post:
+                    response = self.session.post(url, data=data, timeout=config.REQUEST_TIMEOUT)
+                else:
+                    response = self.session.get(url, params=data, timeout=config.REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == config.MAX_RETRIES - 1:
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"{utility} 请求错误，{delay:.1f}秒后重试: {e}")
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 429:
+                RATE_LIMITED.inc(service="eutils")
+            if response.status_code in RETRY_STATUS and attempt < config.MAX_RETRIES - 1:
+                delay = self._retry_delay(attempt, response)
+                print(f"{utility} 返回 {response.status_code}，{delay:.1f}秒后重试")
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response.content
+
+        raise requests.RequestException(f"{utility} 重试次数耗尽")
+
+    def read(self, utility: str, ids: List[str] = None, **params) -> Any:
+        """
+        请求一个E-utility并用 Entrez.read 解析XML响应
+
+        Args:
+            utility: 工具名
+            ids: PMID列表
+            **params: 其他请求参数
+
+        Returns:
+            解析后的记录
+        """
+        return Entrez.read(io.BytesIO(self.request(utility, ids, **params)))
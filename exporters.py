@@ -0,0 +1,388 @@
+"""
+导出模块 - 以流式、增量方式写出Markdown报告、Excel表格以及JSONL/Parquet/Arrow数据文件
+
+写入器在文章总结完成时逐篇追加，内存占用与文章数量无关；
+文件先写入临时文件，close() 时再原子替换为最终文件名，避免下载到不完整的文件。
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Excel列定义: (表头, 文章字段, 列宽)，字段为None表示序号列
+EXCEL_COLUMNS: List[Tuple[str, str, int]] = [
+    ("序号", None, 6),
+    ("PMID", "pmid", 12),
+    ("标题", "title", 60),
+    ("期刊", "journal", 30),
+    ("出版社", "publisher", 10),
+    ("发表日期", "pub_date", 12),
+    ("DOI", "doi", 25),
+    ("作者", "authors", 40),
+    ("摘要", "abstract", 80),
+    ("AI总结", "summary", 100),
+]
+
+# 机器可读格式（JSONL/Parquet/Arrow）导出的文章字段
+ARTICLE_FIELDS: List[str] = [
+    "pmid", "title", "journal", "publisher", "pub_date", "doi", "authors", "abstract", "summary",
+    "duplicate_pmids",
+]
+
+# 列式格式对应的文件扩展名
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def pyarrow_available() -> bool:
+    """是否安装了可选依赖pyarrow（Parquet/Arrow导出需要）"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _AtomicFileWriter:
+    """写入 path.part，close() 时替换为 path"""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.tmp_path = output_path + ".part"
+        self.count = 0
+        self.closed = False
+
+    def _commit(self):
+        os.replace(self.tmp_path, self.output_path)
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def close(self):
+        raise NotImplementedError
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        self.closed = True
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class ExcelStreamWriter(_AtomicFileWriter):
+    def __init__(self, output_path: str, sheet_title: str = "文献", columns: List[Tuple[str, str, int]] = None):
+        """
+        初始化流式Excel写入器（openpyxl write_only模式）
+
+        Args:
+            output_path: 输出文件路径
+            sheet_title: 工作表名称
+            columns: 列定义，默认使用EXCEL_COLUMNS
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        super().__init__(output_path)
+        self.columns = columns or EXCEL_COLUMNS
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet_title)
+
+        # 列宽与冻结首行需在写入数据前设置
+        for col, (_, _, width) in enumerate(self.columns, 1):
+            self.sheet.column_dimensions[get_column_letter(col)].width = width
+        self.sheet.freeze_panes = "A2"
+
+        # 样式
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+        header_row = []
+        for header, _, _ in self.columns:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            header_row.append(cell)
+        self.sheet.append(header_row)
+
+    def append(self, article: Dict):
+        """追加一篇文章"""
+        self.count += 1
+        self.sheet.append([
+            self.count if key is None else article.get(key, "")
+            for _, key, _ in self.columns
+        ])
+
+    def close(self):
+        """保存文件"""
+        if self.closed:
+            return
+        self.workbook.save(self.tmp_path)
+        self._commit()
+
+
+class MarkdownReportWriter(_AtomicFileWriter):
+    def __init__(self, output_path: str, overall_summary: str = "", include_pmid: bool = True,
+                 footer: bool = True):
+        """
+        初始化增量Markdown报告写入器
+
+        Args:
+            output_path: 输出文件路径
+            overall_summary: 整体总结，写在报告开头
+            include_pmid: 是否写出PMID
+            footer: 是否在结尾写出报告生成时间
+        """
+        super().__init__(output_path)
+        self.include_pmid = include_pmid
+        self.footer = footer
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+        # 写入整体总结
+        if overall_summary:
+            self.file.write(overall_summary)
+            self.file.write("\n\n")
+        self.file.write("---\n\n")
+
+    def append(self, article: Dict):
+        """追加一篇文章"""
+        self.count += 1
+        f = self.file
+        f.write(f"## 文章 {self.count}: {article.get('title', '无标题')}\n\n")
+
+        if self.include_pmid:
+            f.write(f"**PMID**: {article.get('pmid', 'N/A')}\n\n")
+        f.write(f"**期刊**: {article.get('journal', 'N/A')}\n\n")
+        f.write(f"**出版社**: {article.get('publisher', 'N/A')}\n\n")
+        f.write(f"**发表日期**: {article.get('pub_date', 'N/A')}\n\n")
+        f.write(f"**DOI**: {article.get('doi', 'N/A')}\n\n")
+
+        duplicates = article.get('duplicate_pmids', '')
+        if duplicates:
+            f.write(f"**重复/相近版本**: {duplicates}\n\n")
+
+        authors = article.get('authors', '')
+        if authors:
+            f.write(f"**作者**: {authors}\n\n")
+
+        # 摘要
+        abstract = article.get('abstract', '')
+        if abstract:
+            f.write("**摘要**:\n\n")
+            f.write(f"{abstract}\n\n")
+
+        # 总结
+        summary = article.get('summary', '')
+        if summary and summary != "无摘要":
+            f.write("**AI总结**:\n\n")
+            f.write(f"{summary}\n\n")
+
+        f.write("---\n\n")
+
+    def close(self):
+        """写入结尾并保存文件"""
+        if self.closed:
+            return
+        if self.footer:
+            self.file.write(f"\n*报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
+        self.file.close()
+        self._commit()
+
+    def abort(self):
+        self.file.close()
+        super().abort()
+
+
+class JsonlStreamWriter(_AtomicFileWriter):
+    def __init__(self, output_path: str, fields: List[str] = None):
+        """
+        初始化JSONL写入器，每行一篇文章
+
+        Args:
+            output_path: 输出文件路径
+            fields: 导出字段，默认使用ARTICLE_FIELDS
+        """
+        super().__init__(output_path)
+        self.fields = fields or ARTICLE_FIELDS
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def append(self, article: Dict):
+        """追加一篇文章"""
+        self.count += 1
+        record = {field: article.get(field, "") for field in self.fields}
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write("\n")
+
+    def close(self):
+        if self.closed:
+            return
+        self.file.close()
+        self._commit()
+
+    def abort(self):
+        self.file.close()
+        super().abort()
+
+
+class ColumnarStreamWriter(_AtomicFileWriter):
+    def __init__(self, output_path: str, fmt: str = "parquet", fields: List[str] = None,
+                 batch_size: int = 10000):
+        """
+        初始化列式写入器（Parquet或Arrow IPC文件），按批次写出，内存占用只与批大小有关
+
+        Args:
+            output_path: 输出文件路径
+            fmt: "parquet" 或 "arrow"
+            fields: 导出字段，默认使用ARTICLE_FIELDS
+            batch_size: 每个行组/记录批次的文章数
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("Parquet/Arrow导出需要安装pyarrow: pip install pyarrow")
+        if fmt not in COLUMNAR_FORMATS:
+            raise ValueError(f"不支持的列式格式: {fmt}")
+
+        super().__init__(output_path)
+        self.pa = pa
+        self.fmt = fmt
+        self.fields = fields or ARTICLE_FIELDS
+        self.batch_size = batch_size
+        self.schema = pa.schema([(field, pa.string()) for field in self.fields])
+        self.columns = {field: [] for field in self.fields}
+
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(self.tmp_path, self.schema)
+
+    def append(self, article: Dict):
+        """追加一篇文章"""
+        self.count += 1
+        for field in self.fields:
+            value = article.get(field, "")
+            self.columns[field].append(None if value is None else str(value))
+        if len(self.columns[self.fields[0]]) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.columns[self.fields[0]]:
+            return
+        batch = self.pa.record_batch(
+            [self.pa.array(self.columns[field], type=self.pa.string()) for field in self.fields],
+            schema=self.schema
+        )
+        self.writer.write_batch(batch)
+        self.columns = {field: [] for field in self.fields}
+
+    def close(self):
+        if self.closed:
+            return
+        self._flush()
+        self.writer.close()
+        self._commit()
+
+    def abort(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+        super().abort()
+
+
+def convert_jsonl(jsonl_path: str, output_path: str, fmt: str = "parquet", batch_size: int = 10000):
+    """
+    将JSONL文件流式转换为Parquet/Arrow文件
+
+    Args:
+        jsonl_path: JSONL文件路径
+        output_path: 输出文件路径
+        fmt: "parquet" 或 "arrow"
+        batch_size: 每批的文章数
+    """
+    with ColumnarStreamWriter(output_path, fmt=fmt, batch_size=batch_size) as writer:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    writer.append(json.loads(line))
+
+
+class ExportSet:
+    def __init__(self, writers: Iterable[_AtomicFileWriter], order: Sequence[Dict] = None):
+        """
+        组合多个写入器，统一追加与关闭
+
+        Args:
+            writers: 写入器列表
+            order: 文章的最终顺序（如相关性排序后的列表）；提供时按该顺序写出，
+                先完成的靠后文章暂存，等前面的文章完成后再写出
+        """
+        self.writers = list(writers)
+        self._index = {id(article): i for i, article in enumerate(order)} if order is not None else None
+        self._pending: Dict[int, Dict] = {}
+        self._next = 0
+
+    def _write(self, article: Dict):
+        for writer in self.writers:
+            writer.append(article)
+
+    def append(self, article: Dict):
+        index = self._index.get(id(article)) if self._index is not None else None
+        if index is None:
+            self._write(article)
+            return
+        self._pending[index] = article
+        while self._next in self._pending:
+            self._write(self._pending.pop(self._next))
+            self._next += 1
+
+    def close(self):
+        # 未完成的文章（不应出现）之后的暂存文章按顺序补写
+        for index in sorted(self._pending):
+            self._write(self._pending.pop(index))
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+
+def save_excel(articles: Iterable[Dict], output_path: str, **kwargs):
+    """
+    一次性保存Excel文件（流式写入）
+
+    Args:
+        articles: 文章列表
+        output_path: 输出文件路径
+    """
+    with ExcelStreamWriter(output_path, **kwargs) as writer:
+        for article in articles:
+            writer.append(article)
+
+
+def save_markdown_report(articles: Iterable[Dict], output_path: str, overall_summary: str = "", **kwargs):
+    """
+    一次性保存Markdown报告（流式写入）
+
+    Args:
+        articles: 文章列表
+        output_path: 输出文件路径
+        overall_summary: 整体总结
+    """
+    with MarkdownReportWriter(output_path, overall_summary, **kwargs) as writer:
+        for article in articles:
+            writer.append(article)
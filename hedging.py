@@ -0,0 +1,207 @@
+"""
+对冲请求模块 - 请求超过近期延迟的高百分位仍未返回时再发一份副本，先成功返回者胜出
+
+等待阈值随近期成功请求的延迟动态变化；对冲预算按令牌桶限制额外请求的比例，
+胜出后取消其余副本（流式请求在下一个数据块到达时断开连接）。
+"""
+
+import heapq
+import itertools
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+
+import config
+from metrics import HEDGES
+from task_control import TaskControl, TaskCancelled
+
+T = TypeVar("T")
+
+
+class _Timer:
+    """所有对冲请求共用的定时线程：到达对冲阈值时才回调，未发出副本的请求不额外占用线程"""
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay: float, fn: Callable[[], None]) -> list:
+        entry = [time.monotonic() + delay, next(self._seq), fn]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hedge-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def cancel(self, entry: list):
+        with self._cond:
+            entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                fn = heapq.heappop(self._heap)[2]
+            if fn is not None:
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"发出对冲请求失败: {e}")
+
+
+_timer = _Timer()
+# 对冲副本在有界线程池中执行，不占用调用方的线程池；在途副本数达到上限时不再对冲
+_hedge_executor = ThreadPoolExecutor(max_workers=config.HEDGE_MAX_INFLIGHT, thread_name_prefix="hedge")
+_hedge_slots = threading.BoundedSemaphore(config.HEDGE_MAX_INFLIGHT)
+
+
+class HedgePolicy:
+    def __init__(self, percentile: float = None, window: int = None, min_samples: int = None,
+                 min_delay: float = None, budget: float = None, burst: int = None):
+        """
+        初始化对冲策略
+
+        Args:
+            percentile: 触发对冲的延迟百分位，默认使用config.HEDGE_PERCENTILE
+            window: 统计延迟的最近请求数，默认使用config.HEDGE_WINDOW
+            min_samples: 开始对冲所需的最少延迟样本数，默认使用config.HEDGE_MIN_SAMPLES
+            min_delay: 对冲等待时间下限(秒)，默认使用config.HEDGE_MIN_DELAY
+            budget: 对冲请求占请求总数的比例上限，默认使用config.HEDGE_BUDGET
+            burst: 对冲预算最多累积的次数，默认使用config.HEDGE_BURST
+        """
+        self.percentile = percentile or config.HEDGE_PERCENTILE
+        self.min_samples = config.HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.min_delay = config.HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.budget = config.HEDGE_BUDGET if budget is None else budget
+        self.burst = burst or config.HEDGE_BURST
+        self._latencies = deque(maxlen=window or config.HEDGE_WINDOW)
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """记录一次成功请求的延迟"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def threshold(self) -> Optional[float]:
+        """
+        当前的对冲等待时间
+
+        Returns:
+            近期延迟的百分位（不低于min_delay），样本不足时返回None（不对冲）
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        rank = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return max(self.min_delay, ordered[rank])
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _timed(self, attempt: Callable[[TaskControl], T], control: TaskControl) -> T:
+        start = time.perf_counter()
+        result = attempt(control)
+        if result is not None:
+            self.observe(time.perf_counter() - start)
+        return result
+
+    def call(self, attempt: Callable[[TaskControl], Optional[T]], control: TaskControl = None) -> Optional[T]:
+        """
+        执行请求，超过对冲阈值仍未返回且预算允许时发出一份副本
+
+        Args:
+            attempt: 发起一次请求的函数，参数为该副本的任务控制器（被取消时应尽快抛出TaskCancelled），
+                返回None表示失败
+            control: 任务控制器，取消时所有副本一并取消
+
+        Returns:
+            先成功返回的结果；全部失败时返回None（有异常时抛出最后一个异常）
+        """
+        control = control or TaskControl()
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+        delay = self.threshold()
+        if delay is None:
+            return self._timed(attempt, control)
+
+        # 主请求在调用方线程中执行，到达阈值仍未返回时才由定时线程发出副本；
+        # 两份请求各用独立的子控制器，先成功者取消另一份
+        primary = control.child()
+        lock = threading.Lock()
+        state = {"done": False, "result": None, "hedge": None, "child": None}
+
+        def run_hedge(child: TaskControl):
+            try:
+                result = self._timed(attempt, child)
+            finally:
+                _hedge_slots.release()
+            if result is not None:
+                with lock:
+                    if state["done"]:
+                        return result
+                    state.update(done=True, result=result)
+                primary.cancel()
+                HEDGES.inc(event="won")
+            return result
+
+        def issue():
+            with lock:
+                if state["done"] or control.cancelled or not _hedge_slots.acquire(blocking=False):
+                    return
+                if not self._take_token():
+                    _hedge_slots.release()
+                    return
+                child = control.child()
+                state.update(child=child, hedge=_hedge_executor.submit(run_hedge, child))
+            HEDGES.inc(event="issued")
+
+        timer = _timer.schedule(delay, issue)
+        result, error = None, None
+        try:
+            result = self._timed(attempt, primary)
+        except TaskCancelled:
+            if control.cancelled:
+                raise
+        except Exception as e:
+            error = e
+        finally:
+            _timer.cancel(timer)
+
+        with lock:
+            if state["done"]:
+                return state["result"]
+            hedge, child = state["hedge"], state["child"]
+            if result is not None or hedge is None:
+                state["done"] = True
+        if result is not None:
+            if child is not None:
+                child.cancel()
+            return result
+
+        # 主请求失败，等待已发出的副本
+        if hedge is not None:
+            try:
+                result = hedge.result()
+            except TaskCancelled:
+                if control.cancelled:
+                    raise
+            except Exception as e:
+                error = e
+            if result is not None:
+                return result
+        if error is not None:
+            raise error
+        return None
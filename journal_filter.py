@@ -3,25 +3,33 @@
 """
 
 import re
-from typing import List, Dict
+from typing import Callable, List, Dict
 import config
 
 
 class JournalFilter:
-    def __init__(self):
-        """初始化期刊过滤器"""
-        self.journals = self._build_journal_dict()
+    def __init__(self, journals: Dict[str, List[str]] = None):
+        """
+        初始化期刊过滤器
+
+        Args:
+            journals: 出版社到期刊列表的映射，默认使用config.JOURNALS
+        """
+        self.journals = self._build_journal_dict(journals or config.JOURNALS)
 
-    def _build_journal_dict(self) -> Dict[str, set]:
+    def _build_journal_dict(self, journals: Dict[str, List[str]]) -> Dict[str, set]:
         """
         构建期刊字典，将期刊名称标准化并分类
 
+        Args:
+            journals: 出版社到期刊列表的映射
+
         Returns:
             期刊字典，键为出版社名，值为期刊名集合
         """
         journal_dict = {}
 
-        for publisher, journal_list in config.JOURNALS.items():
+        for publisher, journal_list in journals.items():
             normalized_journals = set()
             for journal in journal_list:
                 # 标准化期刊名：转为小写，去除多余空格
@@ -74,6 +82,30 @@ class JournalFilter:
 
         return False
 
+    def matcher(self, target_journals: List[str] = None) -> Callable[[str], bool]:
+        """
+        返回按期刊名判断是否保留的函数（用于在获取全文记录前按esummary期刊名预筛选）
+
+        Args:
+            target_journals: 自定义目标期刊列表，默认使用全部目标期刊
+
+        Returns:
+            参数为期刊名、返回是否为目标期刊的函数
+        """
+        if not target_journals:
+            return self.is_target_journal
+
+        normalized_targets = {self._normalize_journal_name(journal) for journal in target_journals}
+
+        def match(journal_name: str) -> bool:
+            normalized_journal = self._normalize_journal_name(journal_name or "")
+            return any(
+                normalized_journal == target or normalized_journal in target or target in normalized_journal
+                for target in normalized_targets
+            )
+
+        return match
+
     def get_publisher(self, journal_name: str) -> str:
         """
         获取期刊所属的出版社
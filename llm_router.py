@@ -0,0 +1,243 @@
+"""
+LLM路由模块 - 在多个OpenAI兼容端点/API Key之间分配请求
+
+每个请求路由到可用端点中负载最低（在途请求数/权重）、近期延迟与连续失败最少的一个；
+端点连续失败达到阈值时熔断一段时间，冷却后由健康检查（或一次试探请求）恢复。
+单个请求失败时立即换用其他端点，任务中已完成的总结不受影响。
+"""
+
+import time
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+import config
+from metrics import LLM_ENDPOINT_REQUESTS, LLM_CIRCUIT_OPENED
+from task_control import TaskControl, TaskCancelled
+
+# 端点熔断状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Endpoint:
+    def __init__(self, base_url: str, api_key: str = None, model: str = None, weight: float = 1.0,
+                 max_concurrency: int = 0, name: str = None):
+        """
+        初始化端点
+
+        Args:
+            base_url: API基础URL
+            api_key: 该端点的API密钥，None表示使用总结器的密钥
+            model: 该端点使用的模型，None表示使用调用方指定的模型
+            weight: 权重，越大分到的请求越多
+            max_concurrency: 最大在途请求数，0表示不限
+            name: 端点名称（用于指标与日志），默认使用base_url
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.weight = weight if weight and weight > 0 else 1.0
+        self.max_concurrency = max_concurrency or 0
+        self.name = name or self.base_url
+        self.inflight = 0
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.latency = 0.0  # 成功请求延迟的指数滑动平均(秒)
+
+    def has_capacity(self) -> bool:
+        return not self.max_concurrency or self.inflight < self.max_concurrency
+
+    def available(self, now: float) -> bool:
+        """熔断关闭，或冷却结束且没有进行中的试探请求"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now >= self.open_until:
+            return True
+        return False
+
+    def load(self) -> float:
+        # 在途请求数按权重折算，再乘以近期延迟（无样本时视为1秒）与连续失败惩罚
+        return (self.inflight + 1) / self.weight * (self.latency or 1.0) * (1 + self.failures)
+
+    def snapshot(self) -> Dict:
+        return {"name": self.name, "state": self.state, "inflight": self.inflight,
+                "failures": self.failures, "latency": round(self.latency, 3), "weight": self.weight}
+
+
+class LLMRouter:
+    def __init__(self, endpoints: Sequence[Endpoint]):
+        """
+        初始化路由器
+
+        Args:
+            endpoints: 端点列表（至少一个）
+        """
+        if not endpoints:
+            raise ValueError("至少需要一个LLM端点")
+        self.endpoints: List[Endpoint] = list(endpoints)
+        self._cond = threading.Condition()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def acquire(self, exclude: Sequence[Endpoint] = (), control: TaskControl = None) -> Endpoint:
+        """
+        选择一个端点并占用一个并发名额
+
+        优先选择熔断关闭的端点；全部熔断时选择最早结束冷却的端点（不拒绝请求）。
+        所有候选端点并发已满时等待名额释放。
+
+        Args:
+            exclude: 本次请求已失败过的端点，其他端点可用时不再选择
+            control: 任务控制器，取消时停止等待
+
+        Returns:
+            选中的端点（使用后必须调用release）
+        """
+        with self._cond:
+            while True:
+                if control is not None and control.cancelled:
+                    raise TaskCancelled("任务已取消")
+                endpoint = self._choose(exclude)
+                if endpoint is not None:
+                    if endpoint.state == OPEN and time.monotonic() >= endpoint.open_until:
+                        # 冷却结束后的第一个请求作为试探
+                        endpoint.state = HALF_OPEN
+                    endpoint.inflight += 1
+                    return endpoint
+                self._cond.wait(0.2)
+
+    def _choose(self, exclude: Sequence[Endpoint]) -> Optional[Endpoint]:
+        now = time.monotonic()
+        # 先在未失败过的端点中选择，其次是本次已失败过但仍健康的端点
+        for group in ([e for e in self.endpoints if e not in exclude], self.endpoints):
+            healthy = [e for e in group if e.available(now)]
+            if healthy:
+                ready = [e for e in healthy if e.has_capacity()]
+                return min(ready, key=Endpoint.load) if ready else None
+        # 全部熔断：不拒绝请求，选择最早恢复的端点
+        ready = [e for e in self.endpoints if e.has_capacity()]
+        return min(ready, key=lambda e: e.open_until) if ready else None
+
+    def release(self, endpoint: Endpoint, ok: Optional[bool], latency: float = 0.0):
+        """
+        归还并发名额并更新端点健康状态
+
+        Args:
+            endpoint: acquire返回的端点
+            ok: 请求是否成功；None表示结果与端点健康无关（如任务取消）
+            latency: 请求耗时(秒)
+        """
+        with self._cond:
+            endpoint.inflight -= 1
+            if ok is None:
+                if endpoint.state == HALF_OPEN:
+                    endpoint.state = OPEN
+                self._cond.notify_all()
+                return
+            if ok:
+                endpoint.failures = 0
+                endpoint.state = CLOSED
+                endpoint.latency = latency if not endpoint.latency else 0.8 * endpoint.latency + 0.2 * latency
+            else:
+                endpoint.failures += 1
+                if endpoint.state == HALF_OPEN or endpoint.failures >= config.LLM_BREAKER_FAILURES:
+                    self._open(endpoint)
+            self._cond.notify_all()
+        LLM_ENDPOINT_REQUESTS.inc(endpoint=endpoint.name, outcome="ok" if ok else "error")
+
+    def _open(self, endpoint: Endpoint):
+        if endpoint.state != OPEN:
+            LLM_CIRCUIT_OPENED.inc(endpoint=endpoint.name)
+            print(f"LLM端点 {endpoint.name} 连续失败 {endpoint.failures} 次，熔断 {config.LLM_BREAKER_COOLDOWN} 秒")
+        endpoint.state = OPEN
+        endpoint.open_until = time.monotonic() + config.LLM_BREAKER_COOLDOWN
+        self._ensure_health_checks()
+
+    def _ensure_health_checks(self):
+        # 只有一个端点时无可切换，不需要健康检查
+        if self._health_thread is None and len(self.endpoints) > 1 and config.LLM_HEALTH_CHECK_INTERVAL > 0:
+            self._health_thread = threading.Thread(target=self._health_loop, name="llm-health", daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            time.sleep(config.LLM_HEALTH_CHECK_INTERVAL)
+            self.check_health()
+
+    def check_health(self):
+        """探测已熔断的端点（GET /models），有响应且非5xx/429时提前关闭熔断"""
+        with self._cond:
+            targets = [e for e in self.endpoints if e.state == OPEN]
+        for endpoint in targets:
+            try:
+                response = requests.get(f"{endpoint.base_url}/models", timeout=5,
+                                        headers={"Authorization": f"Bearer {endpoint.api_key or ''}"})
+                healthy = response.status_code < 500 and response.status_code != 429
+            except requests.RequestException:
+                healthy = False
+            with self._cond:
+                if endpoint.state != OPEN:
+                    continue
+                if healthy:
+                    print(f"LLM端点 {endpoint.name} 健康检查通过，恢复使用")
+                    endpoint.state = CLOSED
+                    endpoint.failures = 0
+                    self._cond.notify_all()
+                else:
+                    endpoint.open_until = time.monotonic() + config.LLM_BREAKER_COOLDOWN
+
+    def status(self) -> List[Dict]:
+        """各端点的当前状态"""
+        with self._cond:
+            return [endpoint.snapshot() for endpoint in self.endpoints]
+
+
+_ROUTERS: Dict[tuple, LLMRouter] = {}
+_ROUTERS_LOCK = threading.Lock()
+
+
+def endpoint_specs(base_url: str, api_key: str = None) -> List[Dict]:
+    """
+    配置的端点列表：config.LLM_ENDPOINTS 为空时只有总结器自身的端点
+
+    Args:
+        base_url: 总结器的API基础URL
+        api_key: 总结器的API密钥
+
+    Returns:
+        端点配置字典列表
+    """
+    if config.LLM_ENDPOINTS:
+        return [dict(spec) for spec in config.LLM_ENDPOINTS]
+    return [{"base_url": base_url, "api_key": api_key}]
+
+
+def shared_router(specs: List[Dict]) -> LLMRouter:
+    """
+    进程内共享的路由器：相同端点配置的总结器共用并发计数与熔断状态
+
+    Args:
+        specs: 端点配置字典列表（base_url/api_key/model/weight/max_concurrency/name）
+
+    Returns:
+        路由器
+    """
+    key = tuple(
+        (spec["base_url"], spec.get("api_key"), spec.get("model"), spec.get("weight", 1.0),
+         spec.get("max_concurrency", 0))
+        for spec in specs
+    )
+    with _ROUTERS_LOCK:
+        if key not in _ROUTERS:
+            _ROUTERS[key] = LLMRouter([Endpoint(**spec) for spec in specs])
+        return _ROUTERS[key]
+
+
+def router_status() -> List[Dict]:
+    """所有路由器的端点状态（用于Web状态接口）"""
+    with _ROUTERS_LOCK:
+        routers = list(_ROUTERS.values())
+    return [status for router in routers for status in router.status()]
@@ -0,0 +1,142 @@
+"""
+LLM传输模块 - 进程内所有总结器共享的HTTP连接池
+
+requests默认每个主机只保留10个连接，并发总结线程超过10个时多出的线程每次调用都要重新
+建立TLS连接。这里的连接池在创建时按最大并发（MAX_WORKERS × TASK_WORKERS）确定大小；
+进行中的总结任务的并发数之和仍超出时换用更大的新会话，旧会话在没有登记的并发后关闭。
+安装httpx[http2]并开启config.LLM_HTTP2后改用HTTP/2，在少量连接上多路复用请求。
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+
+def http2_available() -> bool:
+    """是否安装了可选依赖httpx与h2（HTTP/2需要）"""
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _HTTPXResponse:
+    """将httpx响应包装为总结器使用的requests响应接口"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+
+    def json(self):
+        return self._response.json()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def iter_lines(self) -> Iterator[bytes]:
+        for line in self._response.iter_lines():
+            yield line.encode("utf-8")
+
+    def close(self):
+        self._response.close()
+
+
+class LLMTransport:
+    def __init__(self, pool_size: int = None, http2: bool = None):
+        """
+        初始化共享传输
+
+        Args:
+            pool_size: 初始连接池大小，默认使用config.LLM_POOL_SIZE（0表示 MAX_WORKERS × TASK_WORKERS）
+            http2: 是否使用HTTP/2（需要httpx与h2），默认使用config.LLM_HTTP2
+        """
+        self.pool_size = pool_size or config.LLM_POOL_SIZE or config.MAX_WORKERS * config.TASK_WORKERS
+        self.http2 = (config.LLM_HTTP2 if http2 is None else http2) and http2_available()
+        self._lock = threading.Lock()
+        self._reserved = 0
+        self._retired = []  # 已被替换、等待关闭的会话
+        if self.http2:
+            import httpx
+            # HTTP/2在少量连接上多路复用，连接数上限只是兜底
+            self._client = httpx.Client(http2=True, limits=httpx.Limits(
+                max_connections=self.pool_size, max_keepalive_connections=self.pool_size))
+        else:
+            self._client = self._session(self.pool_size)
+
+    @staticmethod
+    def _session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @contextmanager
+    def reserve(self, concurrency: int):
+        """
+        登记一组并发请求（一次summarize_articles调用），连接池不足时换用更大的新会话
+
+        Args:
+            concurrency: 本组请求的并发数
+        """
+        with self._lock:
+            self._reserved += concurrency
+            if not self.http2 and self._reserved > self.pool_size:
+                # 不在其他线程正在使用的会话上重新挂载适配器（会与并发请求查找适配器冲突），
+                # 而是换用更大的新会话，后续请求使用新会话
+                self.pool_size = self._reserved
+                self._retired.append(self._client)
+                self._client = self._session(self.pool_size)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._reserved -= concurrency
+                retired = []
+                if not self._reserved:
+                    # 登记的并发全部结束后关闭旧会话（未登记的零星请求仍可完成，其连接用完后不再复用）
+                    retired, self._retired = self._retired, []
+            for session in retired:
+                session.close()
+
+    def post(self, url: str, headers: Dict[str, str], json: Dict, timeout: float, stream: bool = False):
+        """
+        发送POST请求
+
+        Args:
+            url: 请求地址
+            headers: 请求头
+            json: JSON请求体
+            timeout: 超时时间(秒)
+            stream: 是否流式读取响应
+
+        Returns:
+            响应对象（requests.Response 或兼容接口的包装）
+        """
+        if not self.http2:
+            # 读取一次会话引用，扩容换用新会话不影响本次请求
+            return self._client.post(url, headers=headers, json=json, timeout=timeout, stream=stream)
+        request = self._client.build_request("POST", url, headers=headers, json=json, timeout=timeout)
+        return _HTTPXResponse(self._client.send(request, stream=stream))
+
+
+_TRANSPORT: Optional[LLMTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def shared_transport() -> LLMTransport:
+    """进程内共享的LLM传输（Web进程中所有任务的总结器复用同一连接池）"""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            _TRANSPORT = LLMTransport()
+        return _TRANSPORT
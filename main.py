@@ -3,17 +3,25 @@ PubMed食管癌文献爬取与AI总结 - 主程序
 """
 
 import os
+import re
 import sys
+import json
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 
 import config
 from pubmed_crawler import PubMedCrawler
 from journal_filter import JournalFilter
 from summarizer import ArticleSummarizer
+from exporters import (ExcelStreamWriter, MarkdownReportWriter, JsonlStreamWriter, ColumnarStreamWriter,
+                       ExportSet)
+from metrics import span, task_timings
+from profiling import TaskProfiler, PROFILE_MODES
+from relevance import rank_articles
+from dedup import collapse_duplicates
+from citations import CITATION_STYLES
 
 
 def create_output_dir():
@@ -21,127 +29,48 @@ def create_output_dir():
     os.makedirs(config.OUTPUT_DIR, exist_ok=True)
 
 
-def save_markdown_report(articles: list, output_path: str, overall_summary: str = ""):
-    """
-    保存Markdown报告
-
-    Args:
-        articles: 文章列表
-        output_path: 输出文件路径
-        overall_summary: 整体总结
-    """
-    with open(output_path, "w", encoding="utf-8") as f:
-        # 写入整体总结
-        if overall_summary:
-            f.write(overall_summary)
-            f.write("\n\n")
-
-        # 写入每篇文章的详细信息
-        f.write("---\n\n")
-
-        for i, article in enumerate(articles, 1):
-            f.write(f"## 文章 {i}: {article.get('title', '无标题')}\n\n")
-
-            f.write(f"**PMID**: {article.get('pmid', 'N/A')}\n\n")
-            f.write(f"**期刊**: {article.get('journal', 'N/A')}\n\n")
-            f.write(f"**出版社**: {article.get('publisher', 'N/A')}\n\n")
-            f.write(f"**发表日期**: {article.get('pub_date', 'N/A')}\n\n")
-            f.write(f"**DOI**: {article.get('doi', 'N/A')}\n\n")
-
-            authors = article.get('authors', '')
-            if authors:
-                f.write(f"**作者**: {authors}\n\n")
-
-            # 摘要
-            abstract = article.get('abstract', '')
-            if abstract:
-                f.write("**摘要**:\n\n")
-                f.write(f"{abstract}\n\n")
-
-            # 总结
-            summary = article.get('summary', '')
-            if summary and summary != "无摘要":
-                f.write("**AI总结**:\n\n")
-                f.write(f"{summary}\n\n")
-
-            f.write("---\n\n")
-
-        # 写入时间戳
-        f.write(f"\n*报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
-
-    print(f"Markdown报告已保存到: {output_path}")
-
+def print_timings(timings: dict):
+    """打印各阶段耗时"""
+    if not timings:
+        return
+    print("\n各阶段耗时:")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<16}{seconds:>9.2f}s")
 
-def save_excel(articles: list, output_path: str):
-    """
-    保存Excel文件
 
-    Args:
-        articles: 文章列表
-        output_path: 输出文件路径
-    """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "食管癌文献"
-
-    # 定义表头
-    headers = ["序号", "PMID", "标题", "期刊", "出版社", "发表日期", "DOI", "作者", "摘要", "AI总结"]
-
-    # 样式
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    # 写入表头
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    # 写入数据
-    for row, article in enumerate(articles, 2):
-        ws.cell(row=row, column=1, value=row-1)  # 序号
-        ws.cell(row=row, column=2, value=article.get("pmid", ""))
-        ws.cell(row=row, column=3, value=article.get("title", ""))
-        ws.cell(row=row, column=4, value=article.get("journal", ""))
-        ws.cell(row=row, column=5, value=article.get("publisher", ""))
-        ws.cell(row=row, column=6, value=article.get("pub_date", ""))
-        ws.cell(row=row, column=7, value=article.get("doi", ""))
-        ws.cell(row=row, column=8, value=article.get("authors", ""))
-        ws.cell(row=row, column=9, value=article.get("abstract", ""))
-        ws.cell(row=row, column=10, value=article.get("summary", ""))
-
-    # 调整列宽
-    column_widths = {
-        1: 6,   # 序号
-        2: 12,  # PMID
-        3: 60,  # 标题
-        4: 30,  # 期刊
-        5: 10,  # 出版社
-        6: 12,  # 发表日期
-        7: 25,  # DOI
-        8: 40,  # 作者
-        9: 80,  # 摘要
-        10: 100 # AI总结
-    }
-
-    for col, width in column_widths.items():
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    # 冻结首行
-    ws.freeze_panes = "A2"
-
-    # 保存
-    wb.save(output_path)
-    print(f"Excel文件已保存到: {output_path}")
+def print_llm_usage(usage: dict):
+    """打印各调用类型的LLM用量（模型、调用次数、平均耗时、token与估算费用）"""
+    if not usage:
+        return
+    print("\nLLM用量:")
+    for name, entry in usage.items():
+        print(f"  {name:<16}{entry['model']:<20}{entry['calls']:>5} 次  平均 {entry['avg_seconds']:.2f}s  "
+              f"token {entry['prompt_tokens']}+{entry['completion_tokens']}  ${entry['cost']:.4f}")
 
 
 def main():
     """主函数"""
-    from datetime import datetime
-
-    # 解析命令行参数
+    args = parse_args()
+    timings = {}
+    profiler = TaskProfiler(args.profile) if args.profile else None
+    try:
+        entry = run_batch if args.batch else run
+        with task_timings(timings):
+            if profiler:
+                with profiler:
+                    entry(args)
+            else:
+                entry(args)
+    finally:
+        print_timings(timings)
+        if profiler:
+            files = profiler.save(config.OUTPUT_DIR, config.PROFILE_FILE)
+            for name in files.values():
+                print(f"性能分析结果已保存到: {os.path.join(config.OUTPUT_DIR, name)}")
+
+
+def parse_args():
+    """解析命令行参数"""
     parser = argparse.ArgumentParser(description="PubMed文献搜索与AI总结工具")
     parser.add_argument("-t", "--topic", type=str, default="", help="搜索主题")
     parser.add_argument("-s", "--start-date", type=str, default="", help="开始日期 (YYYY/MM/DD)")
@@ -149,8 +78,35 @@ def main():
     parser.add_argument("-m", "--max-results", type=int, default=0, help="最大搜索篇数")
     parser.add_argument("-w", "--workers", type=int, default=0, help="并发线程数")
     parser.add_argument("--interactive", action="store_true", help="交互式模式")
-
-    args = parser.parse_args()
+    parser.add_argument("--jsonl", action="store_true", help="同时导出JSONL数据文件")
+    parser.add_argument("--parquet", action="store_true", help="同时导出Parquet数据文件（需要pyarrow）")
+    parser.add_argument("--arrow", action="store_true", help="同时导出Arrow IPC数据文件（需要pyarrow）")
+    parser.add_argument("-k", "--top-k", type=int, default=config.RELEVANCE_TOP_K,
+                        help="只总结相关性最高的前K篇（0表示不限）")
+    parser.add_argument("--min-score", type=float, default=config.RELEVANCE_MIN_SCORE,
+                        help="最低相关性得分(0-1)")
+    parser.add_argument("--no-rank", action="store_true", help="不按相关性排序")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="不使用esummary按期刊预筛选（直接获取全部文章的全文记录）")
+    parser.add_argument("--no-dedup", action="store_true", help="不合并近重复文章")
+    parser.add_argument("--hedge", action="store_true",
+                        help="逐篇总结使用对冲请求（超过近期延迟百分位未返回时再发一份，先返回者胜出）")
+    parser.add_argument("--citation-style", choices=CITATION_STYLES, default=config.REVIEW_CITATION_STYLE,
+                        help="文献综述参考文献的引用格式")
+    parser.add_argument("--parallel-review", action="store_true",
+                        help="分章节并发生成文献综述（先生成大纲，再同时撰写各章节）")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES, default=None,
+                        help="性能分析（cprofile或sampling，默认cprofile），报告写入输出目录")
+    parser.add_argument("--batch", type=str, default="",
+                        help="批量模式：主题文件（每行 主题[|开始日期|结束日期|最大篇数]，或.json/.jsonl）")
+    parser.add_argument("--batch-concurrency", type=int, default=config.BATCH_CONCURRENCY,
+                        help="批量模式下同时运行的主题数")
+    return parser.parse_args()
+
+
+def run(args):
+    """主流程"""
+    from datetime import datetime
 
     print("=" * 60)
     print("PubMed文献搜索与AI总结工具")
@@ -178,8 +134,9 @@ def main():
 
         # 步骤1: AI优化搜索词
         print("\n[步骤1] AI优化检索词...")
-        summarizer = ArticleSummarizer()
-        optimized_terms = summarizer.optimize_search_terms(user_topic)
+        summarizer = ArticleSummarizer(hedge=args.hedge or None)
+        with span("optimize_terms"):
+            optimized_terms = summarizer.optimize_search_terms(user_topic)
 
         print("\n优化后的检索词:")
         for i, term in enumerate(optimized_terms, 1):
@@ -197,8 +154,9 @@ def main():
 
         # 步骤1: AI优化搜索词
         print("\n[步骤1] AI优化检索词...")
-        summarizer = ArticleSummarizer()
-        optimized_terms = summarizer.optimize_search_terms(user_topic)
+        summarizer = ArticleSummarizer(hedge=args.hedge or None)
+        with span("optimize_terms"):
+            optimized_terms = summarizer.optimize_search_terms(user_topic)
 
         print("\n优化后的检索词:")
         for i, term in enumerate(optimized_terms, 1):
@@ -233,36 +191,80 @@ def main():
         print(f"  最大篇数: {max_results}")
         print(f"  并发线程: {max_workers}")
 
+    run_topic(args, summarizer, user_topic, optimized_terms, start_date, end_date, max_results,
+              max_workers if use_cli_args else None)
+
+
+def run_topic(args, summarizer: ArticleSummarizer, user_topic: str, optimized_terms: list, start_date: str,
+              end_date: str, max_results: int, max_workers: int = None, output_dir: str = None,
+              executor=None) -> dict:
+    """
+    单个主题的检索、筛选、总结与综述流程（步骤3-8）
+
+    Args:
+        args: 命令行参数
+        summarizer: AI总结器（批量模式下各主题共用）
+        user_topic: 搜索主题
+        optimized_terms: 优化后的检索词
+        start_date: 开始日期
+        end_date: 结束日期
+        max_results: 最大搜索篇数
+        max_workers: 总结并发数，None表示在总结前交互式输入
+        output_dir: 输出目录，默认使用config.OUTPUT_DIR
+        executor: 共享的总结线程池（批量模式），默认每次新建
+
+    Returns:
+        结果字典，包含状态、文章数与输出文件路径
+    """
+    output_dir = output_dir or config.OUTPUT_DIR
+    result = {"topic": user_topic, "start_date": start_date, "end_date": end_date,
+              "status": "no_articles", "articles": 0}
+
     # 步骤3: 从PubMed爬取文章
     print(f"\n[步骤3] 从PubMed搜索「{user_topic}」相关文章...")
     crawler = PubMedCrawler()
+    journal_filter = JournalFilter()
+    use_prefilter = config.JOURNAL_PREFILTER and not args.no_prefilter
     all_articles = crawler.get_articles(
         search_terms=optimized_terms,
         start_date=start_date,
         end_date=end_date,
-        max_results=max_results
+        max_results=max_results,
+        journal_match=journal_filter.matcher() if use_prefilter else None
     )
 
     if not all_articles:
         print("未找到相关文章，程序退出")
-        return
+        return result
 
     # 步骤4: 筛选目标期刊
     print("\n[步骤4] 按照出版社标准筛选期刊...")
-    journal_filter = JournalFilter()
-    filtered_articles = journal_filter.filter_articles(all_articles)
+    with span("filter"):
+        filtered_articles = journal_filter.filter_articles(all_articles)
 
     if not filtered_articles:
         print("筛选后没有符合条件的文章，程序退出")
-        return
+        result["status"] = "no_matches"
+        return result
+
+    # 合并近重复文章，每组只总结代表文章
+    if config.DEDUP_ENABLED and not args.no_dedup:
+        with span("dedup"):
+            filtered_articles = collapse_duplicates(filtered_articles)
+
+    # 按相关性排序，最相关的文章最先总结
+    if config.RELEVANCE_RANKING and not args.no_rank:
+        with span("rank"):
+            filtered_articles = rank_articles(
+                filtered_articles, [user_topic] + optimized_terms, top_k=args.top_k, min_score=args.min_score
+            )
 
     # 步骤5: 使用Deepseek API进行总结（多线程）
     print("\n[步骤5] 使用Deepseek API总结文章（多线程）...")
 
     # 根据模式获取并发数
-    if args.topic and not args.interactive:
+    if max_workers:
         # 命令行模式，使用预设值
-        max_workers = args.workers if args.workers > 0 else config.MAX_WORKERS
         print(f"使用并发线程数: {max_workers}")
     else:
         # 交互式模式
@@ -272,48 +274,237 @@ def main():
     # 生成整体统计
     overall_summary = summarizer.generate_overall_summary(filtered_articles)
 
+    # 报告和Excel在每篇文章总结完成时增量写出
+    report_path = os.path.join(output_dir, config.REPORT_FILE)
+    excel_path = os.path.join(output_dir, config.EXCEL_FILE)
+    writers = [
+        MarkdownReportWriter(report_path, overall_summary),
+        ExcelStreamWriter(excel_path, sheet_title="食管癌文献"),
+    ]
+    data_paths = []
+    if args.jsonl:
+        data_paths.append(os.path.join(output_dir, config.JSONL_FILE))
+        writers.append(JsonlStreamWriter(data_paths[-1]))
+    if args.parquet:
+        data_paths.append(os.path.join(output_dir, config.PARQUET_FILE))
+        writers.append(ColumnarStreamWriter(data_paths[-1], fmt="parquet"))
+    if args.arrow:
+        data_paths.append(os.path.join(output_dir, config.ARROW_FILE))
+        writers.append(ColumnarStreamWriter(data_paths[-1], fmt="arrow"))
+    # 按相关性排序后的顺序写出（派发按耗时从长到短、失败重试在最后，完成顺序与之不同）
+    exports = ExportSet(writers, order=filtered_articles)
+
+    def export_callback(article, completed, total):
+        exports.append(article)
+
     # 批量总结每篇文章（多线程）
-    summarized_articles = summarizer.summarize_articles(filtered_articles, max_workers=max_workers)
+    retry_stats = {}
+    try:
+        with span("summarize"):
+            summarized_articles = summarizer.summarize_articles(
+                filtered_articles, max_workers=max_workers, progress_callback=export_callback,
+                executor=executor, stats=retry_stats
+            )
+    except BaseException:
+        exports.abort()
+        raise
+    with span("export"):
+        exports.close()
+    print(f"Markdown报告已保存到: {report_path}")
+    print(f"Excel文件已保存到: {excel_path}")
+    for path in data_paths:
+        print(f"数据文件已保存到: {path}")
 
     # 步骤6: AI润色搜索主题并生成文献综述
     print("\n[步骤6] AI润色搜索主题...")
-    polished_topic = summarizer.polish_search_topic(user_topic)
+    with span("polish_topic"):
+        polished_topic = summarizer.polish_search_topic(user_topic)
     print(f"  原始主题: {user_topic}")
     print(f"  润色主题: {polished_topic}")
 
     print("\n[步骤7] 生成文献综述...")
-    literature_review = summarizer.generate_literature_review(
-        summarized_articles,
-        polished_topic,
-        start_date,
-        end_date
-    )
-
-    # 步骤8: 保存输出文件
+    with span("review"):
+        literature_review = summarizer.generate_literature_review(
+            summarized_articles,
+            polished_topic,
+            start_date,
+            end_date,
+            citation_style=args.citation_style,
+            parallel=args.parallel_review or None
+        )
+
+    # 步骤8: 保存输出文件（报告和Excel已在总结阶段写出）
     print("\n[步骤8] 保存输出文件...")
 
-    # 保存Markdown报告（不包含文献综述）
-    report_path = os.path.join(config.OUTPUT_DIR, config.REPORT_FILE)
-    save_markdown_report(summarized_articles, report_path, overall_summary)
-
     # 保存文献综述到单独文件
-    review_path = os.path.join(config.OUTPUT_DIR, config.REVIEW_FILE)
+    review_path = os.path.join(output_dir, config.REVIEW_FILE)
     with open(review_path, "w", encoding="utf-8") as f:
         f.write(literature_review)
     print(f"文献综述已保存到: {review_path}")
 
-    # 保存Excel文件
-    excel_path = os.path.join(config.OUTPUT_DIR, config.EXCEL_FILE)
-    save_excel(summarized_articles, excel_path)
-
     print("\n" + "=" * 60)
     print("完成!")
     print(f"找到 {len(summarized_articles)} 篇符合条件的文章")
+    if retry_stats.get("retried"):
+        print(f"总结重试: {retry_stats['retried']} 篇进入重试，{retry_stats['recovered']} 篇恢复，"
+              f"{len(retry_stats['failed'])} 篇最终失败")
+        if retry_stats["failed"]:
+            print(f"总结失败的PMID: {', '.join(retry_stats['failed'])}")
     print(f"文章报告: {report_path}")
     print(f"文献综述: {review_path}")
     print(f"数据文件: {excel_path}")
+    for path in data_paths:
+        print(f"数据文件: {path}")
     print("=" * 60)
 
+    llm_usage = summarizer.usage_summary()
+    if executor is None:
+        # 批量模式下总结器由各主题共用，用量在全部主题结束后打印
+        print_llm_usage(llm_usage)
+    result.update(status="completed", articles=len(summarized_articles), polished_topic=polished_topic,
+                  report=report_path, excel=excel_path, review=review_path, data=data_paths,
+                  llm_usage=llm_usage, summary_retry=retry_stats)
+    return result
+
+
+def load_topics(path: str, args) -> list:
+    """
+    读取批量主题文件
+
+    文本文件每行一个主题，可用 | 或制表符附加开始日期、结束日期和最大篇数，# 开头为注释；
+    .json 文件为对象数组，.jsonl 文件每行一个对象，字段为 topic/start_date/end_date/max_results。
+
+    Args:
+        path: 主题文件路径
+        args: 命令行参数（提供日期和篇数的默认值）
+
+    Returns:
+        主题参数字典列表
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            items = json.load(f)
+        elif path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            items = []
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                fields = [field.strip() for field in re.split(r"[|\t]", line)]
+                keys = ("topic", "start_date", "end_date", "max_results")
+                items.append({key: value for key, value in zip(keys, fields) if value})
+
+    today = datetime.now().strftime("%Y/%m/%d")
+    topics = []
+    for item in items:
+        if not item.get("topic"):
+            continue
+        topics.append({
+            "topic": item["topic"],
+            "start_date": item.get("start_date") or args.start_date or config.SEARCH_START_DATE,
+            "end_date": item.get("end_date") or args.end_date or today,
+            "max_results": int(item.get("max_results") or args.max_results or config.MAX_SEARCH_RESULTS),
+        })
+    return topics
+
+
+def _topic_dir(index: int, topic: str) -> str:
+    slug = re.sub(r'[\\/:*?"<>|\s]+', "_", topic).strip("_")[:40] or "topic"
+    return os.path.join(config.OUTPUT_DIR, config.BATCH_DIR, f"{index:03d}_{slug}")
+
+
+def _run_batch_topic(args, summarizer: ArticleSummarizer, index: int, item: dict, max_workers: int,
+                     executor: ThreadPoolExecutor) -> dict:
+    """在批量模式的工作线程中运行单个主题，异常不会影响其他主题"""
+    output_dir = _topic_dir(index, item["topic"])
+    os.makedirs(output_dir, exist_ok=True)
+    timings = {}
+    start = time.time()
+    with task_timings(timings):
+        try:
+            with span("optimize_terms"):
+                optimized_terms = summarizer.optimize_search_terms(item["topic"])
+            result = run_topic(args, summarizer, item["topic"], optimized_terms, item["start_date"],
+                               item["end_date"], item["max_results"], max_workers=max_workers,
+                               output_dir=output_dir, executor=executor)
+        except Exception as e:
+            print(f"主题「{item['topic']}」处理失败: {e}")
+            result = {**item, "status": "error", "articles": 0, "error": str(e)}
+    # 各主题共用一个总结器，用量在全部主题结束后统一打印
+    result.pop("llm_usage", None)
+    result.update(index=index, output_dir=output_dir, seconds=round(time.time() - start, 2), timings=timings)
+    return result
+
+
+def write_batch_index(results: list) -> tuple:
+    """
+    写出批量任务的汇总索引（JSON与Markdown）
+
+    Args:
+        results: 各主题的结果字典（按主题顺序）
+
+    Returns:
+        (JSON路径, Markdown路径)
+    """
+    json_path = os.path.join(config.OUTPUT_DIR, f"{config.BATCH_INDEX_FILE}.json")
+    md_path = os.path.join(config.OUTPUT_DIR, f"{config.BATCH_INDEX_FILE}.md")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    def link(path):
+        return f"[{os.path.basename(path)}]({os.path.relpath(path, config.OUTPUT_DIR)})" if path else ""
+
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("# 批量检索汇总\n\n")
+        f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write("| 序号 | 主题 | 时间范围 | 状态 | 文章数 | 耗时(s) | 报告 | 综述 |\n")
+        f.write("|---|---|---|---|---|---|---|---|\n")
+        for r in results:
+            f.write(f"| {r['index']} | {r['topic']} | {r['start_date']} 至 {r['end_date']} | {r['status']} | "
+                    f"{r['articles']} | {r['seconds']} | {link(r.get('report'))} | {link(r.get('review'))} |\n")
+    return json_path, md_path
+
+
+def run_batch(args):
+    """批量模式：在同一进程内并发运行多个主题，共用HTTP连接池、NCBI限速器、缓存与总结线程池"""
+    topics = load_topics(args.batch, args)
+    if not topics:
+        print(f"主题文件中没有主题: {args.batch}")
+        return
+
+    create_output_dir()
+    max_workers = args.workers if args.workers > 0 else config.MAX_WORKERS
+    concurrency = max(1, min(args.batch_concurrency, len(topics)))
+    print(f"批量模式: {len(topics)} 个主题，同时运行 {concurrency} 个，AI总结总并发 {max_workers}")
+
+    # 所有主题共用一个总结器（同一HTTP会话）和一个总结线程池，总并发不超过max_workers
+    summarizer = ArticleSummarizer(hedge=args.hedge or None)
+    results = []
+    # 共享线程池的并发上限为max_workers，只登记一次连接池并发（各主题不再分别登记）
+    with summarizer.transport.reserve(max_workers), \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary") as summary_pool, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="topic") as topic_pool:
+        futures = [
+            topic_pool.submit(_run_batch_topic, args, summarizer, i, item, max_workers, summary_pool)
+            for i, item in enumerate(topics, 1)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"\n[批量 {done}/{len(topics)}] {result['topic']}: {result['status']}, "
+                  f"{result['articles']} 篇, {result['seconds']}s")
+
+    results.sort(key=lambda r: r["index"])
+    json_path, md_path = write_batch_index(results)
+    failed = sum(1 for r in results if r["status"] == "error")
+    print("\n" + "=" * 60)
+    print(f"批量完成: {len(results) - failed} 个主题成功, {failed} 个失败")
+    print(f"汇总索引: {md_path}")
+    print(f"汇总数据: {json_path}")
+    print("=" * 60)
+    print_llm_usage(summarizer.usage_summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
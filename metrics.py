@@ -0,0 +1,205 @@
+"""
+指标模块 - 计数器、直方图、阶段计时与Prometheus文本格式导出
+
+进程内全局注册表，多进程部署时每个进程分别暴露自己的指标。
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from profiling import current_profiler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# 当前任务的阶段耗时字典（由 task_timings() 设置，span() 自动累加）
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_timings", default=None)
+
+
+def _escape(value) -> str:
+    """转义Prometheus标签值"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Dict[str, str] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """增加计数"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [各桶计数..., 总数, 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """记录一次观测值"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += 1
+            data[-1] += value
+
+    def snapshot(self, **labels) -> Tuple[int, float]:
+        """返回 (观测次数, 观测值总和)"""
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            return (int(data[-2]), data[-1]) if data else (0, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(data)) for key, data in self._values.items())
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {int(data[-2])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {int(data[-2])}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {data[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """导出Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------- 流程指标 ----------
+
+STAGE_SECONDS = Histogram("pubmed_stage_seconds", "各流程阶段的耗时(秒)", ("stage",))
+LLM_REQUEST_SECONDS = Histogram("pubmed_llm_request_seconds", "单次LLM API调用耗时(秒)", ("outcome",))
+LLM_TOKENS = Counter("pubmed_llm_tokens_total", "LLM API消耗的token数", ("type",))
+LLM_REQUESTS = Counter("pubmed_llm_requests_total", "LLM API调用次数", ("status",))
+RETRIES = Counter("pubmed_retries_total", "重试次数", ("operation",))
+RATE_LIMITED = Counter("pubmed_rate_limited_total", "收到429限流响应的次数", ("service",))
+CACHE_HITS = Counter("pubmed_cache_hits_total", "缓存或请求合并命中次数", ("cache",))
+HEDGES = Counter("pubmed_llm_hedges_total", "对冲请求次数（issued发出、won先于原请求返回）", ("event",))
+LLM_ENDPOINT_REQUESTS = Counter("pubmed_llm_endpoint_requests_total", "各LLM端点的请求次数", ("endpoint", "outcome"))
+LLM_CIRCUIT_OPENED = Counter("pubmed_llm_circuit_opened_total", "LLM端点熔断次数", ("endpoint",))
+LLM_PROFILE_SECONDS = Histogram("pubmed_llm_profile_seconds", "各调用类型的LLM调用耗时(秒)", ("profile", "model"))
+LLM_PROFILE_TOKENS = Counter("pubmed_llm_profile_tokens_total", "各调用类型消耗的token数", ("profile", "type"))
+LLM_COST = Counter("pubmed_llm_cost_usd_total", "按MODEL_PRICES估算的LLM费用(美元)", ("profile", "model"))
+ARTICLES = Counter("pubmed_articles_total", "各阶段处理的文章数", ("stage",))
+
+
+@contextmanager
+def task_timings(timings: Dict[str, float]):
+    """
+    在当前上下文中登记任务的阶段耗时字典，期间的 span() 会累加到该字典
+
+    Args:
+        timings: 阶段名到累计耗时(秒)的字典
+    """
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    阶段计时：记录到 pubmed_stage_seconds 直方图，并累加到当前任务的阶段耗时；
+    任务开启性能分析时同时记录该阶段的内存峰值
+
+    Args:
+        stage: 阶段名
+    """
+    profiler = current_profiler()
+    if profiler:
+        profiler.stage_started(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler:
+            profiler.stage_finished(stage)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 4)
+
+
+def current_timings() -> Optional[Dict[str, float]]:
+    """返回当前上下文登记的阶段耗时字典（未登记时为None）"""
+    return _current_timings.get()
+
+
+def render_prometheus() -> str:
+    """导出全部指标的Prometheus文本格式"""
+    return REGISTRY.render()
@@ -0,0 +1,291 @@
+"""
+性能分析模块 - 按任务开启的 cProfile / 采样分析，以及各阶段的 tracemalloc 内存峰值
+
+分析器通过 with 语句包裹一次任务运行；期间 metrics.span() 划分的阶段会记录内存峰值。
+结束后调用 save() 将报告写入输出目录。
+"""
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter as TallyCounter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import config
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+# 当前上下文中运行的分析器（由 TaskProfiler 设置，span() 据此记录阶段内存峰值）
+_current_profiler: ContextVar[Optional["TaskProfiler"]] = ContextVar("current_profiler", default=None)
+
+# tracemalloc 的内存峰值、cProfile 与采样器都是进程级的，同一时间只分析一个任务；
+# 已有任务在分析时进入分析器会立即抛出 ProfilerBusy（不阻塞调用线程）
+_profile_lock = threading.Lock()
+
+# tracemalloc 是进程级的，多个分析中的任务共用一次跟踪
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+class ProfilerBusy(RuntimeError):
+    """本进程中已有任务正在进行性能分析"""
+
+
+def current_profiler() -> Optional["TaskProfiler"]:
+    """返回当前上下文中运行的分析器（未开启分析时为None）"""
+    return _current_profiler.get()
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+def _format_bytes(size: float) -> str:
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+class _StackSampler:
+    def __init__(self, interval: float):
+        """
+        采样分析器：后台线程定期采集进程内所有线程的调用栈
+
+        Args:
+            interval: 采样间隔(秒)
+        """
+        self.interval = interval
+        self.stacks: TallyCounter = TallyCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """火焰图工具（flamegraph.pl / speedscope）使用的折叠栈格式"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int) -> List[tuple]:
+        """
+        按采样次数统计函数
+
+        Returns:
+            [(函数, 自身采样数, 累计采样数)]，按自身采样数降序
+        """
+        own, total = TallyCounter(), TallyCounter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for func in set(frames):
+                total[func] += count
+        return [(func, count, total[func]) for func, count in own.most_common(limit)]
+
+
+class TaskProfiler:
+    def __init__(self, mode: str = "cprofile", interval: float = None):
+        """
+        初始化任务分析器
+
+        cprofile 模式只分析进入分析器的线程（任务主线程：检索、解析、筛选、结果处理）；
+        sampling 模式采样进程内所有线程（包括总结线程池），开销更低但结果为统计近似。
+
+        Args:
+            mode: 分析模式，cprofile 或 sampling
+            interval: 采样间隔(秒)，默认使用 config.PROFILE_SAMPLE_INTERVAL
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"未知的分析模式: {mode}")
+        self.mode = mode
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        self.elapsed = 0.0
+        self.peak_memory = 0
+        # 阶段名 -> {"seconds": 累计耗时, "peak": 阶段内相对起点的最大内存增量}
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._open: List[list] = []
+        self._lock = threading.Lock()
+        self._profile = None
+        self._sampler = None
+        self._token = None
+        self._start = 0.0
+
+    def __enter__(self) -> "TaskProfiler":
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusy("本进程中已有任务正在进行性能分析")
+        try:
+            _acquire_tracemalloc()
+            try:
+                tracemalloc.reset_peak()
+                if self.mode == "cprofile":
+                    self._profile = cProfile.Profile()
+                    self._profile.enable()
+                else:
+                    self._sampler = _StackSampler(self.interval)
+                    self._sampler.start()
+            except BaseException:
+                _release_tracemalloc()
+                raise
+        except BaseException:
+            _profile_lock.release()
+            raise
+        self._token = _current_profiler.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile:
+            self._profile.disable()
+        if self._sampler:
+            self._sampler.stop()
+        self.elapsed = time.perf_counter() - self._start
+        self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        _current_profiler.reset(self._token)
+        _release_tracemalloc()
+        _profile_lock.release()
+        return False
+
+    def _fold_peak(self) -> int:
+        """读取并重置tracemalloc峰值（分析器互斥，重置不会影响其他任务），计入所有未结束的阶段"""
+        current, peak = tracemalloc.get_traced_memory()
+        for entry in self._open:
+            entry[3] = max(entry[3], peak)
+        self.peak_memory = max(self.peak_memory, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def stage_started(self, stage: str):
+        """阶段开始（由 metrics.span() 调用）"""
+        with self._lock:
+            current = self._fold_peak()
+            # [阶段名, 开始时间, 开始时内存, 阶段内峰值]
+            self._open.append([stage, time.perf_counter(), current, current])
+
+    def stage_finished(self, stage: str):
+        """阶段结束（由 metrics.span() 调用）"""
+        with self._lock:
+            self._fold_peak()
+            for i in range(len(self._open) - 1, -1, -1):
+                if self._open[i][0] == stage:
+                    _, start, base, peak = self._open.pop(i)
+                    break
+            else:
+                return
+            record = self.stages.setdefault(stage, {"seconds": 0.0, "peak": 0})
+            record["seconds"] += time.perf_counter() - start
+            record["peak"] = max(record["peak"], peak - base)
+
+    def report(self) -> str:
+        """生成文本报告"""
+        lines = [
+            "# 性能分析报告",
+            "",
+            f"- 模式: {self.mode}",
+            f"- 总耗时: {self.elapsed:.2f}s",
+            f"- 内存峰值(tracemalloc): {_format_bytes(self.peak_memory)}",
+            "",
+            "## 各阶段耗时与内存峰值",
+            "",
+            f"{'阶段':<16}{'耗时(s)':>10}{'峰值增量':>14}",
+        ]
+        for stage, record in self.stages.items():
+            lines.append(f"{stage:<16}{record['seconds']:>10.2f}{_format_bytes(record['peak']):>14}")
+        lines.append("")
+
+        top = config.PROFILE_TOP_FUNCTIONS
+        if self._profile:
+            lines += [f"## 函数统计（任务线程，按累计耗时排序前{top}）", ""]
+            buffer = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=buffer)
+            stats.sort_stats("cumulative").print_stats(top)
+            lines.append(buffer.getvalue())
+        elif self._sampler:
+            samples = self._sampler.samples
+            lines += [f"## 函数统计（全部线程，共 {samples} 次采样，间隔 {self.interval * 1000:.0f}ms，"
+                      f"按自身采样数排序前{top}）", "",
+                      f"{'自身':>8}{'累计':>8}  函数"]
+            for func, own, total in self._sampler.top_functions(top):
+                lines.append(f"{own:>8}{total:>8}  {func}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def file_names(self, basename: str) -> Dict[str, str]:
+        """
+        分析结果的文件名（分析结束前即可确定，便于提前登记到任务的文件列表）
+
+        Args:
+            basename: 文件名前缀（不含扩展名）
+
+        Returns:
+            {'profile': 文本报告文件名, 'profile_data': 原始数据文件名}
+        """
+        # cprofile为pstats二进制文件（可用 snakeviz / python -m pstats 查看），sampling为折叠栈文本
+        extension = ".prof" if self.mode == "cprofile" else ".collapsed"
+        return {"profile": f"{basename}.txt", "profile_data": f"{basename}{extension}"}
+
+    def save(self, output_dir: str, basename: str) -> Dict[str, str]:
+        """
+        保存分析结果
+
+        Args:
+            output_dir: 输出目录
+            basename: 文件名前缀（不含扩展名）
+
+        Returns:
+            同 file_names()
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        files = self.file_names(basename)
+        with open(os.path.join(output_dir, files["profile"]), "w", encoding="utf-8") as f:
+            f.write(self.report())
+
+        data_path = os.path.join(output_dir, files["profile_data"])
+        if self._profile:
+            self._profile.dump_stats(data_path)
+        elif self._sampler:
+            with open(data_path, "w", encoding="utf-8") as f:
+                f.write(self._sampler.collapsed())
+        return files
@@ -1,11 +1,37 @@
 """
-PubMed爬取模块 - 使用Biopython的Entrez模块搜索Pubmed
+PubMed爬取模块 - 通过E-utilities搜索Pubmed（共享keep-alive连接池，使用Biopython的Entrez解析XML）
 """
 
-import time
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from Bio import Entrez
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import config
+from singleflight import SingleFlight
+from rate_limiter import RateLimiter, ncbi_rate
+from ttl_cache import TTLCache, normalize_query
+from metrics import span, ARTICLES
+from eutils import EUtilsClient
+from article import Article
+
+# 进程内efetch请求合并：多个任务同时获取同一PMID时只请求一次
+_EFETCH_FLIGHT = SingleFlight("efetch")
+
+# 进程内esearch结果缓存：(标准化检索式, retmax) -> (命中总数, PMID元组)
+_ESEARCH_CACHE = TTLCache("esearch", config.ESEARCH_CACHE_TTL, config.CACHE_MAX_ENTRIES)
+
+# 进程内共享的NCBI限速器（按速率区分有无API Key）
+_LIMITERS: Dict[float, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _ncbi_limiter(api_key: str = None) -> RateLimiter:
+    rate = ncbi_rate(api_key)
+    with _LIMITERS_LOCK:
+        if rate not in _LIMITERS:
+            _LIMITERS[rate] = RateLimiter(rate)
+        return _LIMITERS[rate]
 
 
 class PubMedCrawler:
@@ -19,11 +45,37 @@ class PubMedCrawler:
         """
         self.email = email or config.PUBMED_EMAIL
         self.api_key = api_key or config.PUBMED_API_KEY
-        Entrez.email = self.email
-        if self.api_key:
-            Entrez.api_key = self.api_key
+        self.limiter = _ncbi_limiter(self.api_key)
+        self.client = EUtilsClient(self.email, self.api_key, limiter=self.limiter)
+        # 最近一次检索中每个检索词的命中数 {检索词: 命中总数}，出错的检索词为-1
+        self.term_hits: Dict[str, int] = {}
+        # 当前检索的esearch缓存时间（结束日期为今天时较短）
+        self.cache_ttl = config.ESEARCH_CACHE_TTL
+
+    @staticmethod
+    def _term_query(term: str) -> str:
+        return f'("{term}"[Title/Abstract] OR {term}[MeSH Terms])'
+
+    def _esearch(self, query: str, retmax: int) -> Tuple[int, List[str]]:
+        """
+        执行一次esearch，结果按日期从新到旧排列；
+        相同检索式（含日期范围）与retmax的结果在缓存有效期内直接复用
 
-    def search_articles(self, search_terms: List[str], start_date: str, end_date: str = None, max_results: int = 1000) -> List[int]:
+        Returns:
+            (命中总数, PMID列表)
+        """
+        cache_key = (normalize_query(query), retmax)
+        cached = _ESEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            return cached[0], list(cached[1])
+
+        result = self.client.read("esearch", term=query, retmax=retmax, sort="date")
+        count, ids = int(result.get("Count", 0)), [str(pmid) for pmid in result.get("IdList", [])]
+        _ESEARCH_CACHE.set(cache_key, (count, tuple(ids)), ttl=self.cache_ttl)
+        return count, ids
+
+    def search_articles(self, search_terms: List[str], start_date: str, end_date: str = None, max_results: int = 1000,
+                        mode: str = None) -> List[int]:
         """
         搜索PubMed文章
 
@@ -32,6 +84,7 @@ class PubMedCrawler:
             start_date: 开始日期 (YYYY/MM/DD格式)
             end_date: 结束日期 (YYYY/MM/DD格式)，默认为当前日期
             max_results: 最大返回结果数
+            mode: 检索方式，"parallel" 或 "combined"，默认使用config.SEARCH_MODE
 
         Returns:
             文章ID列表
@@ -48,27 +101,29 @@ class PubMedCrawler:
             except ValueError:
                 end_date = datetime.now().strftime("%Y/%m/%d")
 
-        # 构建搜索查询
-        search_query = " OR ".join([f'("{term}"[Title/Abstract] OR {term}[MeSH Terms])'
-                                     for term in search_terms])
+        # 结束日期为今天时检索结果仍可能增加，缓存时间较短
+        today = datetime.now().strftime("%Y/%m/%d")
+        self.cache_ttl = config.ESEARCH_CACHE_TTL_OPEN if end_date >= today else config.ESEARCH_CACHE_TTL
 
         # 添加日期限制
         date_query = f'("{start_date}"[Date - Publication] : "{end_date}"[Date - Publication])'
+
+        self.term_hits = {}
+        mode = mode or config.SEARCH_MODE
+        if mode == "parallel" and len(search_terms) > 1:
+            return self._search_parallel(search_terms, date_query, max_results)
+
+        # 构建搜索查询
+        search_query = " OR ".join([self._term_query(term) for term in search_terms])
         full_query = f"({search_query}) AND {date_query}"
 
         print(f"搜索查询: {full_query}")
 
         try:
-            handle = Entrez.esearch(
-                db="pubmed",
-                term=full_query,
-                retmax=max_results,
-                sort="date"
-            )
-            result = Entrez.read(handle)
-            handle.close()
+            with span("esearch"):
+                _, id_list = self._esearch(full_query, max_results)
 
-            id_list = result.get("IdList", [])
+            ARTICLES.inc(len(id_list), stage="search")
             print(f"找到 {len(id_list)} 篇文章")
             return id_list
 
@@ -76,18 +131,175 @@ class PubMedCrawler:
             print(f"搜索错误: {e}")
             return []
 
+    def _search_parallel(self, search_terms: List[str], date_query: str, max_results: int) -> List[str]:
+        """
+        每个检索词单独并发esearch，合并去重后按日期取前max_results篇
+
+        Args:
+            search_terms: 搜索词列表
+            date_query: 日期限制检索式
+            max_results: 最大返回结果数
+
+        Returns:
+            文章ID列表（按日期从新到旧）
+        """
+        def search_term(term):
+            try:
+                return self._esearch(f"{self._term_query(term)} AND {date_query}", max_results)
+            except Exception as e:
+                print(f"检索词「{term}」搜索错误: {e}")
+                return -1, []
+
+        print(f"并发检索 {len(search_terms)} 个检索词...")
+        with span("esearch"):
+            with ThreadPoolExecutor(max_workers=min(config.ESEARCH_WORKERS, len(search_terms))) as executor:
+                results = list(executor.map(search_term, search_terms))
+
+        self.term_hits = {}
+        merged = []
+        seen = set()
+        for term, (count, ids) in zip(search_terms, results):
+            self.term_hits[term] = count
+            print(f"  {term}: 命中 {count} 篇" if count >= 0 else f"  {term}: 检索失败")
+            for pmid in ids:
+                if pmid not in seen:
+                    seen.add(pmid)
+                    merged.append(pmid)
+
+        if len(merged) > max_results:
+            merged = self._sort_by_date(merged, max_results)
+        else:
+            # 全部保留时无需额外请求，按PMID降序近似日期顺序
+            merged.sort(key=int, reverse=True)
+        id_list = merged[:max_results]
+        ARTICLES.inc(len(id_list), stage="search")
+        print(f"合并去重后 {len(seen)} 篇，按日期保留 {len(id_list)} 篇")
+        return id_list
+
+    def _sort_by_date(self, pmids: List[str], max_results: int) -> List[str]:
+        """
+        将合并后的PMID按发表日期从新到旧排序并截取（用一次ID列表检索完成）
+
+        排序请求失败时退回按PMID降序（PMID大致随收录时间递增）。
+        """
+        query = " OR ".join(f"{pmid}[uid]" for pmid in pmids)
+        try:
+            with span("esearch"):
+                _, ordered = self._esearch(query, max_results)
+            if ordered:
+                return ordered
+        except Exception as e:
+            print(f"按日期排序失败，改为按PMID排序: {e}")
+        return sorted(pmids, key=int, reverse=True)
+
+    def fetch_summaries(self, pmids: List[str], batch_size: int = None) -> List[Article]:
+        """
+        分批esummary获取文章的期刊名、刊名缩写与发表日期（不含摘要和作者，数据量远小于efetch）
+
+        Args:
+            pmids: PubMed ID列表
+            batch_size: 每批获取的数量，默认使用config.ESUMMARY_BATCH_SIZE
+
+        Returns:
+            轻量文章记录列表（含pmid/title/journal/pub_date，刊名缩写存于 "journal_abbr"）；
+            获取失败的批次不返回记录
+        """
+        batch_size = batch_size or config.ESUMMARY_BATCH_SIZE
+        summaries = []
+        for i in range(0, len(pmids), batch_size):
+            batch = [str(pmid) for pmid in pmids[i:i + batch_size]]
+            try:
+                with span("esummary"):
+                    records = self.client.read("esummary", ids=batch)
+            except Exception as e:
+                print(f"获取文章摘要信息错误: {e}")
+                continue
+
+            for record in records:
+                summaries.append(Article(
+                    pmid=str(record.get("Id", "")),
+                    title=record.get("Title", ""),
+                    journal=record.get("FullJournalName", "") or record.get("Source", ""),
+                    journal_abbr=record.get("Source", ""),
+                    pub_date=record.get("PubDate", ""),
+                ))
+        return summaries
+
+    def prefilter(self, pmids: List[str], journal_match: Callable[[str], bool]) -> List[str]:
+        """
+        两阶段获取的第一阶段：按esummary的期刊名预筛选PMID，只有保留的文章才获取全文记录
+
+        期刊全称或缩写任一匹配即保留；esummary未返回的PMID（请求失败等）也保留，由全文记录再筛选。
+
+        Args:
+            pmids: PubMed ID列表
+            journal_match: 参数为期刊名、返回是否保留的函数
+
+        Returns:
+            保留的PMID列表（保持原有顺序）
+        """
+        summaries = {summary["pmid"]: summary for summary in self.fetch_summaries(pmids)}
+        kept = []
+        for pmid in pmids:
+            summary = summaries.get(str(pmid))
+            if summary is None or journal_match(summary["journal"]) or (
+                    summary["journal_abbr"] and journal_match(summary["journal_abbr"])):
+                kept.append(pmid)
+        ARTICLES.inc(len(kept), stage="prefilter")
+        print(f"期刊预筛选: {len(pmids)} 篇 -> {len(kept)} 篇，仅获取保留文章的全文记录")
+        return kept
+
     def fetch_article_details(self, pmids: List[int], batch_size: int = 100) -> List[Dict]:
         """
         获取文章详细信息
 
+        同一进程内其他任务正在获取的PMID不会重复请求，而是等待并共享其结果。
+
         Args:
             pmids: PubMed ID列表
             batch_size: 每批获取的数量
 
         Returns:
-            文章信息字典列表
+            文章信息字典列表（按pmids顺序）
         """
+        keys = [str(pmid) for pmid in pmids]
+        owned, waiting = _EFETCH_FLIGHT.acquire(keys)
+        if waiting:
+            print(f"{len(waiting)} 篇文章正由其他任务获取，等待共享结果")
+
+        fetched = {}
+        try:
+            fetched = self._fetch_batches(owned, batch_size)
+        finally:
+            # 发布自有PMID的结果（获取失败的为None），唤醒等待方
+            for key in owned:
+                article = fetched.get(key)
+                _EFETCH_FLIGHT.complete(key, article.copy() if article else None)
+
         articles = []
+        for key in keys:
+            if key in waiting:
+                article = waiting[key].result()
+                # 共享结果时复制一份，避免后续阶段的原地修改影响其他任务
+                article = article.copy() if article else None
+            else:
+                article = fetched.get(key)
+            if article:
+                articles.append(article)
+        return articles
+
+    def _fetch_batches(self, pmids: List[str], batch_size: int) -> Dict[str, Dict]:
+        """
+        分批efetch并解析文章
+
+        Args:
+            pmids: PubMed ID列表
+            batch_size: 每批获取的数量
+
+        Returns:
+            PMID到文章信息字典的映射
+        """
+        articles = {}
         total = len(pmids)
 
         for i in range(0, total, batch_size):
@@ -95,30 +307,25 @@ class PubMedCrawler:
             print(f"获取文章 {i+1}-{min(i+batch_size, total)}/{total}...")
 
             try:
-                handle = Entrez.efetch(
-                    db="pubmed",
-                    id=batch,
-                    rettype="medline",
-                    retmode="xml"
-                )
-                records = Entrez.read(handle)
-                handle.close()
-
-                for record in records.get("PubmedArticle", []):
-                    article_info = self._parse_article(record)
-                    if article_info:
-                        articles.append(article_info)
-
-                # 避免请求过快
-                time.sleep(config.DELAY_BETWEEN_REQUESTS)
+                # 下载与解析分开计时
+                with span("efetch"):
+                    data = self.client.request("efetch", ids=batch, rettype="medline", retmode="xml")
+
+                with span("parse"):
+                    records = Entrez.read(io.BytesIO(data))
+                    for record in records.get("PubmedArticle", []):
+                        article_info = self._parse_article(record)
+                        if article_info:
+                            articles[article_info["pmid"]] = article_info
 
             except Exception as e:
                 print(f"获取文章详情错误: {e}")
                 continue
 
+        ARTICLES.inc(len(articles), stage="fetch")
         return articles
 
-    def _parse_article(self, record: Dict) -> Optional[Dict]:
+    def _parse_article(self, record: Dict) -> Optional[Article]:
         """
         解析单篇文章记录
 
@@ -130,10 +337,11 @@ class PubMedCrawler:
         """
         try:
             # 获取PMID
-            pmid = str(record.get("PMID", ""))
+            citation = record.get("MedlineCitation", {})
+            pmid = str(citation.get("PMID", ""))
 
             # 获取标题
-            article = record.get("MedlineCitation", {}).get("Article", {})
+            article = citation.get("Article", {})
             title = article.get("ArticleTitle", "")
 
             # 获取期刊信息
@@ -175,21 +383,22 @@ class PubMedCrawler:
             if not title:
                 return None
 
-            return {
-                "pmid": pmid,
-                "title": title,
-                "journal": journal_title,
-                "pub_date": pub_date,
-                "abstract": abstract,
-                "authors": "; ".join(authors[:10]),  # 限制作者数量
-                "doi": doi
-            }
+            return Article(
+                pmid=pmid,
+                title=title,
+                journal=journal_title,
+                pub_date=pub_date,
+                abstract=abstract,
+                authors="; ".join(authors[:10]),  # 限制作者数量
+                doi=doi
+            )
 
         except Exception as e:
             print(f"解析文章错误: {e}")
             return None
 
-    def get_articles(self, search_terms: List[str] = None, start_date: str = None, end_date: str = None, max_results: int = 100) -> List[Dict]:
+    def get_articles(self, search_terms: List[str] = None, start_date: str = None, end_date: str = None, max_results: int = 100,
+                     journal_match: Callable[[str], bool] = None) -> List[Dict]:
         """
         获取所有符合条件的文章
 
@@ -198,6 +407,8 @@ class PubMedCrawler:
             start_date: 开始日期
             end_date: 结束日期
             max_results: 最大搜索篇数
+            journal_match: 期刊预筛选函数（参数为期刊名）；提供时先用esummary按期刊筛选，
+                只对保留的文章efetch全文记录（调用方仍需对返回结果执行完整的期刊筛选）
 
         Returns:
             文章列表
@@ -216,6 +427,13 @@ class PubMedCrawler:
             print("未找到符合条件的文章")
             return []
 
+        # 两阶段获取：先按期刊名预筛选，减少efetch的数据量与解析时间
+        if journal_match is not None:
+            pmids = self.prefilter(pmids, journal_match)
+            if not pmids:
+                print("预筛选后没有目标期刊的文章")
+                return []
+
         # 获取文章详细信息
         articles = self.fetch_article_details(pmids)
 
@@ -0,0 +1,51 @@
+"""
+限速模块 - 线程安全的请求速率限制器，用于在并发请求时遵守NCBI E-utilities的访问频率限制
+"""
+
+import time
+import threading
+
+import config
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        """
+        初始化限速器
+
+        Args:
+            rate: 每秒允许的请求数
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        """阻塞直到可以发出下一个请求（按到达顺序依次放行）"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def ncbi_rate(api_key: str = None) -> float:
+    """
+    NCBI允许的请求频率：有API Key时每秒10次，否则每秒3次
+
+    Args:
+        api_key: PubMed API密钥
+
+    Returns:
+        每秒请求数
+    """
+    return config.NCBI_RATE_WITH_KEY if api_key else config.NCBI_RATE_WITHOUT_KEY
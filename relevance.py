@@ -0,0 +1,156 @@
+"""
+相关性排序模块 - 使用BM25对文章标题和摘要打分，在AI总结前按相关性排序并截取
+
+打分完全在本地完成，不调用API；排序后的文章按顺序派发总结，最相关的结果最先返回。
+"""
+
+import re
+import math
+from collections import Counter
+from typing import List, Dict, Iterable
+import config
+
+# 英文/数字词（保留 PD-1、T-cell 这类连字符词）与中日韩字符
+_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_CJK_RE = re.compile(r"[一-鿿]+")
+
+# 检索式中的常见连接词与字段标记
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it", "of", "on",
+    "or", "not", "that", "the", "this", "to", "was", "were", "with", "we", "our", "study", "mesh", "terms",
+    "title", "abstract", "tiab",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文按词切分并小写，连字符词同时保留整体与各部分；中文按相邻两字切分
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        词列表
+    """
+    if not text:
+        return []
+    text = text.lower()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        if word in STOPWORDS:
+            continue
+        tokens.append(word)
+        if "-" in word:
+            tokens.extend(part for part in word.split("-")
+                          if len(part) > 1 and not part.isdigit() and part not in STOPWORDS)
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class RelevanceRanker:
+    def __init__(self, query_terms: Iterable[str], k1: float = None, b: float = None, title_weight: int = None):
+        """
+        初始化相关性排序器
+
+        Args:
+            query_terms: 查询文本列表（搜索主题与优化后的检索词）
+            k1: BM25词频饱和参数，默认使用config.BM25_K1
+            b: BM25文档长度归一化参数，默认使用config.BM25_B
+            title_weight: 标题词的权重（标题重复计入的次数），默认使用config.RELEVANCE_TITLE_WEIGHT
+        """
+        self.k1 = config.BM25_K1 if k1 is None else k1
+        self.b = config.BM25_B if b is None else b
+        self.title_weight = title_weight or config.RELEVANCE_TITLE_WEIGHT
+        # 查询词去重：同一个词出现在多个检索词中只计一次
+        self.query = sorted({token for term in query_terms for token in tokenize(term)})
+
+    def _document(self, article: Dict) -> Counter:
+        counts = Counter(tokenize(article.get("abstract", "")))
+        for token in tokenize(article.get("title", "")):
+            counts[token] += self.title_weight
+        return counts
+
+    def score(self, articles: List[Dict]) -> List[float]:
+        """
+        计算每篇文章的BM25得分
+
+        Args:
+            articles: 文章列表
+
+        Returns:
+            与articles顺序一致的得分列表
+        """
+        if not articles or not self.query:
+            return [0.0] * len(articles)
+
+        documents = [self._document(article) for article in articles]
+        lengths = [sum(doc.values()) for doc in documents]
+        average_length = (sum(lengths) / len(lengths)) or 1.0
+        total = len(documents)
+
+        # 逆文档频率（BM25+平滑，保证非负）
+        idf = {}
+        for token in self.query:
+            frequency = sum(1 for doc in documents if token in doc)
+            idf[token] = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+
+        scores = []
+        for doc, length in zip(documents, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / average_length)
+            score = 0.0
+            for token in self.query:
+                tf = doc.get(token, 0)
+                if tf:
+                    score += idf[token] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def rank(self, articles: List[Dict], top_k: int = 0, min_score: float = 0.0) -> List[Dict]:
+        """
+        按相关性排序并截取
+
+        每篇文章写入 "relevance" 字段：相对于本批最高分归一化到0-1的得分。
+
+        Args:
+            articles: 文章列表
+            top_k: 最多保留的篇数，0表示不限
+            min_score: 最低归一化得分(0-1)，低于该值的文章被丢弃
+
+        Returns:
+            排序后的文章列表
+        """
+        scores = self.score(articles)
+        best = max(scores, default=0.0) or 1.0
+        for article, score in zip(articles, scores):
+            article["relevance"] = round(score / best, 4)
+
+        # 稳定排序：得分相同时保持原有（按日期）顺序
+        ranked = sorted(articles, key=lambda a: a["relevance"], reverse=True)
+        if min_score > 0:
+            ranked = [a for a in ranked if a["relevance"] >= min_score]
+        if top_k and top_k > 0:
+            ranked = ranked[:top_k]
+        return ranked
+
+
+def rank_articles(articles: List[Dict], query_terms: Iterable[str], top_k: int = 0,
+                  min_score: float = 0.0) -> List[Dict]:
+    """
+    按相关性排序文章（便捷函数）
+
+    Args:
+        articles: 文章列表
+        query_terms: 查询文本列表
+        top_k: 最多保留的篇数，0表示不限
+        min_score: 最低归一化得分(0-1)
+
+    Returns:
+        排序后的文章列表
+    """
+    ranked = RelevanceRanker(query_terms).rank(articles, top_k=top_k, min_score=min_score)
+    print(f"相关性排序: {len(articles)} 篇 -> 保留 {len(ranked)} 篇")
+    return ranked
@@ -0,0 +1,114 @@
+"""
+请求合并模块 - 进程内对相同键的并发请求只执行一次（single-flight）
+"""
+
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+from metrics import CACHE_HITS
+from task_control import TaskControl, TaskCancelled
+
+# 等待方检查自身取消信号的间隔(秒)
+WAIT_INTERVAL = 0.1
+
+
+class SingleFlight:
+    def __init__(self, name: str = "singleflight"):
+        """
+        初始化请求合并器
+
+        Args:
+            name: 名称，用于命中次数指标
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, control: TaskControl = None, **kwargs):
+        """
+        执行fn，若相同key的请求正在进行中，则等待并共享其结果
+
+        Args:
+            key: 请求键
+            fn: 实际执行的函数（其余参数原样传给fn）
+            control: 等待方的任务控制器，取消时立即停止等待并抛出TaskCancelled（不影响正在进行的请求）
+
+        Returns:
+            fn的返回值（或正在进行中的同键请求的返回值）
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            CACHE_HITS.inc(cache=f"singleflight_{self.name}")
+            if control is None:
+                return future.result()
+            while True:
+                if control.cancelled:
+                    raise TaskCancelled()
+                try:
+                    return future.result(timeout=WAIT_INTERVAL)
+                except FutureTimeout:
+                    continue
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def acquire(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, Future]]:
+        """
+        批量登记请求键，用于一次请求覆盖多个键的场景（如按批efetch）
+
+        Args:
+            keys: 请求键列表
+
+        Returns:
+            (由调用方负责执行的键列表, 其他调用方正在执行的键到Future的映射)。
+            调用方必须对返回的每个自有键调用 complete()
+        """
+        owned, owned_set, waiting = [], set(), {}
+        with self._lock:
+            for key in keys:
+                if key in waiting or key in owned_set:
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    owned.append(key)
+                    owned_set.add(key)
+                else:
+                    waiting[key] = future
+        if waiting:
+            CACHE_HITS.inc(len(waiting), cache=f"singleflight_{self.name}")
+        return owned, waiting
+
+    def complete(self, key: Hashable, result=None, error: BaseException = None):
+        """
+        发布自有键的结果，唤醒等待该键的调用方
+
+        Args:
+            key: 请求键
+            result: 结果
+            error: 异常（提供时等待方会收到该异常）
+        """
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
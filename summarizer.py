@@ -2,12 +2,83 @@
 Deepseek API总结模块 - 对文章摘要进行AI总结
 """
 
-import requests
 import time
 import sys
+import json
+import hashlib
+import threading
+from contextlib import nullcontext
 from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import config
+from task_control import TaskControl, TaskCancelled
+from singleflight import SingleFlight
+from metrics import (LLM_REQUEST_SECONDS, LLM_TOKENS, LLM_REQUESTS, RETRIES, RATE_LIMITED,
+                     LLM_PROFILE_SECONDS, LLM_PROFILE_TOKENS, LLM_COST)
+from ttl_cache import TTLCache, normalize_query
+from llm_transport import shared_transport
+from hedging import HedgePolicy
+from llm_router import Endpoint, endpoint_specs, shared_router
+from citations import render_citations, strip_references
+
+# 总结结果的占位文本
+NO_ABSTRACT = "No abstract available"
+SUMMARY_FAILED = "Summarization failed"
+
+# 进程内补全请求合并：多个任务以相同端点与密钥同时总结同一提示词时只调用一次API
+_COMPLETION_FLIGHT = SingleFlight("completion")
+
+# 进程内缓存：标准化主题 -> AI优化检索词 / 润色主题（只缓存成功的结果）
+_TOPIC_CACHE = TTLCache("topic", config.AI_TERMS_CACHE_TTL, config.CACHE_MAX_ENTRIES)
+
+# 进程内对冲策略：按(API地址, 模型)统计近期延迟并共享对冲预算
+_HEDGE_POLICIES: Dict[tuple, HedgePolicy] = {}
+_HEDGE_LOCK = threading.Lock()
+
+
+def _hedge_policy(base_url: str, model: str) -> HedgePolicy:
+    with _HEDGE_LOCK:
+        key = (base_url, model)
+        if key not in _HEDGE_POLICIES:
+            _HEDGE_POLICIES[key] = HedgePolicy()
+        return _HEDGE_POLICIES[key]
+
+
+def estimate_summary_cost(article: Dict) -> int:
+    """
+    估算单篇文章总结请求的相对耗时（提示词长度，字符数）
+
+    输出长度由提示词限定、各篇相近，请求耗时的差异主要来自标题与摘要的长度。
+
+    Args:
+        article: 文章
+
+    Returns:
+        相对耗时
+    """
+    return len(article.get("title") or "") + len(article.get("abstract") or "")
+
+
+def dispatch_order(articles: List[Dict], window: int = None) -> List[Dict]:
+    """
+    总结请求的派发顺序：开启config.SUMMARY_DISPATCH_LPT时，按原有（相关性）顺序每window篇为一组，
+    组内按估算耗时从长到短（LPT）派发。组与组之间保持相关性顺序，最相关的文章先完成，
+    按顺序写出的增量导出只需缓冲约两组文章；估算耗时相同的文章保持原有顺序
+
+    Args:
+        articles: 文章列表
+        window: 组大小，默认使用config.SUMMARY_DISPATCH_WINDOW（0时等于config.MAX_WORKERS）
+
+    Returns:
+        按派发顺序排列的新列表
+    """
+    if not config.SUMMARY_DISPATCH_LPT:
+        return list(articles)
+    window = window or config.SUMMARY_DISPATCH_WINDOW or config.MAX_WORKERS
+    ordered = []
+    for start in range(0, len(articles), window):
+        ordered.extend(sorted(articles[start:start + window], key=estimate_summary_cost, reverse=True))
+    return ordered
 
 
 def safe_print(*args, **kwargs):
@@ -21,7 +92,7 @@ def safe_print(*args, **kwargs):
 
 
 class ArticleSummarizer:
-    def __init__(self, api_key: str = None, base_url: str = None, model: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = None, hedge: bool = None):
         """
         初始化文章总结器
 
@@ -29,13 +100,28 @@ class ArticleSummarizer:
             api_key: Deepseek API密钥
             base_url: API基础URL
             model: 模型名称
+            hedge: 逐篇总结是否使用对冲请求，默认使用config.HEDGE_ENABLED
         """
         self.api_key = api_key or config.DEEPSEEK_API_KEY
         self.base_url = base_url or config.DEEPSEEK_BASE_URL
         self.model = model or config.DEEPSEEK_MODEL
-        self.session = requests.Session()
-
-    def summarize_article(self, title: str, abstract: str, pmid: str = "") -> Optional[str]:
+        self.hedge = config.HEDGE_ENABLED if hedge is None else hedge
+        # 各调用类型的模型与参数，以及本总结器的用量统计 {调用类型: {...}}
+        self.profiles = {name: self._resolve_profile(spec) for name, spec in config.MODEL_PROFILES.items()}
+        self.usage: Dict[str, Dict] = {}
+        self._usage_lock = threading.Lock()
+        # 端点路由（config.LLM_ENDPOINTS 为空时只有上面的单个端点）
+        specs = endpoint_specs(self.base_url, self.api_key)
+        self.router = shared_router(specs)
+        # 请求合并键包含实际使用的端点与密钥的摘要：不同用户的请求不共享彼此的密钥与额度
+        self._credentials = hashlib.sha256("\n".join(
+            f"{spec['base_url']} {spec.get('api_key') or self.api_key or ''}" for spec in specs
+        ).encode("utf-8")).hexdigest()
+        # 进程内共享的连接池（按并发数扩容，可选HTTP/2）
+        self.transport = shared_transport()
+
+    def summarize_article(self, title: str, abstract: str, pmid: str = "",
+                          control: TaskControl = None, attempts: int = None) -> Optional[str]:
         """
         对单篇文章进行总结
 
@@ -43,26 +129,74 @@ class ArticleSummarizer:
             title: 文章标题
             abstract: 文章摘要
             pmid: PubMed ID
+            control: 任务控制器，取消时中止进行中的请求并抛出TaskCancelled
+            attempts: 请求次数（多次时之间按指数退避等待），默认config.MAX_RETRIES
 
         Returns:
-            总结文本，如果失败返回None
+            总结文本，全部失败返回 SUMMARY_FAILED
         """
         if not abstract:
-            return "No abstract available"
+            return NO_ABSTRACT
 
         prompt = self._build_prompt(title, abstract, pmid)
+        key = hashlib.sha256(
+            f"{self.base_url}\n{self._credentials}\n{self.model_for('summary')}\n{prompt}".encode("utf-8")
+        ).hexdigest()
 
-        for attempt in range(config.MAX_RETRIES):
+        while True:
+            try:
+                return _COMPLETION_FLIGHT.do(key, self._summarize_with_retries, prompt, control, attempts,
+                                             control=control)
+            except TaskCancelled:
+                # 共享的请求被其发起任务取消、而本任务未取消时，重新发起
+                if control is not None and control.cancelled:
+                    raise
+
+    def _summarize_with_retries(self, prompt: str, control: TaskControl = None, attempts: int = None) -> str:
+        """
+        带重试地调用API生成总结
+
+        Args:
+            prompt: 提示词
+            control: 任务控制器
+            attempts: 请求次数，默认config.MAX_RETRIES
+
+        Returns:
+            总结文本，重试耗尽返回 SUMMARY_FAILED
+        """
+        attempts = attempts or config.MAX_RETRIES
+        for attempt in range(attempts):
+            if attempt:
+                RETRIES.inc(operation="summary")
+                self._backoff(2 ** (attempt - 1), control)  # 指数退避
             try:
-                response = self._call_api(prompt)
+                response = self._call_summary(prompt, control)
                 if response:
                     return response
 
+            except TaskCancelled:
+                raise
             except Exception as e:
-                safe_print(f"Summarization error (attempt {attempt + 1}/{config.MAX_RETRIES}): {e}")
-                time.sleep(2 ** attempt)  # 指数退避
+                safe_print(f"Summarization error (attempt {attempt + 1}/{attempts}): {e}")
+
+        return SUMMARY_FAILED
 
-        return "Summarization failed"
+    def _call_summary(self, prompt: str, control: TaskControl = None) -> Optional[str]:
+        """
+        逐篇总结的API调用；开启对冲时，超过近期延迟百分位仍未返回则发出一份相同请求，先返回者胜出
+
+        Args:
+            prompt: 提示词
+            control: 任务控制器
+
+        Returns:
+            API响应文本
+        """
+        if not self.hedge:
+            return self._call_api(prompt, "summary", control=control)
+        return _hedge_policy(self.base_url, self.model_for("summary")).call(
+            lambda copy_control: self._call_api(prompt, "summary", control=copy_control), control
+        )
 
     def _build_prompt(self, title: str, abstract: str, pmid: str = "") -> str:
         """
@@ -90,48 +224,214 @@ class ArticleSummarizer:
 
 请用中文回答。"""
 
-    def _call_api(self, prompt: str, timeout: int = None, max_tokens: int = None) -> Optional[str]:
+    @staticmethod
+    def _backoff(seconds: float, control: TaskControl = None):
+        """重试前等待，有任务控制器时可被取消打断"""
+        if control is not None:
+            control.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    @staticmethod
+    def _resolve_profile(spec: Dict) -> Dict:
+        spec = spec or {}
+        return {
+            "model": spec.get("model"),
+            "max_tokens": spec.get("max_tokens") or 1000,
+            "temperature": spec.get("temperature", 0.7),
+            "timeout": spec.get("timeout") or config.REQUEST_TIMEOUT,
+        }
+
+    def profile(self, name: str) -> Dict:
+        """
+        调用类型的模型参数（未配置的类型使用默认参数）
+
+        Args:
+            name: 调用类型，如 "summary"、"review"
+
+        Returns:
+            包含model/max_tokens/temperature/timeout的字典
+        """
+        return self.profiles.get(name) or self._resolve_profile({})
+
+    def model_for(self, name: str) -> str:
+        """调用类型使用的模型名"""
+        return self.profile(name)["model"] or self.model
+
+    def _record_usage(self, name: str, model: str, seconds: float, usage: Dict):
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        price = config.MODEL_PRICES.get(model) or {}
+        cost = (prompt_tokens * price.get("prompt", 0) + completion_tokens * price.get("completion", 0)) / 1e6
+
+        LLM_PROFILE_SECONDS.observe(seconds, profile=name, model=model)
+        LLM_PROFILE_TOKENS.inc(prompt_tokens, profile=name, type="prompt")
+        LLM_PROFILE_TOKENS.inc(completion_tokens, profile=name, type="completion")
+        LLM_COST.inc(cost, profile=name, model=model)
+        with self._usage_lock:
+            entry = self.usage.setdefault(name, {"model": model, "calls": 0, "seconds": 0.0, "prompt_tokens": 0,
+                                                 "completion_tokens": 0, "cost": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost"] += cost
+
+    def usage_summary(self) -> Dict[str, Dict]:
+        """
+        各调用类型的用量汇总
+
+        Returns:
+            {调用类型: {model, calls, seconds, avg_seconds, prompt_tokens, completion_tokens, cost}}
+        """
+        with self._usage_lock:
+            summary = {}
+            for name, entry in self.usage.items():
+                summary[name] = dict(entry, seconds=round(entry["seconds"], 3), cost=round(entry["cost"], 6),
+                                     avg_seconds=round(entry["seconds"] / entry["calls"], 3) if entry["calls"] else 0.0)
+            return summary
+
+    def _call_api(self, prompt: str, profile: str = "summary", control: TaskControl = None) -> Optional[str]:
         """
-        调用Deepseek API
+        调用Deepseek API（配置了多个端点时由路由器选择端点，失败时立即换用其他端点）
 
         Args:
             prompt: 提示词
-            timeout: 超时时间(秒)，默认使用配置值
-            max_tokens: 最大token数，默认使用配置值
+            profile: 调用类型，决定模型、最大token数、温度与超时（见config.MODEL_PROFILES）
+            control: 任务控制器；提供时使用流式请求，取消后在下一个数据块到达时断开连接
 
         Returns:
             API响应文本
         """
-        timeout = timeout or config.REQUEST_TIMEOUT
-        max_tokens = max_tokens or 1000
+        tried = []
+        for attempt in range(len(self.router.endpoints)):
+            if control is not None and control.cancelled:
+                raise TaskCancelled("任务已取消")
+            endpoint = self.router.acquire(exclude=tried, control=control)
+            start = time.perf_counter()
+            ok = False
+            try:
+                content = self._post(endpoint, prompt, profile, control)
+                ok = content is not None
+                if ok:
+                    return content
+            except TaskCancelled:
+                ok = None
+                raise
+            except Exception:
+                if attempt == len(self.router.endpoints) - 1:
+                    raise
+            finally:
+                self.router.release(endpoint, ok, time.perf_counter() - start)
+            tried.append(endpoint)
+            if attempt < len(self.router.endpoints) - 1:
+                safe_print(f"LLM端点 {endpoint.name} 请求失败，切换到其他端点")
+        return None
+
+    def _post(self, endpoint: Endpoint, prompt: str, profile: str, control: TaskControl = None) -> Optional[str]:
+        """
+        向指定端点发送一次补全请求
+
+        Args:
+            endpoint: 路由器选中的端点
+            prompt: 提示词
+            profile: 调用类型
+            control: 任务控制器；提供时使用流式请求
+
+        Returns:
+            API响应文本，失败返回None
+        """
+        spec = self.profile(profile)
+        # 调用类型指定的模型优先，其次是端点指定的模型
+        model = spec["model"] or endpoint.model or self.model
 
         headers = {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {endpoint.api_key or self.api_key}",
             "Content-Type": "application/json"
         }
 
         data = {
-            "model": self.model,
+            "model": model,
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.7,
-            "max_tokens": max_tokens
+            "temperature": spec["temperature"],
+            "max_tokens": spec["max_tokens"]
         }
+        streaming = control is not None
+        if streaming:
+            data["stream"] = True
+            data["stream_options"] = {"include_usage": True}
+
+        start = time.perf_counter()
+        outcome = "error"
+        usage = {}
+        try:
+            response = self.transport.post(
+                f"{endpoint.base_url}/chat/completions",
+                headers=headers,
+                json=data,
+                timeout=spec["timeout"],
+                stream=streaming
+            )
+            LLM_REQUESTS.inc(status=response.status_code)
+
+            if response.status_code == 200:
+                if streaming:
+                    content, usage = self._read_stream(response, control)
+                else:
+                    result = response.json()
+                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                    usage = result.get("usage") or {}
+                LLM_TOKENS.inc(usage.get("prompt_tokens", 0), type="prompt")
+                LLM_TOKENS.inc(usage.get("completion_tokens", 0), type="completion")
+                outcome = "ok"
+                return content
+            else:
+                if response.status_code == 429:
+                    RATE_LIMITED.inc(service="llm")
+                    outcome = "rate_limited"
+                safe_print(f"API error: {response.status_code} - {response.text}")
+                return None
+        except TaskCancelled:
+            outcome = "cancelled"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            LLM_REQUEST_SECONDS.observe(elapsed, outcome=outcome)
+            self._record_usage(profile, model, elapsed, usage)
+
+    @staticmethod
+    def _read_stream(response, control: TaskControl) -> tuple:
+        """
+        读取SSE流式响应，每个数据块检查一次取消信号
 
-        response = self.session.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=timeout
-        )
+        Args:
+            response: 流式响应对象
+            control: 任务控制器
 
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "")
-        else:
-            safe_print(f"API error: {response.status_code} - {response.text}")
-            return None
+        Returns:
+            (拼接后的完整文本, token用量字典)
+        """
+        parts = []
+        usage = {}
+        try:
+            for line in response.iter_lines():
+                if control.cancelled:
+                    raise TaskCancelled("任务已取消")
+                if not line.startswith(b"data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == b"[DONE]":
+                    break
+                chunk = json.loads(payload.decode("utf-8"))
+                usage = chunk.get("usage") or usage
+                delta = (chunk.get("choices") or [{}])[0].get("delta", {})
+                parts.append(delta.get("content") or "")
+        finally:
+            # 取消时关闭响应即断开连接，服务端随之停止生成
+            response.close()
+        return "".join(parts), usage
 
     def optimize_search_terms(self, user_topic: str) -> List[str]:
         """
@@ -143,6 +443,12 @@ class ArticleSummarizer:
         Returns:
             优化后的搜索词列表
         """
+        cache_key = ("optimize_terms", self.base_url, self.model_for("optimize_terms"), normalize_query(user_topic))
+        cached = _TOPIC_CACHE.get(cache_key)
+        if cached is not None:
+            safe_print("使用缓存的优化检索词")
+            return list(cached)
+
         prompt = f"""用户想要搜索关于「{user_topic}」的学术文献。
 
 请根据PubMed医学文献数据库的检索规则，生成5-10个优化的检索词。
@@ -165,8 +471,10 @@ ESCC AND immune checkpoint
 请输出优化后的检索词列表："""
 
         for attempt in range(config.MAX_RETRIES):
+            if attempt:
+                RETRIES.inc(operation="optimize_terms")
             try:
-                response = self._call_api(prompt)
+                response = self._call_api(prompt, "optimize_terms")
                 if response:
                     # 解析返回的检索词
                     terms = []
@@ -175,7 +483,10 @@ ESCC AND immune checkpoint
                         # 过滤掉空行和编号
                         if line and not line.startswith(('#', '1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '10.')):
                             terms.append(line)
-                    return terms[:10]  # 最多返回10个
+                    terms = terms[:10]  # 最多返回10个
+                    if terms:
+                        _TOPIC_CACHE.set(cache_key, tuple(terms))
+                    return terms
 
             except Exception as e:
                 safe_print(f"优化检索词错误 (attempt {attempt + 1}/{config.MAX_RETRIES}): {e}")
@@ -194,6 +505,11 @@ ESCC AND immune checkpoint
         Returns:
             润色后的搜索主题
         """
+        cache_key = ("polish_topic", self.base_url, self.model_for("polish_topic"), normalize_query(user_topic))
+        cached = _TOPIC_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
         prompt = f"""请将以下搜索主题润色为更适合生成学术文献综述的表述。
 
 原始主题: {user_topic}
@@ -212,13 +528,17 @@ ESCC AND immune checkpoint
 请润色以下主题："""
 
         for attempt in range(config.MAX_RETRIES):
+            if attempt:
+                RETRIES.inc(operation="polish_topic")
             try:
-                response = self._call_api(prompt, timeout=60, max_tokens=500)
+                response = self._call_api(prompt, "polish_topic")
                 if response:
                     # 清理返回的内容
                     polished = response.strip()
                     # 移除可能的引号
                     polished = polished.strip('"\'「」')
+                    if polished:
+                        _TOPIC_CACHE.set(cache_key, polished)
                     return polished
 
             except Exception as e:
@@ -228,70 +548,180 @@ ESCC AND immune checkpoint
         # 如果失败，返回原始主题
         return user_topic
 
-    def _summarize_single_article(self, article: Dict) -> Dict:
+    def _summarize_single_article(self, article: Dict, control: TaskControl = None) -> Dict:
         """
         总结单篇文章（线程安全）
 
         Args:
             article: 文章字典
+            control: 任务控制器
 
         Returns:
             添加了summary的文章字典
         """
         title = article.get('title', '')[:50]
+        # 批量总结时每次派发只请求一次，失败的文章由summarize_articles延迟重试
         summary = self.summarize_article(
             title=article.get("title", ""),
             abstract=article.get("abstract", ""),
-            pmid=article.get("pmid", "")
+            pmid=article.get("pmid", ""),
+            control=control,
+            attempts=1
         )
         article["summary"] = summary
         return article
 
-    def summarize_articles(self, articles: List[Dict], max_workers: int = None, progress_callback=None) -> List[Dict]:
+    def summarize_articles(self, articles: List[Dict], max_workers: int = None, progress_callback=None,
+                           control: TaskControl = None, executor: ThreadPoolExecutor = None,
+                           stats: Dict = None) -> List[Dict]:
         """
         批量总结文章（多线程并发）
 
+        请求按需派发，在途请求数不超过线程数：暂停时停止派发新请求，
+        取消时丢弃未派发的文章、中止在途请求并抛出TaskCancelled。
+        首轮每篇只请求一次，失败的文章进入延迟重试队列，待其余文章完成后
+        以较低并发、逐轮加长的退避间隔重试，线程不会因等待重试而空闲。
+        请求按 dispatch_order 派发（默认在每max_workers篇的相关性窗口内估算耗时长的先派发）；
+        无摘要的文章直接标记，不占用线程池。
+
         Args:
             articles: 文章列表
             max_workers: 最大并发线程数
-            progress_callback: 每完成一篇文章时的回调函数，签名为 callback(article, completed, total)
+            progress_callback: 每完成一篇文章时的回调函数，签名为 callback(article, completed, total)；
+                进入重试队列的文章在最终成功或放弃时才回调
+            control: 任务控制器
+            executor: 共享线程池（多个任务共用时总并发由线程池大小限制，调用方需自行登记连接池并发），默认新建
+            stats: 可选，写入重试统计 {"retried": 进入重试的篇数, "recovered": 重试成功的篇数,
+                "failed": 最终失败的PMID列表}
 
         Returns:
-            添加了总结的文章列表
+            添加了总结的文章列表（顺序不变，最终失败的文章总结为 SUMMARY_FAILED）
         """
         max_workers = max_workers or config.MAX_WORKERS
+        window = config.SUMMARY_DISPATCH_WINDOW or max_workers
         total = len(articles)
         safe_print(f"\nSummarizing {total} articles with {max_workers} threads...")
 
-        # 使用ThreadPoolExecutor进行并发总结
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_article = {
-                executor.submit(self._summarize_single_article, article): article
-                for article in articles
-            }
-
-            # 收集结果
-            completed = 0
-            for future in as_completed(future_to_article):
-                completed += 1
-                article = future_to_article[future]
-                try:
-                    future.result()
-                except Exception as e:
-                    safe_print(f"Error summarizing article: {e}")
+        completed = 0
+        deferred = []
+        jobs = []
+
+        def finish(article):
+            nonlocal completed
+            completed += 1
+            # 显示进度
+            title = article.get('title', '')[:30]
+            safe_print(f"[{completed}/{total}] {title}...")
+
+            # 调用进度回调
+            if progress_callback:
+                progress_callback(article, completed, total)
 
-                # 显示进度
-                title = article.get('title', '')[:30]
-                safe_print(f"[{completed}/{total}] {title}...")
+        def collect(article):
+            if article.get("summary") in (None, SUMMARY_FAILED):
+                deferred.append(article)
+            else:
+                finish(article)
 
-                # 调用进度回调
-                if progress_callback:
-                    progress_callback(article, completed, total)
+        # 无摘要的文章不需要请求API
+        for article in articles:
+            if article.get("abstract"):
+                jobs.append(article)
+            else:
+                article["summary"] = NO_ABSTRACT
+                finish(article)
+
+        # 自建线程池时登记本次并发数（共享连接池不足时扩容）；共享线程池的并发由其创建者登记
+        shared_executor = executor is not None
+        with nullcontext() if shared_executor else self.transport.reserve(max_workers):
+            if not shared_executor:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                self._dispatch(dispatch_order(jobs, window), max_workers, executor, control, collect)
+
+                # 延迟重试：较低并发，每轮之前按指数退避等待
+                retried = len(deferred)
+                retry_workers = max(1, min(config.SUMMARY_RETRY_WORKERS, max_workers))
+                for round_index in range(config.SUMMARY_RETRY_ROUNDS):
+                    if not deferred:
+                        break
+                    batch, deferred = deferred, []
+                    wait_time = min(config.SUMMARY_RETRY_BACKOFF * 2 ** round_index, 60)
+                    safe_print(f"重试 {len(batch)} 篇总结失败的文章（第 {round_index + 1}/{config.SUMMARY_RETRY_ROUNDS} 轮，"
+                               f"{wait_time:.0f} 秒后开始）...")
+                    self._backoff(wait_time, control)
+                    RETRIES.inc(len(batch), operation="summary")
+                    self._dispatch(dispatch_order(batch, window), retry_workers, executor, control, collect)
+            finally:
+                if not shared_executor:
+                    # 正常结束时所有请求均已完成；取消时不等待在途请求，它们会在下一个数据块到达时自行中止
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+        for article in deferred:
+            article["summary"] = SUMMARY_FAILED
+            finish(article)
+        if stats is not None:
+            stats.update(retried=retried, recovered=retried - len(deferred),
+                         failed=[article.get("pmid") or article.get("title", "")[:40] for article in deferred])
+        if deferred:
+            rounds = f"（已重试 {config.SUMMARY_RETRY_ROUNDS} 轮）" if config.SUMMARY_RETRY_ROUNDS else ""
+            safe_print(f"{len(deferred)} 篇文章总结失败{rounds}")
 
         safe_print(f"Completed summarization of {total} articles")
         return articles
 
+    def _dispatch(self, articles: List[Dict], max_workers: int, executor: ThreadPoolExecutor,
+                  control: TaskControl, on_done):
+        """
+        按需派发一组总结请求，在途请求数不超过max_workers
+
+        Args:
+            articles: 文章列表
+            max_workers: 最大在途请求数
+            executor: 线程池
+            control: 任务控制器
+            on_done: 每篇文章完成（无论成败）后的回调，参数为文章
+        """
+        pending = {}
+        remaining = iter(articles)
+        exhausted = False
+        try:
+            while True:
+                if control is not None and control.cancelled:
+                    raise TaskCancelled("任务已取消")
+
+                # 派发：每次派发前检查暂停状态
+                while not exhausted and len(pending) < max_workers and not (control and control.paused):
+                    article = next(remaining, None)
+                    if article is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(self._summarize_single_article, article, control)
+                    pending[future] = article
+
+                if not pending:
+                    if exhausted:
+                        break
+                    # 暂停中且没有在途请求，等待恢复或取消
+                    control.wait_running(0.2)
+                    continue
+
+                # 收集结果（暂停期间仍会收集在途请求的结果）
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    article = pending.pop(future)
+                    try:
+                        future.result()
+                    except TaskCancelled:
+                        raise
+                    except Exception as e:
+                        safe_print(f"Error summarizing article: {e}")
+                    on_done(article)
+        finally:
+            # 撤回尚未开始的请求（共享线程池不关闭，不影响其他任务）
+            for future in pending:
+                future.cancel()
+
     def generate_overall_summary(self, articles: List[Dict]) -> str:
         """
         生成整体总结报告
@@ -337,15 +767,24 @@ ESCC AND immune checkpoint
 
         return summary
 
-    def generate_literature_review(self, articles: List[Dict], search_topic: str, start_date: str, end_date: str) -> str:
+    def generate_literature_review(self, articles: List[Dict], search_topic: str, start_date: str, end_date: str,
+                                   control: TaskControl = None, citation_style: str = None,
+                                   parallel: bool = None) -> str:
         """
         生成带引用的文献综述
 
+        模型只在正文中输出 [n] 形式的编号引用，参考文献列表由 render_citations 根据文章元数据在本地生成。
+        分章节模式下先生成大纲，再并发撰写各章节后拼接，耗时约为大纲加最长的一个章节；
+        大纲或任一章节失败时改为整篇生成。
+
         Args:
             articles: 文章列表
             search_topic: 搜索主题
             start_date: 搜索开始日期
             end_date: 搜索结束日期
+            control: 任务控制器，取消时中止生成并抛出TaskCancelled
+            citation_style: 引用格式（见 citations.CITATION_STYLES），默认使用config.REVIEW_CITATION_STYLE
+            parallel: 是否分章节并发生成，默认使用config.REVIEW_PARALLEL
 
         Returns:
             文献综述文本
@@ -355,23 +794,19 @@ ESCC AND immune checkpoint
 
         safe_print("\n正在生成文献综述...")
 
-        # 准备文章信息用于生成综述（优化：减少摘要长度）
-        articles_info = []
-        for i, article in enumerate(articles):
-            # 只取摘要前200字符，避免prompt过长
-            abstract = article.get('abstract', '')[:200]
-            summary = article.get('summary', '')
-
-            info = f"""文献 {i+1}:
-- 标题: {article.get('title', '')}
-- 作者: {article.get('authors', '')}
-- 期刊: {article.get('journal', '')}
-- 发表日期: {article.get('pub_date', '')}
-- DOI: {article.get('doi', '')}
-- 摘要: {abstract}"""
-            articles_info.append(info)
+        parallel = config.REVIEW_PARALLEL if parallel is None else parallel
+        if parallel and len(articles) >= config.REVIEW_PARALLEL_MIN_ARTICLES:
+            try:
+                review = self._generate_sectioned_review(articles, search_topic, start_date, end_date, control)
+            except TaskCancelled:
+                raise
+            except Exception as e:
+                safe_print(f"分章节生成文献综述失败，改为整篇生成: {e}")
+            else:
+                safe_print("文献综述生成完成")
+                return render_citations(review, articles, citation_style)
 
-        articles_text = "\n---\n".join(articles_info)
+        articles_text = self._review_articles_text(articles)
 
         prompt = f"""请基于以下{len(articles)}篇关于「{search_topic}」的学术论文，生成一篇结构化的文献综述。
 
@@ -388,43 +823,245 @@ ESCC AND immune checkpoint
 基于我给你的相关文献材料，如果必要可以用你的知识库进行补充
 我的背景： 我是一名生物医学领域的研究生/科研人员，需要一篇逻辑严密、引用规范的综述草稿。
 请根据以下大纲和要求进行写作：
-1.	结构要求： 请包含摘要、引言、主体部分（分3-4个小标题）、讨论与展望、参考文献。
+1.	结构要求： 请包含摘要、引言、主体部分（分3-4个小标题）、讨论与展望。参考文献列表会根据文献信息自动生成，无需撰写。
 2.	核心观点： 主体部分需要重点讨论相关观点，聚焦于相关的参考文献材料凝聚成核心论点。
 3.	语言风格： 请模仿《Nature Reviews Cancer》综述文章的语言风格和段落长度，语言要高度精炼，使用正式、客观的学术语言，句子结构保持简洁清晰，避免过度冗长。
-4.	文献引用： 请用规范格式标注参考文献，第一次在正文出现相关引用文献时，请按照正规文献格式做好标注
+4.	文献引用： 正文引用文献时只标注方括号编号，如 [3] 或 [2, 5]，编号即上方文章列表中的序号；不要写出作者、期刊、年份或DOI
 
 请用中文撰写，确保专业性和学术性。"""
 
-        # 优化：增加超时时间和token数量
-        review_timeout = 120  # 120秒超时
-        review_max_tokens = 8192  # 文献综述需要更多token，Deepseek最大是8192
+        # 文献综述需要更长的超时与更多token（见config.MODEL_PROFILES["review"]）
+        response = self._review_call(prompt, "review", control, "文献综述")
+        if response:
+            safe_print("文献综述生成完成")
+            return render_citations(response, articles, citation_style)
+
+        # 如果失败，返回基本信息
+        return f"""# {search_topic} 文献综述
+
+## 概述
+本综述涵盖了在{start_date}至{end_date}期间发表的{len(articles)}篇关于{search_topic}的学术论文。
+
+## 统计信息
+- 总文章数: {len(articles)} 篇
 
+## 期刊分布
+"""
+
+    @staticmethod
+    def _review_articles_text(articles: List[Dict]) -> str:
+        """综述提示词中的文章列表（编号即引用序号；作者与DOI只用于本地生成的参考文献，不放入提示词）"""
+        articles_info = []
+        for i, article in enumerate(articles):
+            # 只取摘要前200字符，避免prompt过长
+            abstract = article.get('abstract', '')[:200]
+
+            info = f"""[{i+1}] {article.get('title', '')}
+- 期刊: {article.get('journal', '')}（{article.get('pub_date', '')}）
+- 摘要: {abstract}"""
+            if article.get('duplicate_pmids'):
+                info += f"\n- 重复/相近版本PMID: {article['duplicate_pmids']}"
+            articles_info.append(info)
+
+        return "\n---\n".join(articles_info)
+
+    def _review_call(self, prompt: str, profile: str, control: TaskControl = None, label: str = "文献综述") -> Optional[str]:
+        """
+        带重试地调用API生成综述（或其大纲、章节）
+
+        Args:
+            prompt: 提示词
+            profile: 调用类型（见config.MODEL_PROFILES）
+            control: 任务控制器
+            label: 日志中的名称
+
+        Returns:
+            响应文本，重试耗尽返回None
+        """
         for attempt in range(config.MAX_RETRIES):
+            if attempt:
+                RETRIES.inc(operation="review")
             try:
-                safe_print(f"正在生成文献综述 (尝试 {attempt + 1}/{config.MAX_RETRIES})...")
-                response = self._call_api(prompt, timeout=review_timeout, max_tokens=review_max_tokens)
+                safe_print(f"正在生成{label} (尝试 {attempt + 1}/{config.MAX_RETRIES})...")
+                response = self._call_api(prompt, profile, control=control)
                 if response:
-                    safe_print("文献综述生成完成")
                     return response
 
+            except TaskCancelled:
+                raise
             except Exception as e:
-                safe_print(f"生成文献综述错误 (尝试 {attempt + 1}/{config.MAX_RETRIES}): {e}")
+                safe_print(f"生成{label}错误 (尝试 {attempt + 1}/{config.MAX_RETRIES}): {e}")
                 # 指数退避等待
                 wait_time = min(2 ** attempt * 2, 30)  # 最多等待30秒
                 safe_print(f"等待 {wait_time} 秒后重试...")
-                time.sleep(wait_time)
+                self._backoff(wait_time, control)
+        return None
 
-        # 如果失败，返回基本信息
-        return f"""# {search_topic} 文献综述
+    @staticmethod
+    def _parse_outline(text: str, count: int) -> Dict:
+        """
+        解析模型返回的JSON大纲，丢弃超出范围的文献编号与没有文献的小节
 
-## 概述
-本综述涵盖了在{start_date}至{end_date}期间发表的{len(articles)}篇关于{search_topic}的学术论文。
+        Args:
+            text: 模型响应
+            count: 文章数
 
-## 统计信息
-- 总文章数: {len(articles)} 篇
+        Returns:
+            {"title", "introduction", "sections": [{"heading", "focus", "articles"}], "outlook"}
 
-## 期刊分布
-"""
+        Raises:
+            ValueError: 无法解析或没有可用的小节
+        """
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("大纲不是JSON")
+        outline = json.loads(text[start:end + 1])
+
+        def ids(values):
+            result = []
+            for value in values or []:
+                try:
+                    number = int(value)
+                except (TypeError, ValueError):
+                    continue
+                if 1 <= number <= count and number not in result:
+                    result.append(number)
+            return result
+
+        sections = []
+        for section in outline.get("sections") or []:
+            if isinstance(section, dict) and section.get("heading") and ids(section.get("articles")):
+                sections.append({"heading": str(section["heading"]).strip(),
+                                 "focus": str(section.get("focus") or "").strip(),
+                                 "articles": ids(section.get("articles"))})
+        if not sections:
+            raise ValueError("大纲中没有可用的小节")
+        return {"title": str(outline.get("title") or "").strip(), "introduction": ids(outline.get("introduction")),
+                "sections": sections[:config.REVIEW_MAX_SECTIONS], "outlook": ids(outline.get("outlook"))}
+
+    def _generate_sectioned_review(self, articles: List[Dict], search_topic: str, start_date: str, end_date: str,
+                                   control: TaskControl = None) -> str:
+        """
+        分章节生成文献综述：先生成大纲并为各小节分配文献，再并发撰写摘要、引言、主体各小节与讨论展望，
+        每个章节只带入分配给它的文章总结
+
+        Args:
+            articles: 文章列表
+            search_topic: 搜索主题
+            start_date: 搜索开始日期
+            end_date: 搜索结束日期
+            control: 任务控制器
+
+        Returns:
+            拼接后的综述正文（引用为 [n] 编号，尚未生成参考文献）
+
+        Raises:
+            RuntimeError: 大纲或任一章节生成失败
+            ValueError: 大纲无法解析
+        """
+        outline_prompt = f"""请为一篇关于「{search_topic}」的文献综述拟定综述大纲，基于以下{len(articles)}篇论文（时间范围 {start_date} 至 {end_date}）。
+
+## 文章列表
+{self._review_articles_text(articles)}
+
+## 要求
+1. 主体部分分3-4个小节，每个小节给出标题、核心论点，并分配与之最相关的文献编号（每个小节不超过15篇，每篇文献最多分配到一个小节）
+2. 另外为引言与讨论展望各选出不超过8篇最具代表性的文献
+3. 只输出JSON，不要输出其他内容，格式如下:
+{{"title": "综述标题", "introduction": [1, 2], "sections": [{{"heading": "小节标题", "focus": "核心论点", "articles": [3, 4, 5]}}], "outlook": [6, 7]}}
+
+请用中文撰写标题与论点。"""
+        response = self._review_call(outline_prompt, "review_outline", control, "综述大纲")
+        if not response:
+            raise RuntimeError("综述大纲生成失败")
+        outline = self._parse_outline(response, len(articles))
+        title = outline["title"] or f"{search_topic}研究进展"
+
+        # 章节 (标题, 任务说明, 文献编号)；摘要只依据大纲，不带入文献
+        n = len(outline["sections"])
+        parts = [("摘要", "撰写综述的摘要（200-300字），概括研究背景、各小节的核心论点与未来方向", [])]
+        parts.append(("1. 引言", "撰写引言：介绍研究背景与意义，引出主体各小节讨论的问题", outline["introduction"]))
+        for i, section in enumerate(outline["sections"], 2):
+            task = f"撰写主体小节「{section['heading']}」：围绕核心论点综合比较相关文献的发现，形成有条理的论述"
+            if section["focus"]:
+                task += f"。核心论点: {section['focus']}"
+            parts.append((f"{i}. {section['heading']}", task, section["articles"]))
+        parts.append((f"{n + 2}. 讨论与展望", "撰写讨论与展望：总结各小节的主要结论，指出当前研究的局限与未来研究方向",
+                      outline["outlook"]))
+
+        outline_text = "\n".join(f"- {heading}" for heading, _, _ in parts[1:])
+        prompts = [self._section_prompt(search_topic, start_date, end_date, title, outline_text, heading, task,
+                                        [(number, articles[number - 1]) for number in numbers])
+                   for heading, task, numbers in parts]
+        safe_print(f"综述大纲: {n} 个主体小节，并发撰写 {len(parts)} 个章节...")
+
+        # 每个章节使用子控制器，某一章节失败时取消其余章节
+        control = control or TaskControl()
+        children = [control.child() for _ in parts]
+        texts = []
+        with self.transport.reserve(len(parts)), \
+                ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="review") as pool:
+            futures = [pool.submit(self._review_call, prompt, "review_section", child, f"综述章节「{heading}」")
+                       for prompt, child, (heading, _, _) in zip(prompts, children, parts)]
+            try:
+                for (heading, _, _), future in zip(parts, futures):
+                    text = future.result()
+                    if not text:
+                        raise RuntimeError(f"综述章节「{heading}」生成失败")
+                    texts.append(self._clean_section(text))
+            except BaseException:
+                for child in children:
+                    child.cancel()
+                raise
+
+        sections = [f"## {heading}\n\n{text}" for (heading, _, _), text in zip(parts, texts)]
+        return f"# {title}\n\n" + "\n\n".join(sections)
+
+    @staticmethod
+    def _section_prompt(search_topic: str, start_date: str, end_date: str, title: str, outline_text: str,
+                        heading: str, task: str, cited: List[tuple]) -> str:
+        """单个章节的提示词：全文大纲用于衔接上下文，只带入分配给该章节的文章总结"""
+        if cited:
+            infos = []
+            for number, article in cited:
+                summary = article.get('summary') or ''
+                if summary in (SUMMARY_FAILED, NO_ABSTRACT):
+                    summary = ''
+                infos.append(f"[{number}] {article.get('title', '')}（{article.get('journal', '')}，"
+                             f"{article.get('pub_date', '')}）\n{summary or article.get('abstract', '')[:300]}")
+            articles_text = "\n---\n".join(infos)
+        else:
+            articles_text = "（本章节依据大纲撰写，不需要引用文献）"
+
+        return f"""你正在与其他作者分工撰写一篇关于「{search_topic}」的文献综述（时间范围 {start_date} 至 {end_date}），准备投稿给SCI期刊。
+本次只撰写综述章节「{heading}」，其他章节由其他作者同时撰写。
+
+## 综述标题
+{title}
+
+## 全文大纲
+{outline_text}
+
+## 本章节任务
+{task}
+
+## 相关文献
+{articles_text}
+
+## 写作要求
+1.	语言风格： 请模仿《Nature Reviews Cancer》综述文章的语言风格和段落长度，语言要高度精炼，使用正式、客观的学术语言，句子结构保持简洁清晰，避免过度冗长。
+2.	文献引用： 正文引用文献时只标注方括号编号，如 [3] 或 [2, 5]，编号即上方文献的序号；不要写出作者、期刊、年份或DOI
+3.	只输出本章节正文，不要输出章节标题，不要撰写参考文献，不要重复其他章节的内容
+
+请用中文撰写，确保专业性和学术性。"""
+
+    @staticmethod
+    def _clean_section(text: str) -> str:
+        """去掉章节开头模型自行添加的标题与末尾的参考文献"""
+        lines = strip_references(text).strip().splitlines()
+        while lines and (lines[0].startswith("#") or not lines[0].strip()):
+            lines.pop(0)
+        return "\n".join(lines).strip()
 
 
 
@@ -0,0 +1,120 @@
+"""
+任务控制模块 - 基于threading.Event的暂停/取消信号
+"""
+
+import threading
+import weakref
+
+
+class TaskCancelled(Exception):
+    """任务已被取消"""
+
+
+class TaskControl:
+    def __init__(self):
+        """初始化任务控制器（初始为运行状态）"""
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        # 子控制器（弱引用，副本结束后自动移除），暂停/恢复/取消会传递给它们
+        self._children = weakref.WeakSet()
+        self._children_lock = threading.Lock()
+
+    def _each_child(self):
+        with self._children_lock:
+            return list(self._children)
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self):
+        """暂停：阻止后续请求的派发，已在进行中的请求不受影响"""
+        if not self.cancelled:
+            self._running.clear()
+        for child in self._each_child():
+            child.pause()
+
+    def resume(self):
+        """恢复运行"""
+        self._running.set()
+        for child in self._each_child():
+            child.resume()
+
+    def cancel(self):
+        """取消：唤醒所有等待者，并使进行中的请求尽快中止"""
+        self._cancelled.set()
+        self._running.set()
+        for child in self._each_child():
+            child.cancel()
+
+    def sync(self, paused: bool, cancelled: bool):
+        """
+        根据外部存储中的状态同步信号（用于跨进程传递暂停/取消）
+
+        Args:
+            paused: 是否暂停
+            cancelled: 是否取消
+        """
+        if cancelled:
+            self.cancel()
+        elif paused:
+            self.pause()
+        else:
+            self.resume()
+
+    def wait_running(self, timeout: float = None) -> bool:
+        """
+        等待直到处于运行状态（未暂停）
+
+        Args:
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            是否处于运行状态
+        """
+        return self._running.wait(timeout)
+
+    def check(self):
+        """
+        检查点：暂停时阻塞直到恢复，取消时抛出TaskCancelled
+        """
+        self._running.wait()
+        if self.cancelled:
+            raise TaskCancelled("任务已取消")
+
+    def child(self) -> "TaskControl":
+        """
+        派生子控制器：父控制器的暂停、恢复与取消会传递给子控制器，子控制器可单独取消
+        （用于撤销同一请求的多个副本中较慢的一方）
+
+        Returns:
+            子控制器
+        """
+        child = _ChildControl()
+        with self._children_lock:
+            self._children.add(child)
+        # 登记后再同步当前状态，与并发的暂停/取消无论先后都不会遗漏
+        if self.cancelled:
+            child.cancel()
+        elif self.paused:
+            child.pause()
+        return child
+
+    def sleep(self, seconds: float):
+        """
+        可被取消打断的等待
+
+        Args:
+            seconds: 等待时间(秒)
+        """
+        if self._cancelled.wait(seconds):
+            raise TaskCancelled("任务已取消")
+
+
+class _ChildControl(TaskControl):
+    """由 TaskControl.child() 创建，状态由父控制器推送"""
@@ -0,0 +1,11 @@
+"""
+测试公共配置 - 将项目根目录与web目录加入模块搜索路径（与 web/app.py 的导入方式一致）
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "web")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,68 @@
+"""
+引用排版测试 - 编号标记解析、重新编号与参考文献格式
+"""
+
+from citations import _compress, _marker_ids, format_reference, render_citations, strip_references
+
+ARTICLES = [
+    {"authors": "John Smith; Ann Lee", "title": "First study.", "journal": "Nature", "pub_date": "2024 Jan",
+     "doi": "10.1/a", "pmid": "11"},
+    {"authors": "", "title": "Anonymous editorial", "journal": "Lancet", "pub_date": "2023"},
+    {"authors": "Mary-Jane Watson", "title": "Third", "journal": "Cell", "pub_date": ""},
+]
+
+
+def test_marker_ids_parse_lists_and_ranges():
+    assert _marker_ids("1, 3", 3) == [1, 3]
+    assert _marker_ids("1-3", 3) == [1, 2, 3]
+    assert _marker_ids("3，1；3", 3) == [3, 1]
+    assert _marker_ids("2–3", 3) == [2, 3]
+
+
+def test_marker_ids_reject_out_of_range_numbers():
+    assert _marker_ids("2025", 3) == []
+    assert _marker_ids("0", 3) == []
+    assert _marker_ids("2, 7", 3) == []
+    assert _marker_ids("1-9", 3) == []
+
+
+def test_compress_collapses_runs():
+    assert _compress([5, 1, 2, 3]) == "1-3, 5"
+    assert _compress([1, 2]) == "1, 2"
+    assert _compress([4]) == "4"
+
+
+def test_numbered_style_renumbers_by_first_citation():
+    text = render_citations("A [3]. B [1, 3]. C [1-3].", ARTICLES, "vancouver")
+    body, references = text.split("## 参考文献")
+    assert body.strip() == "A [1]. B [1, 2]. C [1-3]."
+    lines = references.strip().splitlines()
+    assert lines[0].startswith("1. Watson MJ. Third. Cell.")
+    assert lines[1] == "2. Smith J, Lee A. First study. Nature. 2024. doi:10.1/a PMID: 11"
+
+
+def test_unresolved_markers_are_left_unchanged():
+    text = "In [2025] and [0], see [1](http://x) and [2, 9]."
+    assert render_citations(text, ARTICLES, "nature") == text
+
+
+def test_apa_in_text_and_sorted_references():
+    text = render_citations("See [1] and [2].", ARTICLES, "apa")
+    assert text.startswith("See (Smith & Lee, 2024) and (Anonymous editorial, 2023).")
+    references = text.split("## 参考文献")[1].strip().split("\n\n")
+    assert references == [
+        "Anonymous editorial. (2023). *Lancet*.",
+        "Smith, J., & Lee, A. (2024). First study. *Nature*. https://doi.org/10.1/a",
+    ]
+
+
+def test_apa_without_authors_leads_with_title():
+    assert format_reference(ARTICLES[1], "apa") == "Anonymous editorial. (2023). *Lancet*."
+
+
+def test_model_written_references_are_replaced():
+    text = "Body [1].\n\n## References\n1. Made up reference"
+    assert strip_references(text) == "Body [1].\n\n"
+    rendered = render_citations(text, ARTICLES, "nature")
+    assert "Made up" not in rendered
+    assert rendered.endswith("1. Smith, J. & Lee, A. First study. *Nature* (2024). https://doi.org/10.1/a\n")
@@ -0,0 +1,49 @@
+"""
+近重复合并测试
+"""
+
+from dedup import NearDuplicateDetector, collapse_duplicates
+
+ABSTRACT = ("Background: Chronic kidney disease affects a large share of adults with type 2 diabetes. "
+            "Methods: We enrolled 1200 patients in a randomized trial of a sodium glucose cotransporter "
+            "inhibitor versus placebo and followed them for three years. Results: The inhibitor reduced the "
+            "composite renal outcome by 30 percent and slowed the decline in estimated filtration rate. "
+            "Conclusions: Early treatment preserves kidney function in this population.")
+OTHER = ("We sequenced tumour samples from 85 children with medulloblastoma and identified recurrent "
+         "mutations in chromatin remodelling genes that define a distinct molecular subgroup with poor "
+         "survival, suggesting new targets for risk stratified therapy in paediatric brain tumours.")
+
+
+def _article(pmid, title="Title", abstract=""):
+    return {"pmid": pmid, "title": title, "abstract": abstract}
+
+
+def test_identical_abstracts_collapse_to_first():
+    articles = [_article("1", abstract=ABSTRACT), _article("2", abstract=OTHER), _article("3", abstract=ABSTRACT)]
+    result = collapse_duplicates(articles)
+    assert [a["pmid"] for a in result] == ["1", "2"]
+    assert result[0]["duplicate_pmids"] == "3"
+    assert "duplicate_pmids" not in result[1]
+
+
+def test_near_duplicate_abstract_collapses():
+    edited = ABSTRACT.replace("three years", "3 years")
+    roots = NearDuplicateDetector(threshold=0.7).cluster([_article("1", abstract=ABSTRACT),
+                                                          _article("2", abstract=edited)])
+    assert roots == [0, 0]
+
+
+def test_articles_without_abstract_are_never_merged():
+    articles = [_article("1", "Correction"), _article("2", "Correction"),
+                _article("3", "Erratum."), _article("4", "Erratum.")]
+    assert [a["pmid"] for a in collapse_duplicates(articles)] == ["1", "2", "3", "4"]
+
+
+def test_short_abstracts_are_never_merged():
+    articles = [_article("1", abstract="No abstract available."), _article("2", abstract="No abstract available.")]
+    assert len(collapse_duplicates(articles)) == 2
+
+
+def test_min_shingles_can_be_disabled():
+    articles = [_article("1", abstract="Short identical text"), _article("2", abstract="Short identical text")]
+    assert NearDuplicateDetector(min_shingles=0).cluster(articles) == [0, 0]
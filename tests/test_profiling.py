@@ -0,0 +1,18 @@
+"""
+性能分析器测试 - 进程内同一时间只分析一个任务
+"""
+
+import pytest
+
+from profiling import TaskProfiler, ProfilerBusy
+
+
+def test_second_profiler_fails_fast_while_first_is_active():
+    with TaskProfiler("cprofile"):
+        with pytest.raises(ProfilerBusy):
+            with TaskProfiler("sampling"):
+                pass
+    # 第一个分析器结束后可再次分析
+    with TaskProfiler("sampling") as profiler:
+        sum(range(1000))
+    assert profiler.elapsed > 0
@@ -0,0 +1,118 @@
+"""
+请求合并测试 - 同键共享结果、等待方取消，以及总结请求的合并键
+"""
+
+import threading
+import time
+
+import pytest
+
+import summarizer
+from singleflight import SingleFlight
+from summarizer import ArticleSummarizer
+from task_control import TaskControl, TaskCancelled
+
+
+def _slow(release: threading.Event, calls: list, value):
+    def fn():
+        calls.append(value)
+        release.wait(5)
+        return value
+    return fn
+
+
+def _run_concurrently(*targets):
+    results = [None] * len(targets)
+
+    def run(i, target):
+        try:
+            results[i] = target()
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, t)) for i, t in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    return threads, results
+
+
+def test_followers_share_leader_result():
+    flight, release, calls = SingleFlight("test"), threading.Event(), []
+    fn = _slow(release, calls, "result")
+    threads, results = _run_concurrently(*[lambda: flight.do("k", fn)] * 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ["result"]
+    assert results == ["result"] * 3
+
+
+def test_leader_exception_reaches_followers():
+    flight, release = SingleFlight("test"), threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    threads, results = _run_concurrently(lambda: flight.do("k", fail), lambda: flight.do("k", fail))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_cancelled_follower_stops_waiting():
+    flight, release, calls = SingleFlight("test"), threading.Event(), []
+    fn = _slow(release, calls, "result")
+    control = TaskControl()
+    threads, results = _run_concurrently(lambda: flight.do("k", fn), lambda: flight.do("k", fn, control=control))
+
+    control.cancel()
+    threads[1].join(1)
+    assert not threads[1].is_alive()
+    assert isinstance(results[1], TaskCancelled)
+
+    release.set()
+    threads[0].join(5)
+    assert results[0] == "result"
+
+
+@pytest.fixture
+def counted_summaries(monkeypatch):
+    """替换实际的API调用，记录发起请求所用的密钥"""
+    release, calls = threading.Event(), []
+
+    def fake(self, prompt, control=None, attempts=None):
+        calls.append(self.api_key)
+        release.wait(5)
+        return f"summary by {self.api_key}"
+
+    monkeypatch.setattr(summarizer.config, "LLM_ENDPOINTS", [])
+    monkeypatch.setattr(ArticleSummarizer, "_summarize_with_retries", fake)
+    return release, calls
+
+
+def _summarize(api_key):
+    return lambda: ArticleSummarizer(api_key=api_key, base_url="http://llm.test").summarize_article(
+        "Title", "Abstract", "1")
+
+
+def test_requests_with_different_keys_are_not_merged(counted_summaries):
+    release, calls = counted_summaries
+    threads, results = _run_concurrently(_summarize("key-a"), _summarize("key-b"))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(calls) == ["key-a", "key-b"]
+    assert results == ["summary by key-a", "summary by key-b"]
+
+
+def test_requests_with_same_key_are_merged(counted_summaries):
+    release, calls = counted_summaries
+    threads, results = _run_concurrently(_summarize("key-a"), _summarize("key-a"))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ["key-a"]
+    assert results == ["summary by key-a"] * 2
@@ -0,0 +1,28 @@
+"""
+总结派发顺序测试
+"""
+
+import summarizer
+from summarizer import dispatch_order
+
+
+def _articles(lengths):
+    return [{"rank": i, "title": "", "abstract": "x" * n} for i, n in enumerate(lengths)]
+
+
+def test_lpt_reorders_only_within_rank_windows(monkeypatch):
+    monkeypatch.setattr(summarizer.config, "SUMMARY_DISPATCH_LPT", True)
+    articles = _articles([10, 30, 20, 5, 50, 40, 1])
+    assert [a["rank"] for a in dispatch_order(articles, 3)] == [1, 2, 0, 4, 5, 3, 6]
+
+
+def test_lpt_keeps_rank_order_for_equal_costs(monkeypatch):
+    monkeypatch.setattr(summarizer.config, "SUMMARY_DISPATCH_LPT", True)
+    articles = _articles([7] * 5)
+    assert dispatch_order(articles, 2) == articles
+
+
+def test_lpt_disabled_keeps_input_order(monkeypatch):
+    monkeypatch.setattr(summarizer.config, "SUMMARY_DISPATCH_LPT", False)
+    articles = _articles([1, 2, 3])
+    assert dispatch_order(articles, 2) == articles
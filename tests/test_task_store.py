@@ -0,0 +1,206 @@
+"""
+任务存储测试 - 保留策略与输出目录清理
+"""
+
+import os
+import threading
+import time
+import uuid
+
+import pytest
+
+from task_store import MemoryTaskStore, SQLiteTaskStore
+
+OLD = 8 * 24 * 3600
+
+
+def _touch(directory, name, age=OLD):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("x")
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _backdate(path, age=OLD):
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTaskStore(str(tmp_path), file_ttl=7 * 24 * 3600)
+    return SQLiteTaskStore(str(tmp_path), file_ttl=7 * 24 * 3600)
+
+
+def test_gc_removes_only_expired_orphan_artifacts(store, tmp_path):
+    live_id, orphan_id = str(uuid.uuid4()), str(uuid.uuid4())
+    store.create(live_id, {"status": "completed", "params": {}})
+    live = _touch(tmp_path, f"{live_id}_report.md")
+    orphan = _touch(tmp_path, f"{orphan_id}_articles.jsonl")
+    fresh = _touch(tmp_path, f"{str(uuid.uuid4())}_report.md", age=60)
+    foreign = _touch(tmp_path, "notes_2024.txt")
+
+    assert store.collect_garbage() == 1
+    assert not os.path.exists(orphan)
+    for path in (live, fresh, foreign):
+        assert os.path.exists(path)
+
+
+def test_gc_keeps_sqlite_database(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path), file_ttl=7 * 24 * 3600)
+    store.create(str(uuid.uuid4()), {"status": "pending", "params": {}})
+    for name in os.listdir(tmp_path):
+        _backdate(os.path.join(tmp_path, name))
+
+    assert store.collect_garbage() == 0
+    assert os.path.exists(store.db_path)
+    assert store.get_setting("missing", "default") == "default"
+
+
+def test_gc_skips_database_named_like_artifact(tmp_path):
+    db_path = os.path.join(tmp_path, f"{uuid.uuid4()}_tasks.db")
+    store = SQLiteTaskStore(str(tmp_path), db_path=db_path, file_ttl=1)
+    for name in os.listdir(tmp_path):
+        _backdate(os.path.join(tmp_path, name))
+
+    assert store.collect_garbage() == 0
+    assert os.path.exists(db_path)
+
+
+def test_gc_disabled_with_zero_ttl(tmp_path):
+    store = MemoryTaskStore(str(tmp_path), file_ttl=0)
+    path = _touch(tmp_path, f"{uuid.uuid4()}_report.md")
+    assert store.collect_garbage() == 0
+    assert os.path.exists(path)
+
+
+def test_retention_evicts_expired_finished_tasks(store):
+    store.ttl = 60
+    done, running = str(uuid.uuid4()), str(uuid.uuid4())
+    store.create(done, {"status": "error", "params": {}, "finished_at": time.time() - 120})
+    store.create(running, {"status": "running", "params": {}})
+    store.enforce_retention()
+    assert done not in store
+    assert running in store
+
+
+def test_retention_caps_task_count_oldest_first(store):
+    store.max_tasks = 2
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    for i, task_id in enumerate(ids):
+        store.create(task_id, {"status": "cancelled", "params": {}, "created_at": time.time() + i,
+                               "finished_at": time.time()})
+    assert ids[0] not in store
+    assert ids[1] in store and ids[2] in store
+
+
+def test_completed_task_is_spilled_on_eviction(store):
+    store.max_tasks = 1
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    store.create(first, {"status": "completed", "params": {}, "message": "done", "finished_at": time.time(),
+                         "results": [{"pmid": "1", "title": "t"}]})
+    store.create(second, {"status": "completed", "params": {}, "finished_at": time.time(),
+                          "created_at": time.time() + 1})
+    assert first not in store
+    spilled = store.load_spilled(first)
+    assert spilled["results"] == [{"pmid": "1", "title": "t"}]
+    assert spilled["message"] == "done"
+
+
+def test_try_set_admits_one_of_concurrent_callers(store):
+    task_id = str(uuid.uuid4())
+    store.create(task_id, {"status": "completed", "params": {}})
+    start, wins = threading.Barrier(8), []
+
+    def attempt(i):
+        start.wait()
+        if store.try_set(task_id, "retrying", message=f"retry {i}"):
+            wins.append(i)
+
+    threads = [threading.Thread(target=attempt, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(wins) == 1
+    task = store.get(task_id, with_results=False)
+    assert task["retrying"] is True and task["message"] == f"retry {wins[0]}"
+    assert task["status"] == "completed"
+
+    store.update(task_id, retrying=False)
+    assert store.try_set(task_id, "retrying")
+    assert not store.try_set(str(uuid.uuid4()), "retrying")
+
+
+def _expire(store, task_id):
+    with store._transaction() as conn:
+        conn.execute("UPDATE tasks SET heartbeat_at = ? WHERE id = ?",
+                     (time.time() - store.lease_timeout - 1, task_id))
+
+
+def test_sqlite_claim_is_exclusive_and_records_lease(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path), poll_interval=0.01)
+    task_id = str(uuid.uuid4())
+    store.create(task_id, {"status": "pending", "params": {"topic": "x"}})
+
+    assert store.claim_next(timeout=0, worker_id="w1") == (task_id, {"topic": "x"})
+    assert store.claim_next(timeout=0, worker_id="w2") is None
+    worker_id, claimed_at, heartbeat_at = store._conn().execute(
+        "SELECT worker_id, claimed_at, heartbeat_at FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    assert worker_id == "w1" and claimed_at and heartbeat_at == claimed_at
+    assert store.get(task_id)["status"] == "running"
+
+
+def test_sqlite_heartbeat_keeps_lease(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path), lease_timeout=60)
+    task_id = str(uuid.uuid4())
+    store.create(task_id, {"status": "pending", "params": {}})
+    store.claim_next(timeout=0, worker_id="w1")
+    _expire(store, task_id)
+
+    store.heartbeat("other")
+    assert store.reclaim_expired() == 1
+    store.claim_next(timeout=0, worker_id="w1")
+    _expire(store, task_id)
+    store.heartbeat("w1")
+    assert store.reclaim_expired() == 0
+    assert store.get(task_id)["status"] == "running"
+
+
+def test_sqlite_reclaims_lost_tasks_then_fails_them(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path), lease_timeout=60, max_attempts=2)
+    task_id = str(uuid.uuid4())
+    store.create(task_id, {"status": "pending", "params": {}})
+
+    store.claim_next(timeout=0, worker_id="w1")
+    store.update(task_id, status="paused", paused=True)
+    _expire(store, task_id)
+    assert store.reclaim_expired() == 1
+    task = store.get(task_id)
+    assert task["status"] == "pending" and not task["paused"] and not task["finished_at"]
+
+    assert store.claim_next(timeout=0, worker_id="w2")[0] == task_id
+    _expire(store, task_id)
+    assert store.reclaim_expired() == 1
+    task = store.get(task_id)
+    assert task["status"] == "error" and task["finished_at"]
+    assert store.claim_next(timeout=0, worker_id="w3") is None
+
+
+def test_sqlite_upgrades_database_without_lease_columns(tmp_path):
+    import sqlite3
+
+    db_path = os.path.join(tmp_path, "tasks.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tasks (id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+                 "finished_at REAL, data TEXT NOT NULL)")
+    conn.execute("INSERT INTO tasks VALUES ('old', 'running', 0, NULL, '{\"status\": \"running\"}')")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteTaskStore(str(tmp_path), lease_timeout=60)
+    assert store.reclaim_expired() == 1
+    assert store.get("old")["status"] == "pending"
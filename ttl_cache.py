@@ -0,0 +1,90 @@
+"""
+TTL缓存模块 - 进程内带过期时间和容量上限的缓存
+
+用于缓存AI优化检索词、润色主题和esearch结果，重复主题的任务无需再等待这些往返请求。
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from metrics import CACHE_HITS
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """
+    标准化查询文本作为缓存键：去除首尾空白、合并连续空白、转小写
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        标准化后的文本
+    """
+    return re.sub(r"\s+", " ", (text or "").strip()).lower()
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024):
+        """
+        初始化TTL缓存
+
+        Args:
+            name: 缓存名称，用于命中次数指标
+            ttl: 默认过期时间(秒)，0表示不缓存
+            max_entries: 最多保留的条目数，超出时淘汰最久未使用的条目
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        读取未过期的缓存值
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存值或default
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        CACHE_HITS.inc(cache=self.name)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值（应视为不可变，读取方不得原地修改）
+            ttl: 本条目的过期时间(秒)，默认使用缓存的ttl
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
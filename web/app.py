@@ -5,8 +5,10 @@ Flask后端服务 - PubMed文献搜索与AI总结
 
 import os
 import uuid
+import socket
 import threading
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import sys
 
@@ -16,23 +18,47 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 from pubmed_crawler import PubMedCrawler
 from journal_filter import JournalFilter
-from summarizer import ArticleSummarizer
+from summarizer import ArticleSummarizer, SUMMARY_FAILED
+from task_control import TaskControl, TaskCancelled
+from exporters import (EXCEL_COLUMNS, ExcelStreamWriter, MarkdownReportWriter, JsonlStreamWriter, ExportSet,
+                       COLUMNAR_FORMATS, convert_jsonl, pyarrow_available)
+from task_store import create_task_store, FINISHED_STATUSES
+from article import Article
+from metrics import span, task_timings, current_timings, render_prometheus
+from profiling import TaskProfiler, ProfilerBusy, PROFILE_MODES, current_profiler
+from relevance import rank_articles
+from dedup import collapse_duplicates
+from llm_router import router_status
+
+class ArticleJSONProvider(DefaultJSONProvider):
+    """JSON序列化时将Article记录转换为普通字典"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Article):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
+app.json = ArticleJSONProvider(app)
 CORS(app)
 
-# 任务存储
-tasks = {}
-
-# 期刊配置
-journals_config = config.JOURNALS.copy()
-
 # 输出目录使用绝对路径
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), config.OUTPUT_DIR)
 
 # 确保输出目录存在
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# 任务存储（带保留策略，已完成任务的结果会转存到OUTPUT_DIR）
+# 任务状态、暂停/取消信号和期刊配置都保存在存储后端中，由 config.TASK_BACKEND 选择
+tasks = create_task_store(OUTPUT_DIR)
+tasks.start_janitor()
+
+# 本进程中正在执行的任务的控制器 {task_id: TaskControl}
+task_controls = {}
+task_controls_lock = threading.Lock()
+
 
 # 前端页面路由
 @app.route('/')
@@ -41,86 +67,55 @@ def index():
     return send_from_directory('static', 'index.html')
 
 
-def save_markdown_report(articles, output_path, overall_summary=""):
-    """保存Markdown报告"""
-    with open(output_path, "w", encoding="utf-8") as f:
-        if overall_summary:
-            f.write(overall_summary)
-            f.write("\n\n")
-        f.write("---\n\n")
-        for i, article in enumerate(articles, 1):
-            f.write(f"## 文章 {i}: {article.get('title', '无标题')}\n\n")
-            f.write(f"**期刊**: {article.get('journal', 'N/A')}\n\n")
-            f.write(f"**出版社**: {article.get('publisher', 'N/A')}\n\n")
-            f.write(f"**发表日期**: {article.get('pub_date', 'N/A')}\n\n")
-            f.write(f"**DOI**: {article.get('doi', 'N/A')}\n\n")
-            authors = article.get('authors', '')
-            if authors:
-                f.write(f"**作者**: {authors}\n\n")
-            abstract = article.get('abstract', '')
-            if abstract:
-                f.write("**摘要**:\n\n")
-                f.write(f"{abstract}\n\n")
-            summary = article.get('summary', '')
-            if summary and summary != "无摘要":
-                f.write("**AI总结**:\n\n")
-                f.write(f"{summary}\n\n")
-            f.write("---\n\n")
-
-
-def save_excel(articles, output_path):
-    """保存Excel文件"""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill
-    from openpyxl.utils import get_column_letter
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "文献"
-
-    headers = ["序号", "标题", "期刊", "出版社", "发表日期", "DOI", "作者", "摘要", "AI总结"]
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    for row, article in enumerate(articles, 2):
-        ws.cell(row=row, column=1, value=row-1)
-        ws.cell(row=row, column=2, value=article.get("title", ""))
-        ws.cell(row=row, column=3, value=article.get("journal", ""))
-        ws.cell(row=row, column=4, value=article.get("publisher", ""))
-        ws.cell(row=row, column=5, value=article.get("pub_date", ""))
-        ws.cell(row=row, column=6, value=article.get("doi", ""))
-        ws.cell(row=row, column=7, value=article.get("authors", ""))
-        ws.cell(row=row, column=8, value=article.get("abstract", ""))
-        ws.cell(row=row, column=9, value=article.get("summary", ""))
-
-    column_widths = {1: 6, 2: 60, 3: 30, 4: 10, 5: 12, 6: 25, 7: 40, 8: 80, 9: 100}
-    for col, width in column_widths.items():
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    ws.freeze_panes = "A2"
-    wb.save(output_path)
+# Web端导出的Excel不包含PMID列
+WEB_EXCEL_COLUMNS = [c for c in EXCEL_COLUMNS if c[1] != 'pmid']
+
+
+def open_exports(task_id, overall_summary="", order=None):
+    """
+    创建任务的增量导出写入器
+
+    Args:
+        task_id: 任务ID
+        overall_summary: 整体总结
+        order: 文章的最终顺序，导出文件按该顺序写出（总结完成的顺序与之不同）
+
+    Returns:
+        (写入器组合, 文件名字典)
+    """
+    files = {
+        'report': f"{task_id}_report.md",
+        'excel': f"{task_id}_articles.xlsx",
+        'jsonl': f"{task_id}_articles.jsonl",
+    }
+    exports = ExportSet([
+        MarkdownReportWriter(os.path.join(OUTPUT_DIR, files['report']), overall_summary,
+                             include_pmid=False, footer=False),
+        ExcelStreamWriter(os.path.join(OUTPUT_DIR, files['excel']), columns=WEB_EXCEL_COLUMNS),
+        JsonlStreamWriter(os.path.join(OUTPUT_DIR, files['jsonl'])),
+    ], order=order)
+    # Parquet/Arrow在首次下载时由JSONL流式转换生成
+    if pyarrow_available():
+        for fmt, ext in COLUMNAR_FORMATS.items():
+            files[fmt] = f"{task_id}_articles{ext}"
+    return exports, files
 
 
 def run_search_task(task_id, params):
     """后台执行搜索任务"""
-    task = tasks[task_id]
-    task['status'] = 'running'
-    task['progress'] = 0
-    task['message'] = '正在初始化...'
-
-    # 检查暂停/取消状态的辅助函数
-    def check_pause():
-        while task.get('paused', False) and not task.get('cancelled', False):
-            import time
-            time.sleep(0.5)
-        if task.get('cancelled', False):
-            raise Exception("任务已取消")
+
+    def update(**fields):
+        # 每次更新状态时附带当前的阶段耗时
+        fields.setdefault('timings', dict(current_timings() or {}))
+        tasks.update(task_id, **fields)
+
+    update(status='running', progress=0, message='正在初始化...')
+
+    # 暂停/取消信号：本进程的接口调用直接触发，其他进程的请求由 _control_watcher_loop 同步
+    control = TaskControl()
+    with task_controls_lock:
+        task_controls[task_id] = control
+    check_pause = control.check
 
     try:
         from datetime import datetime
@@ -128,163 +123,287 @@ def run_search_task(task_id, params):
 
         # 步骤1: AI优化检索词
         check_pause()
-        task['progress'] = 5
-        task['message'] = 'AI优化检索词...'
+        update(progress=5, message='AI优化检索词...')
         # 获取用户提供的API密钥，如果没有则使用默认配置
         api_key = params.get('api_key', config.DEEPSEEK_API_KEY)
-        summarizer = ArticleSummarizer(api_key=api_key)
+        summarizer = ArticleSummarizer(api_key=api_key, hedge=params.get('hedge'))
         user_topic = params['topic']
-        optimized_terms = summarizer.optimize_search_terms(user_topic)
+        with span('optimize_terms'):
+            optimized_terms = summarizer.optimize_search_terms(user_topic)
 
         # 步骤2: 搜索文章
         check_pause()
-        task['progress'] = 10
-        task['message'] = '正在搜索PubMed...'
+        update(progress=10, message='正在搜索PubMed...')
         crawler = PubMedCrawler()
         start_date = params.get('start_date', '2025/01/01')
         end_date = params.get('end_date', datetime.now().strftime("%Y/%m/%d"))
         max_results = params.get('max_results', 30)
+        enable_filter = params.get('enable_filter', True)
+        journal_filter = JournalFilter(tasks.get_setting('journals', config.JOURNALS))
+        # 获取前端传递的期刊列表，如果没有则使用全部期刊
+        selected_journals = params.get('selected_journals', [])
+
+        # 筛选期刊时先按esummary的期刊名预筛选，只获取目标期刊文章的全文记录
+        journal_match = None
+        if enable_filter and params.get('prefilter', config.JOURNAL_PREFILTER):
+            journal_match = journal_filter.matcher(selected_journals)
 
         all_articles = crawler.get_articles(
             search_terms=optimized_terms,
             start_date=start_date,
             end_date=end_date,
-            max_results=max_results
+            max_results=max_results,
+            journal_match=journal_match
         )
+        if crawler.term_hits:
+            update(term_hits=crawler.term_hits)
 
         if not all_articles:
-            task['status'] = 'completed'
-            task['progress'] = 100
-            task['message'] = '未找到相关文章'
-            task['results'] = []
+            update(status='completed', progress=100, message='未找到相关文章', results=[])
+            tasks.mark_finished(task_id)
             return
 
         # 步骤3: 筛选期刊
         check_pause()
-        enable_filter = params.get('enable_filter', True)
-
         if enable_filter:
-            task['progress'] = 30
-            task['message'] = '筛选期刊...'
-            journal_filter = JournalFilter()
-
-            # 获取前端传递的期刊列表，如果没有则使用全部期刊
-            selected_journals = params.get('selected_journals', [])
-            if selected_journals:
-                # 使用自定义期刊列表筛选
-                filtered_articles = journal_filter.filter_articles_by_journals(all_articles, selected_journals)
-            else:
-                # 使用默认配置筛选
-                filtered_articles = journal_filter.filter_articles(all_articles)
+            update(progress=30, message='筛选期刊...')
+            with span('filter'):
+                if selected_journals:
+                    # 使用自定义期刊列表筛选
+                    filtered_articles = journal_filter.filter_articles_by_journals(all_articles, selected_journals)
+                else:
+                    # 使用默认配置筛选
+                    filtered_articles = journal_filter.filter_articles(all_articles)
         else:
             # 不筛选，返回所有文章
-            task['progress'] = 30
-            task['message'] = '跳过筛选...'
+            update(progress=30, message='跳过筛选...')
             filtered_articles = all_articles
             for article in filtered_articles:
                 article["publisher"] = "Unknown"
 
         if not filtered_articles:
-            task['status'] = 'completed'
-            task['progress'] = 100
-            task['message'] = '筛选后没有符合条件的文章'
-            task['results'] = []
+            update(status='completed', progress=100, message='筛选后没有符合条件的文章', results=[])
+            tasks.mark_finished(task_id)
             return
 
+        # 合并近重复文章（勘误、重复发表等），每组只总结代表文章
+        if params.get('dedup', config.DEDUP_ENABLED):
+            with span('dedup'):
+                filtered_articles = collapse_duplicates(filtered_articles)
+
+        # 按相关性排序并截取（关闭 config.SUMMARY_DISPATCH_LPT 时最相关的文章最先派发总结）
+        if params.get('rank', config.RELEVANCE_RANKING):
+            update(progress=40, message='相关性排序...')
+            with span('rank'):
+                filtered_articles = rank_articles(
+                    filtered_articles,
+                    [user_topic] + optimized_terms,
+                    top_k=int(params.get('top_k') or config.RELEVANCE_TOP_K),
+                    min_score=float(params.get('min_score') or config.RELEVANCE_MIN_SCORE)
+                )
+
         # 步骤4: AI总结
-        task['progress'] = 50
-        task['message'] = 'AI总结文章中...'
+        update(progress=50, message='AI总结文章中...')
         max_workers = params.get('max_workers', 5)
 
-        # 使用字典来存储已完成文章的PMID和内容的映射
-        completed_articles = {}
+        # 报告和Excel在每篇文章总结完成时增量写出，不再单独占用保存阶段
+        overall_summary = summarizer.generate_overall_summary(filtered_articles)
+        exports, files = open_exports(task_id, overall_summary, order=filtered_articles)
 
-        # 创建进度回调函数，实时更新任务状态
-        def progress_callback(article, completed, total):
-            # 检查暂停或取消状态
-            while task.get('paused', False) and not task.get('cancelled', False):
-                import time
-                time.sleep(0.5)
-
-            if task.get('cancelled', False):
-                return
+        # 先登记全部待总结文章，之后每完成一篇只更新对应的一条结果
+        tasks.set_results(task_id, filtered_articles)
+        article_index = {
+            (a.get('pmid') or a.get('title', '')): i for i, a in enumerate(filtered_articles)
+        }
 
+        # 创建进度回调函数，实时更新任务状态（暂停/取消由summarize_articles在派发时处理）
+        def progress_callback(article, completed, total):
             # 使用PMID或标题作为key
             key = article.get('pmid') or article.get('title', '')
-            completed_articles[key] = article
-            # 从原始列表中找出已完成的文章
-            current_results = []
-            for a in filtered_articles:
-                k = a.get('pmid') or a.get('title', '')
-                if k in completed_articles:
-                    current_results.append(completed_articles[k])
-                else:
-                    current_results.append(a)
-            task['results'] = current_results
-            task['progress'] = 50 + int(30 * completed / total)
-            task['message'] = f'AI总结文章中... ({completed}/{total})'
-
-        summarized_articles = summarizer.summarize_articles(
-            filtered_articles,
-            max_workers=max_workers,
-            progress_callback=progress_callback
-        )
+            tasks.update_result(task_id, article_index[key], article)
+            exports.append(article)
+            update(progress=50 + int(30 * completed / total),
+                   message=f'AI总结文章中... ({completed}/{total})')
+
+        retry_stats = {}
+        try:
+            with span('summarize'):
+                summarized_articles = summarizer.summarize_articles(
+                    filtered_articles,
+                    max_workers=max_workers,
+                    progress_callback=progress_callback,
+                    control=control,
+                    stats=retry_stats
+                )
+        except BaseException:
+            exports.abort()
+            raise
+        with span('export'):
+            exports.close()
 
         # 步骤5: AI润色主题
         check_pause()
-        task['progress'] = 80
-        task['message'] = '生成文献综述...'
-        polished_topic = summarizer.polish_search_topic(user_topic)
+        update(progress=80, message='生成文献综述...')
+        with span('polish_topic'):
+            polished_topic = summarizer.polish_search_topic(user_topic)
 
         # 步骤6: 生成文献综述
         check_pause()
-        literature_review = summarizer.generate_literature_review(
-            summarized_articles,
-            polished_topic,
-            start_date,
-            end_date
-        )
+        with span('review'):
+            literature_review = summarizer.generate_literature_review(
+                summarized_articles,
+                polished_topic,
+                start_date,
+                end_date,
+                control=control,
+                citation_style=params.get('citation_style'),
+                parallel=params.get('parallel_review')
+            )
 
         # 步骤7: 保存文件
         check_pause()
-        task['progress'] = 95
-        task['message'] = '保存文件...'
-
-        report_path = os.path.join(OUTPUT_DIR, f"{task_id}_report.md")
-        review_path = os.path.join(OUTPUT_DIR, f"{task_id}_review.md")
-        excel_path = os.path.join(OUTPUT_DIR, f"{task_id}_articles.xlsx")
-
-        overall_summary = summarizer.generate_overall_summary(summarized_articles)
-        save_markdown_report(summarized_articles, report_path, overall_summary)
-        save_excel(summarized_articles, excel_path)
+        update(progress=95, message='保存文件...')
 
-        with open(review_path, "w", encoding="utf-8") as f:
+        files['review'] = f"{task_id}_review.md"
+        with open(os.path.join(OUTPUT_DIR, files['review']), "w", encoding="utf-8") as f:
             f.write(literature_review)
 
-        # 读取文献综述内容
-        with open(review_path, "r", encoding="utf-8") as f:
-            review_content = f.read()
-
-        task['status'] = 'completed'
-        task['progress'] = 100
-        task['message'] = '完成!'
-        task['results'] = summarized_articles
-        task['files'] = {
-            'report': os.path.basename(report_path),
-            'review': os.path.basename(review_path),
-            'excel': os.path.basename(excel_path)
-        }
-        task['review_content'] = review_content
-        task['polished_topic'] = polished_topic
+        # 性能分析报告在任务结束后由 run_task 写出，这里先登记文件名
+        profiler = current_profiler()
+        if profiler:
+            files.update(profiler.file_names(f"{task_id}_profile"))
+
+        update(
+            status='completed',
+            progress=100,
+            message='完成!',
+            results=summarized_articles,
+            files=files,
+            review_content=literature_review,
+            polished_topic=polished_topic,
+            llm_usage=summarizer.usage_summary(),
+            summary_retry=retry_stats
+        )
+        tasks.mark_finished(task_id)
+
+        # 完成后将大字段转存到磁盘，由 /api/task/<id>/results 按需读取
+        tasks.spill(task_id)
 
     except Exception as e:
-        if task.get('cancelled', False):
-            task['status'] = 'cancelled'
-            task['message'] = '任务已取消'
+        if isinstance(e, TaskCancelled) or control.cancelled:
+            update(status='cancelled', message='任务已取消')
         else:
-            task['status'] = 'error'
-            task['message'] = f'错误: {str(e)}'
-            task['error'] = str(e)
+            update(status='error', message=f'错误: {str(e)}', error=str(e))
+        tasks.mark_finished(task_id)
+
+    finally:
+        with task_controls_lock:
+            task_controls.pop(task_id, None)
+
+
+def _task_worker_loop():
+    """工作线程：从共享任务队列中领取并执行任务"""
+    while True:
+        try:
+            claimed = tasks.claim_next(timeout=1.0, worker_id=_worker_id())
+        except Exception as e:
+            print(f"领取任务错误: {e}")
+            claimed = None
+        if claimed:
+            task_id, params = claimed
+            # 任务内各阶段的 span() 耗时累加到该字典，随状态更新写入存储
+            with task_timings({}):
+                run_task(task_id, params)
+
+
+def run_task(task_id, params):
+    """执行任务；参数中请求了性能分析时包裹分析器，结束后登记分析报告文件"""
+    mode = params.get('profile')
+    if mode is True:
+        mode = 'cprofile'
+    if mode not in PROFILE_MODES:
+        run_search_task(task_id, params)
+        return
+
+    profiler = TaskProfiler(mode)
+    try:
+        with profiler:
+            run_search_task(task_id, params)
+    except ProfilerBusy as e:
+        # 同一进程中同时只分析一个任务；不占用工作线程等待，本任务不做分析直接执行
+        print(f"跳过性能分析 {task_id}: {e}")
+        tasks.update(task_id, profile_skipped=f'未进行性能分析: {e}')
+        run_search_task(task_id, params)
+        return
+    except Exception as e:
+        # run_search_task 自行处理任务错误，这里只会是分析器启动/停止失败
+        print(f"性能分析失败 {task_id}: {e}")
+        task = tasks.get(task_id, with_results=False) or {}
+        if task.get('status') not in FINISHED_STATUSES:
+            tasks.update(task_id, status='error', message=f'错误: 性能分析启动失败: {e}', error=str(e))
+            tasks.mark_finished(task_id)
+        return
+    try:
+        profile_files = profiler.save(OUTPUT_DIR, f"{task_id}_profile")
+        # 未正常完成（出错/取消）的任务也登记分析报告
+        task = tasks.get(task_id, with_results=False) or {}
+        if not profile_files.items() <= (task.get('files') or {}).items():
+            tasks.update(task_id, files={**(task.get('files') or {}), **profile_files})
+    except Exception as e:
+        print(f"保存性能分析结果失败 {task_id}: {e}")
+
+
+# 每个进程（包括fork出的WSGI工作进程）各自的领取者标识 {pid: worker_id}
+_worker_ids = {}
+
+
+def _worker_id():
+    """本进程领取任务时使用的标识（主机名:进程号:随机后缀，进程号被复用时也不会混淆）"""
+    pid = os.getpid()
+    if pid not in _worker_ids:
+        _worker_ids[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _worker_ids[pid]
+
+
+def _control_watcher_loop(interval=0.5):
+    """将共享存储中的暂停/取消状态同步到本进程运行中任务的控制器，并定期为本进程领取的任务续租"""
+    import time
+    last_heartbeat = 0.0
+    while True:
+        time.sleep(interval)
+        if time.time() - last_heartbeat >= config.TASK_HEARTBEAT_INTERVAL:
+            try:
+                tasks.heartbeat(_worker_id())
+                last_heartbeat = time.time()
+            except Exception as e:
+                print(f"任务续租错误: {e}")
+        with task_controls_lock:
+            running = list(task_controls.items())
+        for task_id, control in running:
+            try:
+                state = tasks.get(task_id, with_results=False)
+            except Exception as e:
+                print(f"同步任务状态错误: {e}")
+                continue
+            if state is not None:
+                control.sync(state.get('paused', False), state.get('cancelled', False))
+
+
+def _local_control(task_id):
+    """获取本进程中运行的任务控制器，不在本进程运行时返回None"""
+    with task_controls_lock:
+        return task_controls.get(task_id)
+
+
+def start_task_workers(count=None):
+    """启动本进程的任务工作线程"""
+    for _ in range(count or config.TASK_WORKERS):
+        threading.Thread(target=_task_worker_loop, daemon=True).start()
+    threading.Thread(target=_control_watcher_loop, daemon=True).start()
+
+
+# 每个Web进程（包括WSGI多进程部署下的每个工作进程）都启动自己的任务工作线程
+start_task_workers()
 
 
 # ========== API接口 ==========
@@ -293,10 +412,11 @@ def run_search_task(task_id, params):
 def get_config():
     """获取当前配置"""
     return jsonify({
-        'journals': journals_config,
+        'journals': tasks.get_setting('journals', config.JOURNALS),
         'defaults': {
             'max_results': config.MAX_SEARCH_RESULTS,
             'max_workers': config.MAX_WORKERS,
+            'top_k': config.RELEVANCE_TOP_K,
             'start_date': '2025/01/01'
         }
     })
@@ -305,9 +425,9 @@ def get_config():
 @app.route('/api/journals', methods=['POST'])
 def update_journals():
     """更新期刊配置"""
-    global journals_config
-    journals_config = request.json.get('journals', journals_config)
-    config.JOURNALS = journals_config
+    journals = request.json.get('journals')
+    if journals:
+        tasks.set_setting('journals', journals)
     return jsonify({'status': 'success'})
 
 
@@ -317,7 +437,7 @@ def start_search():
     params = request.json
 
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {
+    tasks.create(task_id, {
         'status': 'pending',
         'progress': 0,
         'message': '等待中...',
@@ -326,11 +446,9 @@ def start_search():
         'files': {},
         'paused': False,
         'cancelled': False
-    }
+    })
 
-    # 后台启动任务
-    thread = threading.Thread(target=run_search_task, args=(task_id, params))
-    thread.start()
+    # 任务进入共享队列，由任意进程的工作线程领取执行
 
     return jsonify({
         'task_id': task_id,
@@ -343,14 +461,32 @@ def get_task_status(task_id):
     """获取任务状态"""
     task = tasks.get(task_id)
     if not task:
-        return jsonify({'error': '任务不存在'}), 404
+        # 任务已被淘汰出内存，尝试从转存文件恢复状态
+        spilled = tasks.load_spilled(task_id)
+        if not spilled:
+            return jsonify({'error': '任务不存在'}), 404
+        return jsonify({
+            'status': spilled.get('status', 'completed'),
+            'progress': spilled.get('progress', 100),
+            'message': spilled.get('message', ''),
+            'result_count': len(spilled.get('results') or []),
+            'paused': False,
+            'timings': spilled.get('timings') or {},
+            'llm_usage': spilled.get('llm_usage') or {},
+            'summary_retry': spilled.get('summary_retry') or {}
+        })
 
     response = {
         'status': task['status'],
         'progress': task['progress'],
         'message': task['message'],
-        'result_count': len(task.get('results', [])),
-        'paused': task.get('paused', False)
+        'result_count': task.get('result_count', len(task.get('results', []))),
+        'paused': task.get('paused', False),
+        'timings': task.get('timings') or {},
+        'term_hits': task.get('term_hits') or {},
+        'llm_usage': task.get('llm_usage') or {},
+        'summary_retry': task.get('summary_retry') or {},
+        'profile_skipped': task.get('profile_skipped') or ''
     }
 
     # 如果任务正在运行或已完成，返回当前结果供实时显示
@@ -364,16 +500,20 @@ def get_task_status(task_id):
 @app.route('/api/task/<task_id>/pause', methods=['POST'])
 def pause_task(task_id):
     """暂停任务"""
-    task = tasks.get(task_id)
+    task = tasks.get(task_id, with_results=False)
     if not task:
         return jsonify({'error': '任务不存在'}), 404
 
-    if task['status'] != 'running':
+    if task.get('retrying'):
+        # 重试总结失败的文章时任务保持已完成状态
+        tasks.update(task_id, paused=True, message='重试已暂停')
+    elif task['status'] != 'running':
         return jsonify({'error': '任务不在运行中'}), 400
-
-    task['paused'] = True
-    task['status'] = 'paused'
-    task['message'] = '已暂停'
+    else:
+        tasks.update(task_id, paused=True, status='paused', message='已暂停')
+    control = _local_control(task_id)
+    if control:
+        control.pause()
 
     return jsonify({'status': 'success', 'message': '任务已暂停'})
 
@@ -381,16 +521,19 @@ def pause_task(task_id):
 @app.route('/api/task/<task_id>/resume', methods=['POST'])
 def resume_task(task_id):
     """恢复任务"""
-    task = tasks.get(task_id)
+    task = tasks.get(task_id, with_results=False)
     if not task:
         return jsonify({'error': '任务不存在'}), 404
 
-    if task['status'] != 'paused':
+    if task.get('retrying') and task.get('paused'):
+        tasks.update(task_id, paused=False, message='继续重试...')
+    elif task['status'] != 'paused':
         return jsonify({'error': '任务不在暂停状态'}), 400
-
-    task['paused'] = False
-    task['status'] = 'running'
-    task['message'] = '继续运行...'
+    else:
+        tasks.update(task_id, paused=False, status='running', message='继续运行...')
+    control = _local_control(task_id)
+    if control:
+        control.resume()
 
     return jsonify({'status': 'success', 'message': '任务已恢复'})
 
@@ -398,44 +541,211 @@ def resume_task(task_id):
 @app.route('/api/task/<task_id>/cancel', methods=['POST'])
 def cancel_task(task_id):
     """取消任务"""
-    task = tasks.get(task_id)
+    task = tasks.get(task_id, with_results=False)
     if not task:
         return jsonify({'error': '任务不存在'}), 404
 
-    task['cancelled'] = True
-    task['status'] = 'cancelled'
-    task['message'] = '任务已取消'
+    if task.get('retrying'):
+        # 只中止重试，已完成的结果保留
+        tasks.update(task_id, cancelled=True, message='正在取消重试...')
+    else:
+        tasks.update(task_id, cancelled=True, status='cancelled', message='任务已取消')
+        tasks.mark_finished(task_id)
+    control = _local_control(task_id)
+    if control:
+        control.cancel()
 
-    return jsonify({'status': 'success', 'message': '任务已取消'})
+    return jsonify({'status': 'success', 'message': '重试已取消' if task.get('retrying') else '任务已取消'})
 
 
 @app.route('/api/task/<task_id>/results', methods=['GET'])
 def get_task_results(task_id):
     """获取任务结果"""
-    task = tasks.get(task_id)
-    if not task:
-        return jsonify({'error': '任务不存在'}), 404
-
-    if task['status'] != 'completed':
+    task = tasks.get(task_id, with_results=False)
+    if task and task['status'] != 'completed':
         return jsonify({'error': '任务未完成'}), 400
 
+    # 已转存或已淘汰的任务从磁盘按需加载
+    if not task or task.get('spilled'):
+        task = tasks.load_spilled(task_id)
+        if not task:
+            return jsonify({'error': '任务不存在'}), 404
+    else:
+        task = tasks.get(task_id)
+
     return jsonify({
-        'results': task.get('results', []),
-        'files': task.get('files', {}),
-        'review_content': task.get('review_content', ''),
-        'polished_topic': task.get('polished_topic', '')
+        'results': task.get('results') or [],
+        'files': task.get('files') or {},
+        'review_content': task.get('review_content') or '',
+        'polished_topic': task.get('polished_topic') or ''
     })
 
 
+def retry_failed_summaries(task_id, params, task):
+    """
+    重新总结已完成任务中总结失败的文章，完成后更新结果并删除旧的导出文件（下载时按新结果重新生成）
+
+    Args:
+        task_id: 任务ID
+        params: 任务参数（API密钥、并发数等）
+        task: 含结果与文献综述的任务字典
+    """
+    results = [Article(article) for article in task.get('results') or []]
+    failed = [article for article in results if article.get('summary') == SUMMARY_FAILED]
+    message = None
+
+    # 重试期间可暂停/取消（任务仍为已完成状态，取消只中止本次重试）
+    control = TaskControl()
+    with task_controls_lock:
+        task_controls[task_id] = control
+    try:
+        summarizer = ArticleSummarizer(api_key=params.get('api_key') or None, hedge=params.get('hedge'))
+        summarizer.summarize_articles(
+            failed, max_workers=min(len(failed), int(params.get('max_workers') or config.MAX_WORKERS)),
+            control=control
+        )
+    except TaskCancelled:
+        pass
+    except Exception as e:
+        message = f'重试失败: {e}'
+    finally:
+        with task_controls_lock:
+            task_controls.pop(task_id, None)
+    # 取消时保留已重新总结成功的文章，其余仍为总结失败
+    still_failed = [article.get('pmid') or article.get('title', '')[:40]
+                    for article in failed if article.get('summary') == SUMMARY_FAILED]
+    stats = {'retried': len(failed), 'recovered': len(failed) - len(still_failed), 'failed': still_failed}
+    if control.cancelled:
+        message = f"重试已取消: {stats['recovered']}/{len(failed)} 篇总结成功"
+    message = message or f"重试完成: {stats['recovered']}/{len(failed)} 篇总结成功"
+
+    # 先写入并转存新结果，再在export_lock内删除旧的导出文件，下载时按新结果重新生成
+    tasks.update(task_id, results=results, review_content=task.get('review_content') or '', spilled=False,
+                 message=message, retrying=False, paused=False, cancelled=False, summary_retry=stats)
+    tasks.spill(task_id)
+    files = task.get('files') or {}
+    with export_lock:
+        # 文献综述不重新生成，报告与数据文件按更新后的结果重新导出
+        for kind in ('report', 'excel', 'jsonl', 'parquet', 'arrow'):
+            if files.get(kind):
+                try:
+                    os.remove(os.path.join(OUTPUT_DIR, files[kind]))
+                except OSError:
+                    pass
+        # 列式文件由JSONL转换生成，先重新写出JSONL
+        if files.get('jsonl'):
+            ensure_export(files['jsonl'])
+
+
+@app.route('/api/task/<task_id>/retry-failed', methods=['POST'])
+def retry_failed(task_id):
+    """重新总结已完成任务中总结失败的文章（后台执行，进度见任务状态的message）"""
+    task = tasks.get(task_id, with_results=False)
+    if not task:
+        return jsonify({'error': '任务不存在'}), 404
+    if task['status'] != 'completed':
+        return jsonify({'error': '任务未完成'}), 400
+    if task.get('retrying'):
+        return jsonify({'error': '任务正在重试中'}), 409
+
+    full = tasks.load_spilled(task_id) if task.get('spilled') else tasks.get(task_id)
+    if not full:
+        return jsonify({'error': '任务结果不存在'}), 404
+    count = sum(1 for article in full.get('results') or [] if article.get('summary') == SUMMARY_FAILED)
+    if not count:
+        return jsonify({'status': 'success', 'retrying': 0, 'message': '没有总结失败的文章'})
+
+    full['files'] = task.get('files') or {}
+    # 原子地置位retrying，并发请求只有一个能启动重试
+    if not tasks.try_set(task_id, 'retrying', paused=False, cancelled=False,
+                         message=f'重试 {count} 篇总结失败的文章...'):
+        return jsonify({'error': '任务正在重试中'}), 409
+    threading.Thread(target=retry_failed_summaries, args=(task_id, task.get('params') or {}, full),
+                     daemon=True).start()
+    return jsonify({'status': 'success', 'retrying': count, 'message': f'开始重试 {count} 篇文章'})
+
+
+def ensure_export(filename):
+    """
+    导出文件不存在时，根据已转存的任务结果按需重新生成
+
+    Args:
+        filename: 文件名，格式为 {task_id}_{类型}.{扩展名}
+
+    Returns:
+        文件是否可用
+    """
+    if os.path.exists(os.path.join(OUTPUT_DIR, filename)):
+        return True
+
+    task_id, _, kind = filename.partition('_')
+
+    # 列式格式优先由JSONL转换，无需加载全部结果
+    for fmt, ext in COLUMNAR_FORMATS.items():
+        jsonl_path = os.path.join(OUTPUT_DIR, f"{task_id}_articles.jsonl")
+        if kind == f"articles{ext}" and pyarrow_available() and os.path.exists(jsonl_path):
+            convert_jsonl(jsonl_path, os.path.join(OUTPUT_DIR, filename), fmt=fmt)
+            return True
+    task = tasks.get(task_id)
+    if not task or task.get('spilled'):
+        task = tasks.load_spilled(task_id)
+    if not task or task.get('status') != 'completed':
+        return False
+
+    results = task.get('results') or []
+    path = os.path.join(OUTPUT_DIR, filename)
+    if kind == 'report.md':
+        summary = ArticleSummarizer(api_key='').generate_overall_summary(results)
+        with MarkdownReportWriter(path, summary, include_pmid=False, footer=False) as writer:
+            for article in results:
+                writer.append(article)
+    elif kind == 'articles.xlsx':
+        with ExcelStreamWriter(path, columns=WEB_EXCEL_COLUMNS) as writer:
+            for article in results:
+                writer.append(article)
+    elif kind == 'articles.jsonl':
+        with JsonlStreamWriter(path) as writer:
+            for article in results:
+                writer.append(article)
+    elif kind == 'review.md' and task.get('review_content'):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(task['review_content'])
+    else:
+        return False
+    return True
+
+
+# 按需生成导出文件时避免并发请求重复写同一文件
+export_lock = threading.Lock()
+
+
 @app.route('/api/files/<path:filename>')
 def download_file(filename):
-    """下载输出文件"""
+    """下载输出文件（缺失时按需生成）"""
+    if os.path.basename(filename) == filename:
+        with export_lock:
+            ensure_export(filename)
     return send_from_directory(OUTPUT_DIR, filename)
 
 
+
+@app.route('/api/llm/endpoints', methods=['GET'])
+def llm_endpoints():
+    """LLM端点的熔断状态、在途请求数与近期延迟（本进程）"""
+    return jsonify({'endpoints': router_status()})
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus指标（每个进程分别统计）"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("PubMed文献搜索Web服务")
     print("访问地址: http://localhost:5000")
     print("=" * 50)
+    # 开发服务器仅适合单进程；多进程部署请设置 TASK_BACKEND = "sqlite" 并使用WSGI服务器，
+    # 例如: gunicorn -w 4 -b 0.0.0.0:5000 app:app
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
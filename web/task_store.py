@@ -0,0 +1,701 @@
+"""
+任务存储模块 - 管理Web任务的生命周期、内存上限与结果落盘
+
+提供两种后端：
+- MemoryTaskStore: 进程内字典，适合单进程部署
+- SQLiteTaskStore: 基于SQLite文件的共享存储，多个WSGI工作进程（或挂载同一存储的多台主机）
+  可共享任务状态、暂停/取消信号与任务队列
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import config
+from article import json_default
+
+# 任务结束后会被转存到磁盘的大字段
+HEAVY_FIELDS = ('results', 'review_content')
+
+# 已结束（可被淘汰）的任务状态
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+
+# 落盘时一并保存的任务元信息
+META_FIELDS = ('status', 'progress', 'message', 'files', 'polished_topic', 'error', 'timings', 'term_hits',
+               'llm_usage', 'summary_retry')
+
+SPILL_SUFFIX = "_results.json.gz"
+
+# 任务产物的文件名：{task_id}_...（任务ID为UUID）；清理时只处理这类文件
+_ARTIFACT_RE = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_")
+
+
+class TaskStore:
+    """任务存储基类，定义Web层使用的接口，并实现与后端无关的落盘与清理逻辑"""
+
+    def __init__(self, output_dir: str, max_tasks: int = None, max_bytes: int = None,
+                 ttl: float = None, file_ttl: float = None):
+        """
+        初始化任务存储
+
+        Args:
+            output_dir: 输出目录，结果转存文件也保存在此目录
+            max_tasks: 最多保留的任务数
+            max_bytes: 任务结果的总字节上限
+            ttl: 已结束任务的保留时间(秒)
+            file_ttl: 输出文件的保留时间(秒)，0表示不清理
+        """
+        self.output_dir = output_dir
+        self.max_tasks = max_tasks or config.TASK_MAX_COUNT
+        self.max_bytes = max_bytes or config.TASK_MAX_BYTES
+        self.ttl = ttl or config.TASK_TTL
+        self.file_ttl = config.OUTPUT_FILE_TTL if file_ttl is None else file_ttl
+
+    # ---------- 后端需实现的接口 ----------
+
+    def create(self, task_id: str, task: Dict) -> Dict:
+        """登记新任务（状态为pending的任务会进入任务队列）"""
+        raise NotImplementedError
+
+    def get(self, task_id: str, with_results: bool = True) -> Optional[Dict]:
+        """获取任务字典的快照，不存在返回None"""
+        raise NotImplementedError
+
+    def update(self, task_id: str, **fields):
+        """原子地更新任务的部分字段"""
+        raise NotImplementedError
+
+    def try_set(self, task_id: str, flag: str, **fields) -> bool:
+        """
+        标志字段为假时原子地将其置为True并更新其余字段（检查与写入之间不会被其他请求插入）
+
+        Args:
+            task_id: 任务ID
+            flag: 标志字段名
+            **fields: 同时更新的字段
+
+        Returns:
+            是否置位成功（任务不存在或标志已为真时返回False）
+        """
+        raise NotImplementedError
+
+    def set_results(self, task_id: str, results: List[Dict]):
+        """整体替换任务的结果列表"""
+        raise NotImplementedError
+
+    def update_result(self, task_id: str, index: int, article: Dict):
+        """更新结果列表中的单篇文章"""
+        raise NotImplementedError
+
+    def claim_next(self, timeout: float = 1.0, worker_id: str = None) -> Optional[Tuple[str, Dict]]:
+        """
+        从共享队列中领取一个待执行的任务
+
+        Args:
+            timeout: 最长等待时间(秒)
+            worker_id: 领取者标识，用于续租（见heartbeat）
+
+        Returns:
+            (任务ID, 任务参数)，超时返回None
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, worker_id: str):
+        """为该领取者正在执行（运行中/已暂停）的任务续租"""
+        raise NotImplementedError
+
+    def reclaim_expired(self) -> int:
+        """
+        回收租约过期（领取者已退出）的任务：未达到最大执行次数时重新排队，否则标记为错误
+
+        Returns:
+            回收的任务数
+        """
+        raise NotImplementedError
+
+    def get_setting(self, key: str, default=None):
+        """读取共享配置项"""
+        raise NotImplementedError
+
+    def set_setting(self, key: str, value):
+        """写入共享配置项"""
+        raise NotImplementedError
+
+    def enforce_retention(self):
+        """按TTL、任务数和字节数上限淘汰已结束的任务"""
+        raise NotImplementedError
+
+    def _drop_payload(self, task_id: str, result_count: int):
+        """释放已转存任务的大字段"""
+        raise NotImplementedError
+
+    def _live_ids(self) -> set:
+        """当前仍被存储管理的任务ID集合"""
+        raise NotImplementedError
+
+    # ---------- 通用逻辑 ----------
+
+    def mark_finished(self, task_id: str):
+        """记录任务结束时间，用于TTL淘汰"""
+        task = self.get(task_id, with_results=False)
+        if task is not None and not task.get('finished_at'):
+            self.update(task_id, finished_at=time.time())
+
+    def _spill_path(self, task_id: str) -> str:
+        return os.path.join(self.output_dir, f"{task_id}{SPILL_SUFFIX}")
+
+    def spill(self, task_id: str) -> bool:
+        """
+        将已完成任务的大字段转存为压缩文件，并从存储中释放
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            是否转存成功
+        """
+        task = self.get(task_id)
+        if not task or task.get('spilled'):
+            return False
+
+        payload = {field: task.get(field) for field in META_FIELDS}
+        for field in HEAVY_FIELDS:
+            payload[field] = task.get(field)
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            tmp_path = self._spill_path(task_id) + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, default=json_default)
+            os.replace(tmp_path, self._spill_path(task_id))
+        except Exception as e:
+            print(f"任务结果转存失败 {task_id}: {e}")
+            return False
+
+        self._drop_payload(task_id, len(task.get('results') or []))
+        return True
+
+    def load_spilled(self, task_id: str) -> Optional[Dict]:
+        """
+        读取已转存任务的结果与元信息
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            转存内容字典，文件不存在返回None
+        """
+        path = self._spill_path(task_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取任务结果失败 {task_id}: {e}")
+            return None
+
+    def collect_garbage(self) -> int:
+        """
+        清理输出目录中过期的任务产物（只处理 {task_id}_* 文件，不会删除仍被管理任务的文件与存储自身的文件）
+
+        Returns:
+            删除的文件数
+        """
+        if not self.file_ttl or not os.path.isdir(self.output_dir):
+            return 0
+
+        live_ids = self._live_ids()
+        protected = {os.path.abspath(path) for path in self._protected_paths()}
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.output_dir):
+            match = _ARTIFACT_RE.match(name)
+            if not match or match.group(1) in live_ids:
+                continue
+            path = os.path.join(self.output_dir, name)
+            if os.path.abspath(path) in protected:
+                continue
+            try:
+                if os.path.isfile(path) and now - os.path.getmtime(path) > self.file_ttl:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def _protected_paths(self) -> List[str]:
+        """存储后端自身使用、清理时必须跳过的文件"""
+        return []
+
+    def start_janitor(self, interval: float = None) -> threading.Thread:
+        """
+        启动后台清理线程，定期执行保留策略与文件清理
+
+        Args:
+            interval: 运行间隔(秒)
+
+        Returns:
+            清理线程
+        """
+        interval = interval or config.TASK_JANITOR_INTERVAL
+
+        def _loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reclaim_expired()
+                    self.enforce_retention()
+                    self.collect_garbage()
+                except Exception as e:
+                    print(f"任务清理错误: {e}")
+
+        thread = threading.Thread(target=_loop, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _estimate_bytes(task: Dict) -> int:
+        """粗略估算任务结果的大小（按字符串长度计）"""
+        size = len(task.get('review_content') or '')
+        for article in task.get('results') or []:
+            for value in article.values():
+                if isinstance(value, str):
+                    size += len(value)
+        return size
+
+
+class MemoryTaskStore(TaskStore):
+    """进程内任务存储（单进程部署）"""
+
+    def __init__(self, output_dir: str, **kwargs):
+        super().__init__(output_dir, **kwargs)
+        self._tasks = OrderedDict()
+        self._settings = {}
+        self._queue = queue.Queue()
+        self._lock = threading.RLock()
+
+    def create(self, task_id: str, task: Dict) -> Dict:
+        task.setdefault('created_at', time.time())
+        with self._lock:
+            self._tasks[task_id] = task
+        if task.get('status') == 'pending':
+            self._queue.put(task_id)
+        self.enforce_retention()
+        return task
+
+    def get(self, task_id: str, with_results: bool = True) -> Optional[Dict]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return dict(task) if task is not None else None
+
+    def __contains__(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._tasks
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def update(self, task_id: str, **fields):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                task.update(fields)
+
+    def try_set(self, task_id: str, flag: str, **fields) -> bool:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None or task.get(flag):
+                return False
+            task.update(fields)
+            task[flag] = True
+            return True
+
+    def set_results(self, task_id: str, results: List[Dict]):
+        self.update(task_id, results=results)
+
+    def update_result(self, task_id: str, index: int, article: Dict):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is not None and index < len(task.get('results') or []):
+                task['results'][index] = article
+
+    def claim_next(self, timeout: float = 1.0, worker_id: str = None) -> Optional[Tuple[str, Dict]]:
+        try:
+            task_id = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None or task.get('status') != 'pending':
+                return None
+            task.update(status='running', worker_id=worker_id)
+            return task_id, task.get('params') or {}
+
+    def heartbeat(self, worker_id: str):
+        # 进程内任务随进程一起结束，无需租约
+        pass
+
+    def reclaim_expired(self) -> int:
+        return 0
+
+    def get_setting(self, key: str, default=None):
+        with self._lock:
+            return self._settings.get(key, default)
+
+    def set_setting(self, key: str, value):
+        with self._lock:
+            self._settings[key] = value
+
+    def _live_ids(self) -> set:
+        with self._lock:
+            return set(self._tasks.keys())
+
+    def _drop_payload(self, task_id: str, result_count: int):
+        self.update(task_id, result_count=result_count, results=[],
+                    review_content='', spilled=True)
+
+    def enforce_retention(self):
+        now = time.time()
+        with self._lock:
+            finished = [tid for tid, t in self._tasks.items()
+                        if t.get('status') in FINISHED_STATUSES]
+
+            # 1. TTL淘汰
+            for tid in finished:
+                finished_at = self._tasks[tid].get('finished_at') or now
+                if now - finished_at > self.ttl:
+                    self._evict(tid)
+            finished = [tid for tid in finished if tid in self._tasks]
+
+            # 2. 任务数上限（从最早创建的开始淘汰）
+            while len(self._tasks) > self.max_tasks and finished:
+                self._evict(finished.pop(0))
+
+            # 3. 字节数上限
+            total = sum(self._estimate_bytes(t) for t in self._tasks.values())
+            while total > self.max_bytes and finished:
+                tid = finished.pop(0)
+                total -= self._estimate_bytes(self._tasks[tid])
+                self._evict(tid)
+
+    def _evict(self, task_id: str):
+        """从内存中移除任务，已完成任务的结果仍可从转存文件读取"""
+        task = self._tasks.get(task_id)
+        if task is None:
+            return
+        if task.get('status') == 'completed' and not task.get('spilled'):
+            self.spill(task_id)
+        del self._tasks[task_id]
+
+
+class SQLiteTaskStore(TaskStore):
+    """基于SQLite的共享任务存储（多进程/多主机部署）"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            finished_at REAL,
+            data TEXT NOT NULL,
+            worker_id TEXT,
+            claimed_at REAL,
+            heartbeat_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, created_at);
+        CREATE TABLE IF NOT EXISTS task_results (
+            task_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (task_id, idx)
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # 租约字段（旧版本创建的数据库启动时补齐）
+    LEASE_COLUMNS = (("worker_id", "TEXT"), ("claimed_at", "REAL"), ("heartbeat_at", "REAL"))
+
+    def __init__(self, output_dir: str, db_path: str = None, poll_interval: float = 0.5,
+                 lease_timeout: float = None, max_attempts: int = None, **kwargs):
+        """
+        初始化SQLite任务存储
+
+        Args:
+            output_dir: 输出目录
+            db_path: 数据库文件路径，默认放在输出目录下
+            poll_interval: 领取任务时的轮询间隔(秒)
+            lease_timeout: 运行中任务未续租多久(秒)后视为领取者已退出，默认使用config.TASK_LEASE_TIMEOUT
+            max_attempts: 任务最多被领取执行的次数，默认使用config.TASK_MAX_ATTEMPTS
+        """
+        super().__init__(output_dir, **kwargs)
+        self.db_path = db_path or config.TASK_DB_PATH or os.path.join(output_dir, "tasks.db")
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout or config.TASK_LEASE_TIMEOUT
+        self.max_attempts = max_attempts or config.TASK_MAX_ATTEMPTS
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        for column, kind in self.LEASE_COLUMNS:
+            if column not in columns:
+                try:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {kind}")
+                except sqlite3.OperationalError:
+                    pass  # 其他进程已同时补齐
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """写事务：BEGIN IMMEDIATE 保证跨进程的读-改-写原子性"""
+        store = self
+
+        class _Txn:
+            def __enter__(self):
+                self.conn = store._conn()
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Txn()
+
+    def create(self, task_id: str, task: Dict) -> Dict:
+        task.setdefault('created_at', time.time())
+        data = {k: v for k, v in task.items() if k not in ('results', 'created_at', 'finished_at')}
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, status, created_at, finished_at, data) VALUES (?, ?, ?, ?, ?)",
+                (task_id, task.get('status', 'pending'), task['created_at'],
+                 task.get('finished_at'), json.dumps(data, ensure_ascii=False, default=json_default))
+            )
+        if task.get('results'):
+            self.set_results(task_id, task['results'])
+        self.enforce_retention()
+        return task
+
+    def get(self, task_id: str, with_results: bool = True) -> Optional[Dict]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT status, created_at, finished_at, data FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task = json.loads(row[3])
+        task['status'], task['created_at'], task['finished_at'] = row[0], row[1], row[2]
+        if with_results:
+            task['results'] = [json.loads(r[0]) for r in conn.execute(
+                "SELECT data FROM task_results WHERE task_id = ? ORDER BY idx", (task_id,))]
+        return task
+
+    def __contains__(self, task_id: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def update(self, task_id: str, **fields):
+        if 'results' in fields:
+            self.set_results(task_id, fields.pop('results') or [])
+        if not fields:
+            return
+        with self._transaction() as conn:
+            self._update_row(conn, task_id, fields)
+
+    def try_set(self, task_id: str, flag: str, **fields) -> bool:
+        with self._transaction() as conn:
+            return self._update_row(conn, task_id, {**fields, flag: True}, unless=flag)
+
+    @staticmethod
+    def _update_row(conn: sqlite3.Connection, task_id: str, fields: Dict, unless: str = None) -> bool:
+        """在事务中更新任务字段；unless字段为真时不更新。返回是否已更新"""
+        row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return False
+        data = json.loads(row[0])
+        if unless and data.get(unless):
+            return False
+        status = fields.pop('status', data.get('status'))
+        finished_at = fields.pop('finished_at', None)
+        data.update(fields)
+        data['status'] = status
+        conn.execute(
+            "UPDATE tasks SET status = ?, finished_at = COALESCE(?, finished_at), data = ? WHERE id = ?",
+            (status, finished_at, json.dumps(data, ensure_ascii=False, default=json_default), task_id)
+        )
+        return True
+
+    def set_results(self, task_id: str, results: List[Dict]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+            conn.executemany(
+                "INSERT INTO task_results (task_id, idx, data) VALUES (?, ?, ?)",
+                [(task_id, i, json.dumps(a, ensure_ascii=False, default=json_default)) for i, a in enumerate(results)]
+            )
+
+    def update_result(self, task_id: str, index: int, article: Dict):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO task_results (task_id, idx, data) VALUES (?, ?, ?)",
+                (task_id, index, json.dumps(article, ensure_ascii=False, default=json_default))
+            )
+
+    def claim_next(self, timeout: float = 1.0, worker_id: str = None) -> Optional[Tuple[str, Dict]]:
+        deadline = time.time() + timeout
+        while True:
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT id, data FROM tasks WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    data = json.loads(row[1])
+                    data['status'] = 'running'
+                    data['attempts'] = data.get('attempts', 0) + 1
+                    now = time.time()
+                    conn.execute(
+                        "UPDATE tasks SET status = 'running', data = ?, worker_id = ?, claimed_at = ?, "
+                        "heartbeat_at = ? WHERE id = ?",
+                        (json.dumps(data, ensure_ascii=False, default=json_default), worker_id, now, now, row[0])
+                    )
+                    return row[0], data.get('params') or {}
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def heartbeat(self, worker_id: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET heartbeat_at = ? WHERE worker_id = ? AND status IN ('running', 'paused')",
+                (time.time(), worker_id)
+            )
+
+    def reclaim_expired(self) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            # 旧版本领取的任务没有租约字段，同样视为过期
+            rows = conn.execute(
+                "SELECT id, data FROM tasks WHERE status IN ('running', 'paused') "
+                "AND COALESCE(heartbeat_at, claimed_at, 0) < ?", (now - self.lease_timeout,)
+            ).fetchall()
+            for task_id, raw in rows:
+                data = json.loads(raw)
+                if data.get('attempts', 1) < self.max_attempts:
+                    status, finished_at = 'pending', None
+                    data.update(progress=0, paused=False, message='执行任务的工作进程已退出，重新排队...')
+                else:
+                    status, finished_at = 'error', now
+                    data.update(message='错误: 执行任务的工作进程已退出', error='worker lost')
+                data['status'] = status
+                conn.execute(
+                    "UPDATE tasks SET status = ?, finished_at = ?, data = ?, worker_id = NULL, claimed_at = NULL, "
+                    "heartbeat_at = NULL WHERE id = ?",
+                    (status, finished_at, json.dumps(data, ensure_ascii=False, default=json_default), task_id)
+                )
+        for task_id, _ in rows:
+            print(f"回收失联任务 {task_id}")
+        return len(rows)
+
+    def get_setting(self, key: str, default=None):
+        row = self._conn().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_setting(self, key: str, value):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                         (key, json.dumps(value, ensure_ascii=False, default=json_default)))
+
+    def _live_ids(self) -> set:
+        return {r[0] for r in self._conn().execute("SELECT id FROM tasks")}
+
+    def _protected_paths(self) -> List[str]:
+        return [self.db_path + suffix for suffix in ("", "-wal", "-shm", "-journal")]
+
+    def _drop_payload(self, task_id: str, result_count: int):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+        self.update(task_id, result_count=result_count, review_content='', spilled=True)
+
+    def _finished_rows(self) -> list:
+        """已结束任务 (id, status, finished_at, data)，按创建时间排序"""
+        marks = ",".join("?" * len(FINISHED_STATUSES))
+        return self._conn().execute(
+            f"SELECT id, status, finished_at, data FROM tasks WHERE status IN ({marks}) ORDER BY created_at",
+            FINISHED_STATUSES
+        ).fetchall()
+
+    def enforce_retention(self):
+        now = time.time()
+        finished = self._finished_rows()
+
+        # 1. TTL淘汰
+        remaining = []
+        for row in finished:
+            if now - (row[2] or now) > self.ttl:
+                self._evict(row)
+            else:
+                remaining.append(row)
+
+        # 2. 任务数上限
+        while len(self) > self.max_tasks and remaining:
+            self._evict(remaining.pop(0))
+
+        # 3. 字节数上限（结果明细与综述文本）
+        total = self._conn().execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM task_results").fetchone()[0]
+        total += self._conn().execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM tasks").fetchone()[0]
+        while total > self.max_bytes and remaining:
+            row = remaining.pop(0)
+            total -= self._conn().execute(
+                "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM task_results WHERE task_id = ?",
+                (row[0],)).fetchone()[0] + len(row[3])
+            self._evict(row)
+
+    def _evict(self, row):
+        task_id, status = row[0], row[1]
+        if status == 'completed' and not json.loads(row[3]).get('spilled'):
+            self.spill(task_id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+            conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+
+def create_task_store(output_dir: str) -> TaskStore:
+    """
+    根据配置创建任务存储后端
+
+    Args:
+        output_dir: 输出目录
+
+    Returns:
+        任务存储实例
+    """
+    backend = (config.TASK_BACKEND or 'memory').lower()
+    if backend == 'memory':
+        return MemoryTaskStore(output_dir)
+    if backend == 'sqlite':
+        return SQLiteTaskStore(output_dir)
+    raise ValueError(f"未知的任务存储后端: {config.TASK_BACKEND}")